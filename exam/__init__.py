@@ -0,0 +1,2 @@
+# ophtheon/exam
+# 검사 시행(pages/2test.py) 단계에서 쓰는 질문 세트 / 오디오 처리 모듈 모음.
@@ -0,0 +1,234 @@
+# ophtheon/exam/artifacts.py
+# 세션별 검사 오디오 파일 보관소. (NamedTemporaryFile(delete=False)로 /tmp에 쌓이던 파일 대체)
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+DEFAULT_ARTIFACT_DIR = os.environ.get(
+    "OPHTHEON_ARTIFACT_DIR",
+    os.path.join(tempfile.gettempdir(), "ophtheon_artifacts"),
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("OPHTHEON_ARTIFACT_MAX_BYTES", 1024 * 1024 * 1024))
+DEFAULT_IDLE_TTL_SECONDS = int(os.environ.get("OPHTHEON_ARTIFACT_IDLE_TTL", 3 * 3600))
+
+CHUNK_SIZE = 64 * 1024
+_SAFE_NAME = re.compile(r"[A-Za-z0-9_-]+(\.[A-Za-z0-9]+)*")
+
+
+class ArtifactStore:
+    """
+    <root>/<owner>/<slot>-<artifact_id>.<ext> 구조로 검사 오디오를 보관.
+
+    - owner(= Streamlit 세션)의 slot(차트)마다 한 벌만 유지 (새로 넣으면 이전 것 삭제)
+    - mtime을 마지막 접근 시각으로 사용, idle_ttl_seconds 동안 안 쓰면 삭제
+    - 전체 용량이 max_bytes를 넘으면 오래 안 쓴 것부터 삭제
+    - 읽기는 mmap으로 필요한 구간만
+    """
+
+    def __init__(
+        self,
+        root: str = DEFAULT_ARTIFACT_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        idle_ttl_seconds: int = DEFAULT_IDLE_TTL_SECONDS,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _owner_dir(self, owner: str) -> str:
+        return os.path.join(self.root, owner)
+
+    def put(self, owner: str, data: bytes, ext: str = "mp3", sidecars: dict[str, bytes] | None = None,
+            slot: str = "exam") -> str:
+        """
+        owner의 같은 slot 이전 파일을 지우고 새 파일을 원자적으로 저장. 저장된 경로 반환.
+        sidecars({"events.json": ...})는 같은 이름 + 접미사로 옆에 함께 저장.
+        """
+        owner_dir = self._owner_dir(owner)
+        path = os.path.join(owner_dir, f"{slot}-{uuid.uuid4().hex}.{ext}")
+        with self._lock:
+            os.makedirs(owner_dir, exist_ok=True)
+            for name in os.listdir(owner_dir):
+                if name.startswith(f"{slot}-"):
+                    _remove_quietly(os.path.join(owner_dir, name))
+            for target, payload in [(path, data)] + [
+                (self.sidecar_path(path, suffix), payload) for suffix, payload in (sidecars or {}).items()
+            ]:
+                fd, tmp_path = tempfile.mkstemp(dir=owner_dir, suffix=".part")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(payload)
+                os.replace(tmp_path, target)
+        self.evict(keep=path)
+        return path
+
+    def begin(self, owner: str, ext: str = "mp3", slot: str = "exam") -> str:
+        """
+        점점 길어지는 파일(스트리밍 합성)을 쓰기 위한 .part 경로. 같은 slot의 이전 파일은 삭제.
+        .part 파일은 정리 대상에서 빠지며, 다 쓰면 finish()로 확정.
+        """
+        owner_dir = self._owner_dir(owner)
+        with self._lock:
+            os.makedirs(owner_dir, exist_ok=True)
+            for name in os.listdir(owner_dir):
+                if name.startswith(f"{slot}-"):
+                    _remove_quietly(os.path.join(owner_dir, name))
+        return os.path.join(owner_dir, f"{slot}-{uuid.uuid4().hex}.{ext}.part")
+
+    def finish(self, part_path: str, sidecars: dict[str, bytes] | None = None) -> str:
+        """
+        begin()으로 받은 .part 파일을 확정하고 sidecar를 함께 저장. 확정된 경로 반환.
+        """
+        path = part_path[:-len(".part")]
+        owner_dir = os.path.dirname(part_path)
+        with self._lock:
+            for target, payload in [
+                (self.sidecar_path(path, suffix), payload) for suffix, payload in (sidecars or {}).items()
+            ]:
+                fd, tmp_path = tempfile.mkstemp(dir=owner_dir, suffix=".part")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(payload)
+                os.replace(tmp_path, target)
+            os.replace(part_path, path)
+        self.evict(keep=path)
+        return path
+
+    @staticmethod
+    def sidecar_path(path: str, suffix: str) -> str:
+        return f"{os.path.splitext(path)[0]}.{suffix}"
+
+    def relative(self, path: str) -> str:
+        """
+        보관소 기준 "<owner>/<파일 이름>" (HTTP 경로용).
+        """
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def resolve(self, owner: str, name: str) -> str | None:
+        """
+        relative()의 역. 경로 조작이 섞였거나 파일이 없으면(정리됨 / 아직 쓰는 중) None.
+        """
+        if not _SAFE_NAME.fullmatch(owner) or not _SAFE_NAME.fullmatch(name) or name.endswith(".part"):
+            return None
+        path = os.path.join(self._owner_dir(owner), name)
+        return path if os.path.isfile(path) else None
+
+    def touch(self, path: str):
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+
+    def size(self, path: str) -> int:
+        return os.path.getsize(path)
+
+    def read_range(self, path: str, start: int = 0, end: int | None = None) -> bytes:
+        """
+        [start, end) 구간만 mmap으로 읽음. 파일 전체를 메모리에 올리지 않음.
+        """
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            end = size if end is None else min(end, size)
+            if size == 0 or start >= end:
+                return b""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                data = mm[start:end]
+        self.touch(path)
+        return data
+
+    def iter_chunks(self, path: str, start: int = 0, end: int | None = None, chunk_size: int = CHUNK_SIZE):
+        """
+        [start, end) 구간을 chunk_size 단위로 나눠 생성 (HTTP 응답 스트리밍용).
+        """
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            end = size if end is None else min(end, size)
+            if size == 0 or start >= end:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for pos in range(start, end, chunk_size):
+                    yield mm[pos:min(pos + chunk_size, end)]
+        self.touch(path)
+
+    def release(self, owner: str):
+        """
+        owner(세션)의 파일을 모두 삭제. '검사 종료' 시 호출.
+        """
+        with self._lock:
+            shutil.rmtree(self._owner_dir(owner), ignore_errors=True)
+
+    def _files(self):
+        files = []
+        for owner in os.listdir(self.root):
+            owner_dir = os.path.join(self.root, owner)
+            if not os.path.isdir(owner_dir):
+                continue
+            for name in os.listdir(owner_dir):
+                if name.endswith(".part"):
+                    continue
+                path = os.path.join(owner_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def evict(self, keep: str | None = None):
+        """
+        idle TTL이 지난 파일 삭제 후, 용량 초과분을 오래 안 쓴 순서로 삭제. 빈 owner 디렉터리도 정리.
+        """
+        now = time.time()
+        with self._lock:
+            alive = []
+            for mtime, size, path in sorted(self._files()):
+                if not _same_artifact(path, keep) and now - mtime > self.idle_ttl_seconds:
+                    _remove_quietly(path)
+                else:
+                    alive.append((mtime, size, path))
+
+            total = sum(size for _, size, _ in alive)
+            for mtime, size, path in alive:
+                if total <= self.max_bytes:
+                    break
+                if _same_artifact(path, keep):
+                    continue
+                _remove_quietly(path)
+                total -= size
+
+            for owner in os.listdir(self.root):
+                owner_dir = os.path.join(self.root, owner)
+                if os.path.isdir(owner_dir) and not os.listdir(owner_dir):
+                    try:
+                        os.rmdir(owner_dir)
+                    except OSError:
+                        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            files = self._files()
+        return {
+            "files": len(files),
+            "bytes": sum(size for _, size, _ in files),
+            "max_bytes": self.max_bytes,
+        }
+
+
+def _same_artifact(path: str, keep: str | None) -> bool:
+    if keep is None:
+        return False
+    stem = os.path.splitext(keep)[0]
+    return path == keep or path.startswith(stem + ".")
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,255 @@
+# ophtheon/exam/audio_server.py
+# 검사 오디오를 Streamlit 웹소켓 대신 별도 HTTP 경로로 내보내는 작은 서버 (서버 프로세스당 하나).
+#
+#   GET /stream/<token>            합성 중인 검사 오디오 (chunked, 준비된 조각까지만)
+#   GET /audio/<owner>/<file>      완성된 검사 오디오 (Range / ETag / 브라우저 캐시)
+#   POST /pupil/<token>            실시간 채점용 동공 샘플 배치 (JSON, pupil.online.OnlineScorer.push_payload)
+#   POST /pupil/<token>/play       브라우저 재생 시작 신호 (서버 시계 time.time()을 오디오 시작 시각으로)
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from exam.transcode import mime_type
+from exam.tts import TTS_EXAM_DEADLINE
+
+# 기본은 이 컴퓨터에서만 접속. 다른 컴퓨터의 브라우저에 직접 내보내려면 "0.0.0.0" 등을 명시적으로 지정
+# (보통은 127.0.0.1에 두고 프록시 뒤에서 AUDIO_SERVER_URL로 내보냄). 로컬 전용인데 URL도 없으면
+# 다른 컴퓨터의 브라우저는 이 서버에 닿지 않으므로 페이지가 st.audio로 대체 (AudioServer.reachable_from).
+AUDIO_SERVER_HOST = os.environ.get("OPHTHEON_AUDIO_SERVER_HOST", "127.0.0.1")
+AUDIO_SERVER_PORT = int(os.environ.get("OPHTHEON_AUDIO_SERVER_PORT", 8765))
+# 브라우저가 접속할 주소 (프록시 뒤라면 지정). 비우면 Streamlit 페이지와 같은 호스트의 AUDIO_SERVER_PORT
+AUDIO_SERVER_URL = os.environ.get("OPHTHEON_AUDIO_SERVER_URL", "")
+# 동공 샘플 배치 최대 크기
+MAX_PUPIL_PAYLOAD_BYTES = 4 * 1024 * 1024
+# 보관소 파일은 이름(uuid)이 같으면 내용도 같으므로 세션 유지 시간 동안 브라우저 캐시 허용
+AUDIO_CACHE_MAX_AGE = int(os.environ.get("OPHTHEON_AUDIO_CACHE_MAX_AGE", 3 * 3600))
+
+
+def is_loopback(host: str) -> bool:
+    """
+    "localhost" / 127.x.x.x / ::1 (포트 / 대괄호가 붙은 Host 헤더 값도 받음).
+    """
+    host = host.strip()
+    if host.startswith("["):
+        host = host[1:].partition("]")[0]
+    elif host.count(":") == 1:
+        host = host.partition(":")[0]
+    return host.lower() == "localhost" or host.startswith("127.") or host == "::1"
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    "bytes=a-b" / "bytes=a-" / "bytes=-n" 를 [start, end) 로. 범위 하나만 지원.
+    헤더가 없거나 해석할 수 없으면 None(전체 전송), 만족할 수 없는 범위면 ValueError(416).
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, sep, last = header[len("bytes="):].strip().partition("-")
+    if not sep or not (first or last) or not all(p == "" or p.isdigit() for p in (first, last)):
+        return None
+    if first == "":
+        n = int(last)
+        if n == 0:
+            raise ValueError(header)
+        return max(0, size - n), size
+    start = int(first)
+    if last != "" and int(last) < start:
+        return None
+    end = size if last == "" else min(int(last) + 1, size)
+    if start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+class _AudioRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ophtheon-audio"
+
+    def do_GET(self):
+        self._route(send_body=True)
+
+    def do_HEAD(self):
+        self._route(send_body=False)
+
+    def do_POST(self):
+        parts = self.path.split("?", 1)[0].strip("/").split("/")
+        scorer = self.server.scores.get(parts[1]) if self.server.scores and len(parts) >= 2 else None
+        if parts[0] != "pupil" or scorer is None or len(parts) > 3 or (len(parts) == 3 and parts[2] != "play"):
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_PUPIL_PAYLOAD_BYTES:
+            self.send_error(413)
+            return
+        body = self.rfile.read(length)
+        if len(parts) == 3:
+            scorer.set_audio_onset(time.time(), replace=False)
+            self.send_response(204)
+            self.end_headers()
+            return
+        try:
+            scorer.push_payload(json.loads(body))
+        except (ValueError, TypeError, AttributeError) as e:
+            self.send_error(400, str(e))
+            return
+        payload = json.dumps(scorer.status()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _route(self, send_body: bool):
+        parts = self.path.split("?", 1)[0].strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "stream" and send_body:
+            self._send_stream(parts[1])
+        elif len(parts) == 3 and parts[0] == "audio":
+            self._send_artifact(parts[1], parts[2], send_body)
+        else:
+            self.send_error(404)
+
+    def _send_stream(self, token: str):
+        stream = self.server.streams.get(token)
+        if stream is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        try:
+            for chunk in stream.iter_bytes(idle_timeout=TTS_EXAM_DEADLINE):
+                self.wfile.write(f"{len(chunk):X}\r\n".encode("ascii") + chunk + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        except Exception:
+            # 합성 실패 / 지연: 응답을 끝내지 않고 연결을 닫아 브라우저가 오류로 인식하게 함
+            self.close_connection = True
+
+    def _send_artifact(self, owner: str, name: str, send_body: bool):
+        store = self.server.artifacts
+        path = store.resolve(owner, name)
+        if path is None:
+            self.send_error(404)
+            return
+        size = store.size(path)
+        etag = f'"{os.path.splitext(name)[0]}-{size:x}"'
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self._send_cache_headers(etag)
+            self.end_headers()
+            store.touch(path)
+            return
+
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if if_range is not None and if_range != etag:
+            range_header = None
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start, end = byte_range if byte_range is not None else (0, size)
+        self.send_response(206 if byte_range is not None else 200)
+        self.send_header("Content-Type", mime_type(path))
+        self.send_header("Content-Length", str(end - start))
+        self.send_header("Accept-Ranges", "bytes")
+        if byte_range is not None:
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{size}")
+        self._send_cache_headers(etag)
+        self.end_headers()
+        if not send_body:
+            store.touch(path)
+            return
+        try:
+            for chunk in store.iter_chunks(path, start, end):
+                self.wfile.write(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_cache_headers(self, etag: str):
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", f"private, max-age={AUDIO_CACHE_MAX_AGE}, immutable")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AudioServer:
+    """
+    ThreadingHTTPServer를 데몬 스레드에서 실행.
+    streams는 exam.streaming.StreamRegistry, artifacts는 exam.artifacts.ArtifactStore,
+    scores는 pupil.online.LiveScoreRegistry (없으면 /pupil 경로 비활성).
+    """
+
+    def __init__(self, streams, artifacts, scores=None, host: str = AUDIO_SERVER_HOST,
+                 port: int = AUDIO_SERVER_PORT):
+        self.host = host
+        self.httpd = ThreadingHTTPServer((host, port), _AudioRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.streams = streams
+        self.httpd.artifacts = artifacts
+        self.httpd.scores = scores
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    def start(self) -> "AudioServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="ophtheon-audio-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    @staticmethod
+    def stream_path(token: str) -> str:
+        return f"/stream/{token}"
+
+    def artifact_path(self, path: str) -> str:
+        return f"/audio/{self.httpd.artifacts.relative(path)}"
+
+    @staticmethod
+    def pupil_path(token: str) -> str:
+        return f"/pupil/{token}"
+
+    def reachable_from(self, page_host: str | None) -> bool:
+        """
+        Streamlit 페이지에 page_host(브라우저가 보낸 Host 헤더)로 접속한 브라우저가 이 서버에 닿는지.
+        AUDIO_SERVER_URL이 있거나 외부 주소로 열었으면 항상, 로컬 전용이면 브라우저도 이 컴퓨터일 때만.
+        """
+        if AUDIO_SERVER_URL or not is_loopback(self.host):
+            return True
+        return bool(page_host) and is_loopback(page_host)
+
+    def base_url(self, host: str = "localhost") -> str:
+        return AUDIO_SERVER_URL or f"http://{host}:{self.port}"
+
+    def player_html(self, path: str, on_play: str | None = None) -> str:
+        """
+        path를 재생하는 <audio> 태그. 서버 주소는 브라우저에서 페이지 호스트 기준으로 정함.
+        브라우저가 이 서버에 닿는지(reachable_from)는 부르는 쪽에서 먼저 확인.
+        on_play를 주면 처음 재생할 때 그 경로로 신호(sendBeacon)를 보냄.
+        """
+        return f"""
+<audio controls preload="auto" style="width:100%"></audio>
+<script>
+const base = {json.dumps(AUDIO_SERVER_URL)}
+  || `${{window.parent.location.protocol}}//${{window.parent.location.hostname}}:{self.port}`;
+const audio = document.querySelector("audio");
+audio.src = base + {json.dumps(path)};
+const onPlay = {json.dumps(on_play)};
+if (onPlay) audio.addEventListener("play", () => navigator.sendBeacon(base + onPlay), {{once: true}});
+</script>
+"""
@@ -0,0 +1,109 @@
+# ophtheon/exam/backends.py
+# TTS 백엔드. OPHTHEON_TTS_BACKEND 로 선택 ("openai" 기본, "offline" = 네트워크 없이 결정적 오디오).
+import hashlib
+import os
+import time
+from abc import ABC, abstractmethod
+
+from exam.mp3 import silence
+
+TTS_BACKEND = os.environ.get("OPHTHEON_TTS_BACKEND", "openai")
+
+# offline 백엔드 설정
+OFFLINE_CHARS_PER_SECOND = float(os.environ.get("OPHTHEON_OFFLINE_TTS_CHARS_PER_SECOND", 7.0))
+OFFLINE_LATENCY = float(os.environ.get("OPHTHEON_OFFLINE_TTS_LATENCY", 0.0))
+OFFLINE_LATENCY_PER_CHAR = float(os.environ.get("OPHTHEON_OFFLINE_TTS_LATENCY_PER_CHAR", 0.0))
+OFFLINE_LATENCY_JITTER = float(os.environ.get("OPHTHEON_OFFLINE_TTS_LATENCY_JITTER", 0.0))
+
+
+class TTSBackend(ABC):
+    """
+    텍스트 → 오디오 바이트. (model, voice, format)은 캐시 키에 들어가므로
+    서로 다른 백엔드의 결과가 같은 캐시 항목을 덮어쓰지 않음.
+    speech를 구현하지 않은 백엔드는 만들 때 TypeError.
+    """
+
+    name = "base"
+    model = ""
+    voice = ""
+    format = "mp3"
+
+    @abstractmethod
+    def speech(self, text: str, timeout: float | None = None) -> bytes:
+        """
+        text를 합성한 오디오(format) 바이트. timeout(초) 안에 끝나지 않으면 타임아웃 예외.
+        """
+
+
+class OpenAIBackend(TTSBackend):
+    name = "openai"
+
+    def __init__(self, client_factory, model: str = "gpt-4o-mini-tts", voice: str = "alloy",
+                 fmt: str = "mp3"):
+        # 클라이언트는 실제 호출 시점에 만듦 (offline 모드에서는 openai 패키지가 필요 없음)
+        self._client_factory = client_factory
+        self.model = model
+        self.voice = voice
+        self.format = fmt
+
+    def speech(self, text: str, timeout: float | None = None) -> bytes:
+        options = {"max_retries": 0}
+        if timeout is not None:
+            options["timeout"] = timeout
+        response = self._client_factory().with_options(**options).audio.speech.create(
+            model=self.model,
+            voice=self.voice,
+            input=text,
+            response_format=self.format,
+        )
+        return response.read()
+
+
+class OfflineBackend(TTSBackend):
+    """
+    네트워크 없이 텍스트 길이에 비례한 길이의 무음 mp3를 만드는 결정적 대체 백엔드.
+    같은 텍스트 → 같은 바이트 / 같은 지연. 벤치마크와 부하 시험용.
+    """
+
+    name = "offline"
+    model = "offline-silence"
+    voice = "none"
+    format = "mp3"
+
+    def __init__(self, chars_per_second: float = OFFLINE_CHARS_PER_SECOND, latency: float = OFFLINE_LATENCY,
+                 latency_per_char: float = OFFLINE_LATENCY_PER_CHAR, jitter: float = OFFLINE_LATENCY_JITTER):
+        self.chars_per_second = chars_per_second
+        self.latency = latency
+        self.latency_per_char = latency_per_char
+        self.jitter = jitter
+
+    def speech_duration_ms(self, text: str) -> float:
+        n_chars = len("".join(text.split()))
+        return max(300.0, n_chars / self.chars_per_second * 1000)
+
+    def simulated_latency(self, text: str) -> float:
+        # 텍스트 해시로 정한 0~1 값 → 같은 텍스트는 항상 같은 지연
+        u = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "big") / 0xFFFFFFFF
+        return self.latency + self.latency_per_char * len(text) + self.jitter * u
+
+    def speech(self, text: str, timeout: float | None = None) -> bytes:
+        delay = self.simulated_latency(text)
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError("offline TTS 지연이 요청 타임아웃을 넘었습니다.")
+        if delay > 0:
+            time.sleep(delay)
+        return silence(self.speech_duration_ms(text))
+
+
+def make_backend(name: str = TTS_BACKEND, client_factory=None) -> TTSBackend:
+    if name == "openai":
+        if client_factory is None:
+            from openai import OpenAI
+
+            client = OpenAI()
+            client_factory = lambda: client
+        return OpenAIBackend(client_factory)
+    if name == "offline":
+        return OfflineBackend()
+    raise ValueError(f"알 수 없는 TTS 백엔드입니다: {name}")
@@ -0,0 +1,172 @@
+# ophtheon/exam/bundle.py
+# 검사 전 단계에서 만드는 자기완결형 사건 번들(.zip).
+#
+#   manifest.json          질문 세트, 검사 시퀀스, 조각 목록, 이벤트 타임라인
+#   question_set.txt       기존 txt와 같은 내용 (사람이 읽거나 txt 업로드로도 사용 가능)
+#   audio/<sha256>.mp3     조각 오디오 (같은 문구는 한 파일, 여러 차트 조립용 문구 포함)
+#
+# 검사 시행 단계는 번들만으로 오디오를 조립하므로 네트워크 호출이 없음.
+import hashlib
+import io
+import json
+import zipfile
+import zlib
+
+from exam.script import build_exam_sequence, exam_key, format_question_set_txt, questions_from_question_set
+from exam.timeline import assemble_exam_audio
+
+BUNDLE_FORMAT = "ophtheon-case-bundle"
+BUNDLE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+class BundleError(ValueError):
+    pass
+
+
+def _audio_name(text: str) -> str:
+    return f"audio/{hashlib.sha256(text.encode('utf-8')).hexdigest()}.mp3"
+
+
+def write_bundle(fileobj, core_claim: str, qs: dict, segments: list, rendered: dict, timeline: dict):
+    """
+    번들을 fileobj에 순서대로 써 나감. mp3는 이미 압축된 데이터이므로 ZIP_STORED.
+    fileobj는 seek이 안 되는 스트림이어도 됨 (zipfile이 data descriptor 사용).
+    """
+    seq = build_exam_sequence(questions_from_question_set(qs))
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "exam_key": exam_key(seq),
+        "core_claim": core_claim,
+        "question_set": {k: qs[k] for k in ("I", "SR", "N", "C", "R")},
+        "sequence": seq,
+        "segments": [
+            dict(seg, file=_audio_name(seg["text"])) if "text" in seg else dict(seg)
+            for seg in segments
+        ],
+        "timeline": timeline,
+        # 차트 조립에 쓰이는 조각까지 포함한 전체 오디오 목록
+        "audio": [{"text": text, "file": _audio_name(text)} for text in rendered],
+    }
+
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2))
+        zf.writestr("question_set.txt", format_question_set_txt(core_claim, qs))
+        for text, audio_bytes in rendered.items():
+            with zf.open(zipfile.ZipInfo(_audio_name(text)), "w") as dst:
+                for pos in range(0, len(audio_bytes), 64 * 1024):
+                    dst.write(audio_bytes[pos:pos + 64 * 1024])
+
+
+def build_bundle_bytes(core_claim: str, qs: dict, segments: list, rendered: dict, timeline: dict) -> bytes:
+    buffer = io.BytesIO()
+    write_bundle(buffer, core_claim, qs, segments, rendered, timeline)
+    return buffer.getvalue()
+
+
+def _require(condition: bool, what: str):
+    if not condition:
+        raise BundleError(f"검사 번들의 manifest.json이 올바르지 않습니다: {what}")
+
+
+def validate_manifest(manifest) -> dict:
+    """
+    manifest 구조 검사. 필요한 키 / 형식이 없으면 BundleError (업로드 페이지에서 그대로 안내).
+    """
+    _require(isinstance(manifest, dict), "최상위가 객체가 아닙니다")
+    _require(manifest.get("format") == BUNDLE_FORMAT, "format")
+    _require(isinstance(manifest.get("version"), int), "version")
+    if manifest["version"] > BUNDLE_VERSION:
+        raise BundleError("지원하지 않는 검사 번들 형식입니다.")
+
+    seq = manifest.get("sequence")
+    _require(isinstance(seq, list) and seq, "sequence")
+    for item in seq:
+        _require(
+            isinstance(item, dict) and isinstance(item.get("type"), str) and isinstance(item.get("text"), str)
+            and "index" in item,
+            "sequence 항목",
+        )
+
+    question_set = manifest.get("question_set")
+    _require(isinstance(question_set, dict) and all(k in question_set for k in ("I", "SR", "N", "C", "R")),
+             "question_set")
+
+    segments = manifest.get("segments")
+    _require(isinstance(segments, list) and segments, "segments")
+    for seg in segments:
+        _require(isinstance(seg, dict) and isinstance(seg.get("kind"), str), "segments 항목")
+        if seg["kind"] == "gap":
+            _require(isinstance(seg.get("ms"), (int, float)) and seg["ms"] >= 0, "gap 조각의 ms")
+        else:
+            _require(isinstance(seg.get("text"), str) and isinstance(seg.get("file"), str), "조각의 text / file")
+
+    audio = manifest.get("audio")
+    if audio is not None:
+        _require(isinstance(audio, list), "audio")
+        for entry in audio:
+            _require(isinstance(entry, dict) and isinstance(entry.get("text"), str)
+                     and isinstance(entry.get("file"), str), "audio 항목")
+        listed = {entry["text"] for entry in audio}
+        _require(all(seg["text"] in listed for seg in segments if seg["kind"] != "gap"), "audio에 없는 조각")
+    _require(isinstance(manifest.get("core_claim", ""), str), "core_claim")
+    return manifest
+
+
+def is_bundle(data: bytes) -> bool:
+    return data[:4] == b"PK\x03\x04"
+
+
+def load_bundle(fileobj) -> dict:
+    """
+    번들을 읽어 core_claim, seq(검사 시퀀스), audio(mp3 바이트), timeline 반환.
+    조각 오디오를 다시 조립하므로 합성 호출이 전혀 없음.
+    손상되었거나 형식이 맞지 않는 번들은 모두 BundleError.
+    """
+    try:
+        return _load_bundle(fileobj)
+    except BundleError:
+        raise
+    except (KeyError, TypeError, AttributeError, UnicodeDecodeError, json.JSONDecodeError,
+            zipfile.BadZipFile, zlib.error, EOFError) as e:
+        raise BundleError(f"검사 번들이 손상되었습니다: {type(e).__name__}") from e
+
+
+def _load_bundle(fileobj) -> dict:
+    try:
+        zf = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile as e:
+        raise BundleError("검사 번들 파일을 읽을 수 없습니다.") from e
+
+    with zf:
+        try:
+            raw = zf.read(MANIFEST_NAME)
+        except KeyError as e:
+            raise BundleError("검사 번들에 manifest.json이 없습니다.") from e
+        manifest = validate_manifest(json.loads(raw.decode("utf-8")))
+
+        seq = manifest["sequence"]
+        if exam_key(seq) != manifest.get("exam_key"):
+            raise BundleError("검사 번들의 질문 시퀀스가 손상되었습니다.")
+
+        segments = manifest["segments"]
+        audio_entries = manifest.get("audio") or [seg for seg in segments if seg["kind"] != "gap"]
+        rendered = {}
+        for entry in audio_entries:
+            if entry["text"] not in rendered:
+                try:
+                    rendered[entry["text"]] = zf.read(entry["file"])
+                except KeyError as e:
+                    raise BundleError(f"검사 번들에 오디오 조각이 없습니다: {entry['file']}") from e
+
+    audio_bytes, timeline = assemble_exam_audio(segments, rendered)
+    return {
+        "core_claim": manifest.get("core_claim", ""),
+        "question_set": manifest["question_set"],
+        "seq": seq,
+        "segments": segments,
+        "rendered": rendered,
+        "audio": audio_bytes,
+        "timeline": timeline,
+    }
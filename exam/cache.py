@@ -0,0 +1,160 @@
+# ophtheon/exam/cache.py
+import hashlib
+import os
+import stat
+import tempfile
+import threading
+import time
+
+from exam.singleflight import file_lock
+
+# ---------------------------------------------------------
+# 설정 (환경 변수로 덮어쓸 수 있음)
+# ---------------------------------------------------------
+DEFAULT_CACHE_DIR = os.environ.get(
+    "OPHTHEON_AUDIO_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "ophtheon_audio_cache"),
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("OPHTHEON_AUDIO_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+DEFAULT_TTL_SECONDS = int(os.environ.get("OPHTHEON_AUDIO_CACHE_TTL", 30 * 24 * 3600))
+
+
+def make_cache_key(text: str, model: str, voice: str, fmt: str) -> str:
+    """
+    (스크립트, 모델, 음성, 포맷) 조합의 sha256 해시를 캐시 키로 사용.
+    """
+    h = hashlib.sha256()
+    for part in (model, voice, fmt, text):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class AudioCache:
+    """
+    TTS 결과를 내용 해시 기준으로 디스크에 저장하는 캐시.
+
+    - 파일 하나 = 항목 하나 (<key>.<fmt>)
+    - mtime을 마지막 사용 시각으로 사용 (조회 시 갱신)
+    - 마지막 사용 후 ttl_seconds가 지나면 만료
+    - 전체 용량이 max_bytes를 넘으면 오래 안 쓴 항목부터 삭제 (LRU)
+    """
+
+    def __init__(
+        self,
+        root: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.lock_dir = os.path.join(self.root, ".locks")
+        os.makedirs(self.root, exist_ok=True)
+
+    def path_for(self, key: str, fmt: str = "mp3") -> str:
+        return os.path.join(self.root, f"{key}.{fmt}")
+
+    def lock(self, key: str, blocking: bool = True):
+        """
+        같은 캐시 디렉터리를 쓰는 다른 워커 프로세스와의 키 단위 잠금. 잡았는지(True / False)를 넘겨 줌.
+        잠금 파일은 놓을 때 지우므로 .locks에는 지금 합성 중인 키만 남음.
+        """
+        return file_lock(self.lock_dir, key, blocking=blocking, unlink=True)
+
+    def peek(self, key: str, fmt: str = "mp3") -> bytes | None:
+        """
+        적중/미스 통계에 반영하지 않는 조회 (잠금 획득 후 재확인 용도).
+        """
+        path = self.path_for(key, fmt)
+        now = time.time()
+        try:
+            if now - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path, (now, now))
+        except OSError:
+            return None
+        return data
+
+    def get(self, key: str, fmt: str = "mp3") -> bytes | None:
+        data = self.peek(key, fmt)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes, fmt: str = "mp3") -> str:
+        """
+        원자적으로(임시 파일 → rename) 저장한 뒤 용량 정리.
+        """
+        path = self.path_for(key, fmt)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.evict()
+        return path
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if name.startswith(".") or name.endswith(".part"):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self):
+        """
+        만료 항목 삭제 후, 용량 초과분을 LRU 순서로 삭제.
+        """
+        now = time.time()
+        with self._lock:
+            entries = sorted(self._entries())
+            alive = []
+            for mtime, size, path in entries:
+                if now - mtime > self.ttl_seconds:
+                    _remove_quietly(path)
+                else:
+                    alive.append((mtime, size, path))
+
+            total = sum(size for _, size, _ in alive)
+            for mtime, size, path in alive:
+                if total <= self.max_bytes:
+                    break
+                _remove_quietly(path)
+                total -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._entries()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+            }
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,64 @@
+# ophtheon/exam/charts.py
+# 한 검사 안에서 같은 질문을 순서만 바꿔 여러 차트로 진행.
+# 모든 차트가 같은 조각(안내 문구 + 11개 질문)을 쓰므로 추가 차트는 이어 붙이기 비용만 듦.
+import random
+
+from exam.script import build_exam_sequence, build_script_segments
+from exam.timeline import assemble_exam_audio
+
+ROTATIONS = ("fixed", "rotate", "random")
+TRIPLET_TYPES = ("N", "C", "R")
+
+
+def chart_order(chart: int, rotation: str, n_triplets: int = 3, seed: int | None = None) -> dict | None:
+    """
+    chart(0부터)번째 차트의 N/C/R 질문 배치 순서.
+
+    - fixed : 모든 차트 동일 (N1 C1 R1, N2 C2 R2, N3 C3 R3)
+    - rotate: 차트마다 세 묶음을 한 칸씩 회전 (2번째 차트는 N2 C2 R2 부터)
+    - random: 유형별로 독립적으로 섞음 (seed가 같으면 같은 순서)
+    """
+    if rotation not in ROTATIONS:
+        raise ValueError(f"알 수 없는 차트 회전 방식입니다: {rotation}")
+    if rotation == "fixed" or chart == 0:
+        return None
+    if rotation == "rotate":
+        base = [(i + chart) % n_triplets for i in range(n_triplets)]
+        return {t: base for t in TRIPLET_TYPES}
+    rng = random.Random(None if seed is None else seed * 1000 + chart)
+    return {t: rng.sample(range(n_triplets), n_triplets) for t in TRIPLET_TYPES}
+
+
+def build_exam_charts(questions: dict, n_charts: int = 1, rotation: str = "rotate",
+                      seed: int | None = None) -> list[list[dict]]:
+    """
+    차트 수만큼의 검사 시퀀스 리스트. 첫 차트는 항상 build_exam_sequence(questions)와 같음.
+    """
+    return [
+        build_exam_sequence(questions, chart_order(k, rotation, seed=seed))
+        for k in range(max(1, n_charts))
+    ]
+
+
+def chart_segments(charts: list[list[dict]]) -> list[list[dict]]:
+    return [
+        build_script_segments(seq, last_chart=(k == len(charts) - 1))
+        for k, seq in enumerate(charts)
+    ]
+
+
+def assemble_charts(charts: list[list[dict]], rendered: dict) -> list[tuple[bytes, dict]]:
+    """
+    이미 합성된 조각(rendered: {텍스트: mp3})만으로 차트별 (mp3, 타임라인)을 조립. 합성 호출 없음.
+    """
+    all_segments = chart_segments(charts)
+    missing = {seg["text"] for segments in all_segments for seg in segments if "text" in seg} - rendered.keys()
+    if missing:
+        raise ValueError(f"차트 조립에 필요한 조각 오디오가 없습니다: {len(missing)}개")
+
+    results = []
+    for k, segments in enumerate(all_segments):
+        audio_bytes, timeline = assemble_exam_audio(segments, rendered)
+        timeline["chart"] = k + 1
+        results.append((audio_bytes, timeline))
+    return results
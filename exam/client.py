@@ -0,0 +1,67 @@
+# ophtheon/exam/client.py
+# 프로세스 전체에서 공유하는 OpenAI 클라이언트 (keep-alive 연결 풀 + 연결 재사용 통계).
+import os
+import threading
+
+# 설정 (환경 변수로 덮어쓸 수 있음)
+HTTP_TIMEOUT = float(os.environ.get("OPHTHEON_HTTP_TIMEOUT", 60.0))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("OPHTHEON_HTTP_CONNECT_TIMEOUT", 5.0))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("OPHTHEON_HTTP_MAX_CONNECTIONS", 20))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("OPHTHEON_HTTP_MAX_KEEPALIVE", 10))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("OPHTHEON_HTTP_KEEPALIVE_EXPIRY", 60.0))
+
+
+class ConnectionStats:
+    """
+    보낸 요청 수와 새로 연 TCP 연결 수를 세어, 연결 재사용 비율을 계산.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self._lock = threading.Lock()
+
+    def on_request(self, request):
+        with self._lock:
+            self.requests += 1
+        parent_trace = request.extensions.get("trace")
+
+        def trace(event_name, info):
+            # httpcore는 새 연결을 열 때만 connect_tcp 이벤트를 보냄
+            if event_name == "connection.connect_tcp.complete":
+                with self._lock:
+                    self.new_connections += 1
+            if parent_trace is not None:
+                parent_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            reused = max(0, self.requests - self.new_connections)
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused": reused,
+                "reuse_rate": (reused / self.requests) if self.requests else 0.0,
+            }
+
+
+def build_openai_client(stats: ConnectionStats | None = None):
+    """
+    연결 풀 한도 / 타임아웃을 설정한 httpx 클라이언트를 붙인 OpenAI 클라이언트 생성.
+    """
+    import httpx
+    from openai import OpenAI
+
+    event_hooks = {"request": [stats.on_request]} if stats is not None else {}
+    http_client = httpx.Client(
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        event_hooks=event_hooks,
+    )
+    return OpenAI(http_client=http_client, timeout=http_client.timeout)
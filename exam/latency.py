@@ -0,0 +1,177 @@
+# ophtheon/exam/latency.py
+# TTS 호출의 꼬리 지연 제어: 지연 분포 기록, 검사 단위 마감 시간, 재시도 판정/지터 백오프, 헤지 요청.
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from exam.client import HTTP_MAX_CONNECTIONS
+
+
+class LatencyTracker:
+    """
+    최근 window개 호출의 소요 시간(초)을 보관하고 백분위수를 계산.
+    타임아웃으로 끝난 호출도 그때까지 기다린 시간을 기록 (빼면 백엔드가 느려질 때 백분위수가 낮게 나옴).
+    실패 / 타임아웃 횟수는 따로 셈.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.timeouts = 0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def record_failure(self, seconds: float, timed_out: bool):
+        with self._lock:
+            self.failures += 1
+            if timed_out:
+                self.timeouts += 1
+                self._samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        idx = min(len(samples) - 1, max(0, round(q / 100 * (len(samples) - 1))))
+        return samples[idx]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            count, failures, timeouts = len(self._samples), self.failures, self.timeouts
+        return {
+            "count": count,
+            "failures": failures,
+            "timeouts": timeouts,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class Deadline:
+    """
+    검사 한 벌의 오디오 합성에 허용된 시간. 초과하면 TimeoutError.
+    """
+
+    def __init__(self, seconds: float | None):
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> float | None:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self):
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            raise TimeoutError("검사 오디오 합성 마감 시간을 초과했습니다.")
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    429 / 5xx / 연결 오류 / 타임아웃만 재시도 대상. 4xx(요청 오류)는 바로 실패.
+    """
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    try:
+        import openai
+    except ImportError:
+        return False
+    return isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError))
+
+
+def is_timeout(exc: BaseException) -> bool:
+    """
+    요청 타임아웃으로 끝났는지 (TimeoutError / openai.APITimeoutError).
+    """
+    if isinstance(exc, TimeoutError):
+        return True
+    try:
+        import openai
+    except ImportError:
+        return False
+    return isinstance(exc, openai.APITimeoutError)
+
+
+def backoff_delay(exc: BaseException, attempt: int, base: float, cap: float) -> float:
+    """
+    full jitter 지수 백오프. 서버가 Retry-After를 주면 그 값을 우선.
+    """
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    retry_after = headers.get("retry-after")
+    if retry_after is not None:
+        try:
+            return min(cap, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+# 헤지 풀은 프로세스 전체가 공유하므로, 동시에 띄우는 요청 수를 HTTP 연결 한도에 맞춤.
+# 빈 자리가 없으면 헤지 없이 호출한 스레드에서 바로 요청 (풀 대기열에 쌓아 봐야 연결을 기다릴 뿐).
+_hedge_pool = ThreadPoolExecutor(max_workers=HTTP_MAX_CONNECTIONS, thread_name_prefix="ophtheon-hedge")
+_hedge_slots = threading.BoundedSemaphore(HTTP_MAX_CONNECTIONS)
+
+
+def _submit(fn, blocking: bool = True):
+    """
+    자리가 있으면 풀에 fn을 올리고 Future를, 없으면 None.
+    """
+    if not _hedge_slots.acquire(blocking=blocking):
+        return None
+
+    def run():
+        try:
+            return fn()
+        finally:
+            _hedge_slots.release()
+
+    try:
+        return _hedge_pool.submit(run)
+    except RuntimeError:
+        _hedge_slots.release()
+        return None
+
+
+def call_with_hedge(fn, hedge_after: float | None, deadline: Deadline | None = None):
+    """
+    fn()을 실행하고, hedge_after초 안에 끝나지 않으면 같은 요청을 하나 더 보내
+    먼저 끝난 쪽의 결과를 사용. 둘 다 실패하면 마지막 예외를 올림.
+
+    진 쪽 요청은 스레드를 멈출 수 없으므로 fn 스스로 (HTTP 클라이언트 타임아웃 등으로) 끝나야 함.
+    """
+    remaining = deadline.remaining() if deadline is not None else None
+    if hedge_after is None or (remaining is not None and remaining <= hedge_after):
+        return fn()
+
+    first = _submit(fn, blocking=False)
+    if first is None:
+        return fn()
+    done, pending = wait({first}, timeout=hedge_after)
+    if not done:
+        second = _submit(fn, blocking=False)
+        if second is not None:
+            pending.add(second)
+
+    error = None
+    while pending or done:
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+        if not pending:
+            break
+        timeout = deadline.remaining() if deadline is not None else None
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            raise TimeoutError("검사 오디오 합성 마감 시간을 초과했습니다.")
+    raise error
@@ -0,0 +1,146 @@
+# ophtheon/exam/library.py
+# 고정 질문 은행(I, SR, DLCQ, 사건유형별 R 템플릿, 고정 안내 문구)을 미리 합성해 두는 오디오 라이브러리.
+#
+#   python -m exam.library build      # 라이브러리 생성 / 누락분 보충
+#   python -m exam.library status     # manifest 요약 출력
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from exam.backends import TTS_BACKEND, make_backend
+from exam.questions import (
+    I_QUESTION,
+    SR_QUESTION,
+    DLCQ_ITEMS,
+    OFFENSE_CATEGORIES,
+    DEFAULT_OFFENSE_TEXT,
+    make_r_questions_suspect,
+)
+from exam.script import FIXED_SEGMENT_TEXTS, question_segment_text
+from exam.tts import segment_key, synthesize_many
+
+# 문구 / 분할 방식이 바뀌면 올려서 새 디렉터리에 다시 생성
+LIBRARY_VERSION = 1
+DEFAULT_LIBRARY_DIR = os.environ.get(
+    "OPHTHEON_AUDIO_LIBRARY_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "audio_library"),
+)
+MANIFEST_NAME = "manifest.json"
+
+
+def library_entries() -> list[dict]:
+    """
+    라이브러리에 들어갈 (kind, text) 목록. text는 실제 TTS 입력 문자열.
+    """
+    entries = [{"kind": "fixed", "text": t} for t in FIXED_SEGMENT_TEXTS]
+    entries.append({"kind": "I", "text": question_segment_text(I_QUESTION)})
+    entries.append({"kind": "SR", "text": question_segment_text(SR_QUESTION)})
+    for item in DLCQ_ITEMS:
+        entries.append({"kind": "C", "text": question_segment_text(item)})
+
+    offense_texts = []
+    for types in OFFENSE_CATEGORIES.values():
+        for offense_type in types:
+            offense_texts.append(DEFAULT_OFFENSE_TEXT if offense_type == "기타" else offense_type)
+    for offense_text in dict.fromkeys(offense_texts):
+        for q in make_r_questions_suspect(offense_text):
+            entries.append({"kind": "R", "text": question_segment_text(q), "offense": offense_text})
+    return entries
+
+
+class AudioLibrary:
+    """
+    버전별 디렉터리(<root>/v<N>/)에 <key>.<fmt> 파일과 manifest.json을 두는 읽기 전용 조회기.
+    """
+
+    def __init__(self, root: str = DEFAULT_LIBRARY_DIR, version: int = LIBRARY_VERSION):
+        self.dir = os.path.join(root, f"v{version}")
+        self.manifest = {}
+        manifest_path = os.path.join(self.dir, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        self.entries = self.manifest.get("entries", {})
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, text: str, backend) -> bytes | None:
+        key = segment_key(backend, text)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        try:
+            with open(os.path.join(self.dir, entry["file"]), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+
+def build_library(backend, root: str = DEFAULT_LIBRARY_DIR, version: int = LIBRARY_VERSION,
+                  max_workers: int | None = None) -> dict:
+    """
+    누락된 항목만 합성해서 채우고 manifest를 다시 씀. 갱신된 manifest 반환.
+    """
+    lib_dir = os.path.join(root, f"v{version}")
+    os.makedirs(lib_dir, exist_ok=True)
+    existing = AudioLibrary(root, version).entries
+
+    entries = {}
+    todo = []
+    for item in library_entries():
+        key = segment_key(backend, item["text"])
+        if key in entries:
+            continue
+        entry = dict(item, file=f"{key}.{backend.format}")
+        if key in existing and os.path.exists(os.path.join(lib_dir, entry["file"])):
+            entry["bytes"] = existing[key].get("bytes", 0)
+        else:
+            todo.append((key, entry))
+        entries[key] = entry
+
+    kwargs = {} if max_workers is None else {"max_workers": max_workers}
+    rendered = synthesize_many(backend, [entry["text"] for _, entry in todo], **kwargs)
+    for (key, entry), audio_bytes in zip(todo, rendered):
+        with open(os.path.join(lib_dir, entry["file"]), "wb") as f:
+            f.write(audio_bytes)
+        entry["bytes"] = len(audio_bytes)
+
+    manifest = {
+        "version": version,
+        "backend": backend.name,
+        "model": backend.model,
+        "voice": backend.voice,
+        "format": backend.format,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "entries": entries,
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=lib_dir, suffix=".part")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(lib_dir, MANIFEST_NAME))
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ophtheon 고정 질문 오디오 라이브러리")
+    parser.add_argument("command", choices=["build", "status"])
+    parser.add_argument("--root", default=DEFAULT_LIBRARY_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--backend", default=TTS_BACKEND, choices=["openai", "offline"])
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        manifest = build_library(make_backend(args.backend), args.root, max_workers=args.workers)
+    else:
+        manifest = AudioLibrary(args.root).manifest
+
+    entries = manifest.get("entries", {})
+    total = sum(e.get("bytes", 0) for e in entries.values())
+    print(f"v{LIBRARY_VERSION}: {len(entries)}개 항목, {total / 1e6:.1f} MB ({args.root})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# ophtheon/exam/mp3.py
+# 재인코딩 없이 mp3 조각을 이어 붙이기 위한 최소한의 프레임 파서.
+
+# (MPEG 버전, 레이어) → 비트레이트(kbps) 표
+_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    2.5: [11025, 12000, 8000],
+}
+
+
+def parse_frame_header(data: bytes, offset: int) -> dict | None:
+    """
+    offset 위치의 4바이트를 mp3 프레임 헤더로 해석. 헤더가 아니면 None.
+    """
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset:offset + 4]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version_bits = (b1 >> 3) & 0x03
+    layer_bits = (b1 >> 1) & 0x03
+    bitrate_idx = (b2 >> 4) & 0x0F
+    rate_idx = (b2 >> 2) & 0x03
+    if version_bits == 1 or layer_bits == 0 or bitrate_idx in (0, 15) or rate_idx == 3:
+        return None
+
+    version = {0: 2.5, 2: 2, 3: 1}[version_bits]
+    layer = 4 - layer_bits
+    bitrate = _BITRATES[(1 if version == 1 else 2, layer)][bitrate_idx] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_idx]
+    padding = (b2 >> 1) & 0x01
+    channels = 1 if (b3 >> 6) == 3 else 2
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or version == 1:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+
+    return {
+        "version": version,
+        "layer": layer,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "samples": samples,
+        "length": length,
+    }
+
+
+def _strip_id3(data: bytes) -> tuple[int, int]:
+    """
+    ID3v2(앞) / ID3v1(뒤) 태그를 제외한 오디오 구간 [start, end) 반환.
+    """
+    start, end = 0, len(data)
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        start = 10 + size + (10 if data[5] & 0x10 else 0)
+    if end - start >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+    return start, end
+
+
+def _is_info_frame(frame: bytes) -> bool:
+    # LAME/Xing/VBRI 정보 프레임은 소리가 없고, 길이 정보가 이어 붙인 뒤에는 틀리게 됨
+    head = frame[:64]
+    return b"Xing" in head or b"Info" in head or b"VBRI" in head
+
+
+def iter_frames(data: bytes):
+    """
+    (offset, header) 를 순서대로 생성. 태그/정보 프레임/잡음 바이트는 건너뜀.
+    """
+    pos, end = _strip_id3(data)
+    first = True
+    while pos < end:
+        header = parse_frame_header(data, pos)
+        if header is None or header["length"] <= 0:
+            pos += 1
+            continue
+        if first:
+            first = False
+            if _is_info_frame(data[pos:pos + header["length"]]):
+                pos += header["length"]
+                continue
+        yield pos, header
+        pos += header["length"]
+
+
+def extract_frames(data: bytes) -> tuple[bytes, int, tuple | None]:
+    """
+    mp3 한 조각에서 (오디오 프레임 바이트, 총 샘플 수, (버전, 샘플레이트, 채널 수)) 반환.
+    """
+    out = bytearray()
+    samples = 0
+    fmt = None
+    for offset, header in iter_frames(data):
+        frame_fmt = (header["version"], header["sample_rate"], header["channels"])
+        if fmt is None:
+            fmt = frame_fmt
+        elif frame_fmt != fmt:
+            raise ValueError(f"mp3 조각 안에서 포맷이 바뀝니다: {frame_fmt} != {fmt}")
+        out += data[offset:offset + header["length"]]
+        samples += header["samples"]
+    return bytes(out), samples, fmt
+
+
+def silent_frame(version=2, sample_rate: int = 24000, channels: int = 1) -> bytes:
+    """
+    디코딩하면 무음이 되는 Layer III 프레임 하나 (side info / main data 모두 0).
+    가장 낮은 비트레이트를 사용.
+    """
+    version_bits = {1: 3, 2: 2, 2.5: 0}[version]
+    rate_idx = _SAMPLE_RATES[version].index(sample_rate)
+    bitrate_idx = 1
+    b1 = 0xE0 | (version_bits << 3) | (0x01 << 1) | 0x01  # Layer III, CRC 없음
+    b2 = (bitrate_idx << 4) | (rate_idx << 2)
+    b3 = 0xC0 if channels == 1 else 0x00
+    header = bytes([0xFF, b1, b2, b3])
+    length = parse_frame_header(header, 0)["length"]
+    return header + bytes(length - 4)
+
+
+def silence(ms: float, version=2, sample_rate: int = 24000, channels: int = 1) -> bytes:
+    """
+    ms에 가장 가까운 길이의 무음 mp3 (프레임 단위로 반올림).
+    """
+    frame = silent_frame(version, sample_rate, channels)
+    samples = parse_frame_header(frame, 0)["samples"]
+    n_frames = max(0, round(ms / 1000 * sample_rate / samples))
+    return frame * n_frames
+
+
+def duration_ms(data: bytes) -> float:
+    """
+    프레임 헤더만으로 계산한 재생 길이(ms).
+    """
+    total = 0.0
+    for _, header in iter_frames(data):
+        total += header["samples"] * 1000 / header["sample_rate"]
+    return total
@@ -0,0 +1,96 @@
+# ophtheon/exam/prefetch.py
+# 면담 단계에서 질문 세트가 확정되는 즉시 검사 오디오를 미리 합성해 두는 백그라운드 작업기.
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from exam.resources import render_exam
+from exam.script import exam_key
+
+# 찾아가지 않은 결과를 보관하는 시간(초) / 최대 개수 (결과 하나가 검사 한 벌의 mp3)
+PREFETCH_TTL_SECONDS = 2 * 3600
+PREFETCH_MAX_JOBS = 8
+
+
+class ExamAudioPrefetcher:
+    """
+    exam_key(seq) → Future[(mp3 바이트, 타임라인)] 보관소.
+    같은 키를 다시 submit하면 진행 중인(또는 끝난) 작업을 그대로 재사용.
+    결과는 take로 한 번 꺼내면 보관소에서 빠지고, 찾아가지 않은 결과는 ttl_seconds 뒤 / max_jobs를 넘으면 버림.
+    """
+
+    def __init__(self, render=render_exam, max_workers: int = 2, ttl_seconds: int = PREFETCH_TTL_SECONDS,
+                 max_jobs: int = PREFETCH_MAX_JOBS):
+        self._render = render
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ophtheon-prefetch")
+        self._jobs: dict[str, tuple[float, Future]] = {}
+        self._lock = threading.Lock()
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max_jobs
+
+    def submit(self, seq) -> str:
+        key = exam_key(seq)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or (job[1].done() and job[1].exception() is not None):
+                self._jobs[key] = (time.time(), self._pool.submit(self._render, seq))
+            self._expire(keep=key)
+        return key
+
+    def take(self, seq, timeout: float | None = None) -> tuple[bytes, dict] | None:
+        """
+        미리 합성된 결과를 꺼냄. 진행 중이면 timeout까지 기다리고,
+        작업이 없거나 실패/시간 초과면 None (호출 측에서 직접 합성).
+        끝난 작업(성공 / 실패)은 보관소에서 뺌. 시간 초과면 남겨 두어 다음 take에서 다시 기다릴 수 있음.
+        """
+        key = exam_key(seq)
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(key)
+        if job is None:
+            return None
+        try:
+            return job[1].result(timeout=timeout)
+        except Exception:
+            return None
+        finally:
+            if job[1].done():
+                with self._lock:
+                    if self._jobs.get(key) is job:
+                        del self._jobs[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def _expire(self, keep: str | None = None):
+        """
+        만료된 끝난 작업을 버리고, max_jobs를 넘으면 오래된 것부터 버림 (아직 시작 전인 작업은 취소).
+        keep(방금 submit한 키)은 남김.
+        """
+        now = time.time()
+        for key, (submitted, future) in list(self._jobs.items()):
+            if future.done() and now - submitted > self.ttl_seconds:
+                del self._jobs[key]
+        excess = len(self._jobs) - self.max_jobs
+        if excess > 0:
+            # 끝난 작업을 먼저, 같은 상태끼리는 오래된 순
+            oldest = sorted(
+                (item for item in self._jobs.items() if item[0] != keep),
+                key=lambda item: (not item[1][1].done(), item[1][0]),
+            )
+            for key, (_, future) in oldest[:excess]:
+                future.cancel()
+                del self._jobs[key]
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> ExamAudioPrefetcher:
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = ExamAudioPrefetcher()
+        return _prefetcher
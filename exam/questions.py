@@ -0,0 +1,57 @@
+# ophtheon/exam/questions.py
+# 검사 전 면담(pages/1pretest.py)과 오디오 라이브러리가 함께 쓰는 질문 은행.
+
+# ---------------------------------------------------------
+# 사건 분류 (대분류 → 세부유형)
+# ---------------------------------------------------------
+OFFENSE_CATEGORIES = {
+    "실험참여": ["빨간 버튼을 클릭", "인형을 폭행"],
+    "성범죄": ["성희롱", "강제추행", "강간", "불법촬영"],
+    "폭력범죄": ["폭행", "상해", "협박", "체포·감금", "주거침입"],
+    "재산범죄": ["절도", "강도", "위조", "사기 행위", "횡령", "배임"],
+    "공무원범죄": ["직무 유기", "직권 남용", "비밀 누설", "선거 방해", "뇌물 요구", "뇌물 수수", "뇌물 공여"],
+    "기타": ["기타"],
+}
+
+# '기타' 세부유형에서 자유 입력이 비었을 때 쓰는 행위 문구
+DEFAULT_OFFENSE_TEXT = "행위를"
+
+# ---------------------------------------------------------
+# 질문 템플릿 함수들
+# ---------------------------------------------------------
+def make_core_claim_suspect(offense_text: str) -> str:
+    return f"저는 {offense_text}한 사실이 없습니다."
+
+
+def make_r_questions_suspect(offense_text: str) -> list[str]:
+    return [
+        f"당신은 그 당시 {offense_text}한 사실이 있습니까?",
+        f"당신은 직접 {offense_text}한 적이 있습니까?",
+        f"당신이 {offense_text}한 것이 사실입니까?",
+    ]
+
+
+# I / SR 질문 텍스트 (고정)
+I_QUESTION = "당신은 오늘 검사관이 연습한 것만 질문한다는 것을 믿습니까?"
+SR_QUESTION = "당신은 오늘 검사관이 묻는 질문에 사실대로 대답하겠습니까?"
+
+# 성향 설문 문항 (DLCQ 후보)
+DLCQ_ITEMS = [
+    "당신은 지금까지 살면서 가족이나 친구에게 거짓말을 해본 적이 있습니까?",
+    "당신은 지금까지 살면서 누군가에게 단 한 번이라도 거짓말을 한 적이 있습니까?",
+    "당신은 지금까지 살면서 실수를 저지른 뒤 그것을 비밀로 한 적이 있습니까?",
+    "당신은 지금까지 살면서 규칙이나 규정을 어긴 적이 있습니까?",
+    "당신은 지금까지 살면서 책임을 피하기 위해 거짓말을 한 적이 있습니까?",
+    "당신은 지금까지 살면서 다른 사람의 흉이나 뒷담화를 한 적이 있습니까?",
+    "당신은 지금까지 살면서 본인의 잘못을 타인에게 돌린 적이 있습니까?",
+    "당신은 지금까지 살면서 가족들에게 말하지 못한 비밀이 있습니까?",
+    "당신은 지금까지 살면서 본인의 잘못을 숨긴 사실이 있습니까?",
+    "당신은 지금까지 살면서 없는 말을 꾸며서 말한 적이 있습니까?",
+    "당신은 지금까지 살면서 나쁜 행동을 해본 적이 있습니까?",
+    "당신은 지금까지 살면서 주변 사람들이 알면 안 되는 행동을 한 사실이 있습니까?",
+    "당신은 지금까지 살면서 잘못된 것임을 알고도 행동한 적이 있습니까?",
+    "당신은 지금까지 살면서 본인을 위해 남에게 피해를 준 적이 있습니까?",
+    "당신은 지금까지 살면서 다른 사람을 미워하거나 시기한 적이 있습니까?",
+    "당신은 지금까지 살면서 양심에 찔리는 행동을 한 적이 있습니까?",
+    "당신은 지금까지 살면서 다른 사람에게 상처 되는 말을 한 적이 있습니까?",
+]
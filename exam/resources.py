@@ -0,0 +1,175 @@
+# ophtheon/exam/resources.py
+# 서버 프로세스당 하나만 두는 공용 자원. 여러 페이지(1pretest, 2test)가 같은 인스턴스를 공유.
+from functools import lru_cache
+
+from exam.artifacts import ArtifactStore
+from exam.audio_server import AudioServer
+from exam.backends import TTS_BACKEND, TTSBackend, make_backend
+from exam.cache import AudioCache
+from exam.client import ConnectionStats, build_openai_client
+from exam.library import AudioLibrary
+from exam.script import CHART_OUTRO_TEXT, build_script_segments, exam_key
+from exam.singleflight import SingleFlight
+from exam.streaming import ExamAudioStream, StreamRegistry
+from exam.timeline import timeline_to_json
+from exam.tts import render_exam_audio, render_exam_charts, render_texts
+from pupil.cache import StageCache
+from pupil.model import PupilModel, load_model
+from pupil.norms import NormsIndex, load_norms
+from pupil.online import LiveScoreRegistry, OnlineScorer
+
+
+@lru_cache(maxsize=None)
+def get_connection_stats() -> ConnectionStats:
+    return ConnectionStats()
+
+
+@lru_cache(maxsize=None)
+def get_client():
+    """
+    keep-alive 연결 풀을 가진 공용 OpenAI 클라이언트. Streamlit 재실행과 무관하게 프로세스당 하나.
+    """
+    return build_openai_client(get_connection_stats())
+
+
+@lru_cache(maxsize=None)
+def get_backend() -> TTSBackend:
+    """
+    설정(OPHTHEON_TTS_BACKEND)에 따른 TTS 백엔드. openai 백엔드는 위의 공용 클라이언트를 사용.
+    """
+    return make_backend(TTS_BACKEND, client_factory=get_client)
+
+
+@lru_cache(maxsize=None)
+def get_audio_cache() -> AudioCache:
+    """
+    TTS 조각 오디오 디스크 캐시.
+    """
+    return AudioCache()
+
+
+@lru_cache(maxsize=None)
+def get_audio_library() -> AudioLibrary:
+    """
+    미리 합성해 둔 고정 질문 오디오 라이브러리 (python -m exam.library build).
+    """
+    return AudioLibrary()
+
+
+@lru_cache(maxsize=None)
+def get_artifact_store() -> ArtifactStore:
+    """
+    세션별 검사 오디오 파일 보관소.
+    """
+    return ArtifactStore()
+
+
+@lru_cache(maxsize=None)
+def get_stream_registry() -> StreamRegistry:
+    return StreamRegistry()
+
+
+@lru_cache(maxsize=None)
+def get_stage_cache() -> StageCache:
+    """
+    채점 단계 캐시 (pupil.pipeline). 일괄 채점과 같은 디렉터리를 쓰면 결과도 공유.
+    """
+    return StageCache()
+
+
+@lru_cache(maxsize=None)
+def get_norms_index() -> NormsIndex | None:
+    """
+    과거 검사 규준 색인 (OPHTHEON_NORMS_PATH). 없으면 None. 색인을 다시 만들었으면 프로세스를 재시작.
+    """
+    return load_norms()
+
+
+@lru_cache(maxsize=None)
+def get_pupil_model() -> PupilModel | None:
+    """
+    학습한 분류 모델 (OPHTHEON_MODEL_PATH, pupil.model). 없으면 None. 가중치는 memmap으로 한 번만 읽음.
+    """
+    return load_model()
+
+
+@lru_cache(maxsize=None)
+def get_live_scores() -> LiveScoreRegistry:
+    return LiveScoreRegistry()
+
+
+@lru_cache(maxsize=None)
+def get_audio_server() -> AudioServer | None:
+    """
+    검사 오디오 HTTP 서버. 포트를 열 수 없으면 None (페이지는 st.audio로 대체).
+    """
+    try:
+        return AudioServer(get_stream_registry(), get_artifact_store(), get_live_scores()).start()
+    except OSError:
+        return None
+
+
+_exam_flight = SingleFlight()
+
+
+def render_exam(seq) -> tuple[bytes, dict]:
+    """
+    공용 백엔드 / 캐시 / 라이브러리로 검사 오디오 한 벌과 이벤트 타임라인을 합성.
+    같은 질문 세트를 동시에 요청하면 한 번만 합성하고 결과를 공유.
+    """
+    return _exam_flight.do(
+        exam_key(seq),
+        lambda: render_exam_audio(
+            get_backend(), seq, cache=get_audio_cache(), library=get_audio_library()
+        ),
+    )
+
+
+def render_segments(seq) -> tuple[list, dict]:
+    """
+    검사 번들용: 이어 붙이기 전의 조각 오디오. (미리 합성이 끝났다면 전부 캐시 적중)
+    여러 차트로 조립할 때 필요한 차트 마무리 문구까지 함께 합성.
+    """
+    segments = build_script_segments(seq)
+    texts = [seg["text"] for seg in segments if "text" in seg] + [CHART_OUTRO_TEXT]
+    rendered = render_texts(
+        get_backend(), texts, cache=get_audio_cache(), library=get_audio_library()
+    )
+    return segments, rendered
+
+
+def render_charts(charts) -> list[tuple[bytes, dict]]:
+    """
+    여러 차트 검사 오디오. 조각은 한 번만 합성(대부분 캐시 / 라이브러리 적중)하고 차트별로 조립.
+    """
+    return render_exam_charts(
+        get_backend(), charts, cache=get_audio_cache(), library=get_audio_library()
+    )
+
+
+def start_exam_stream(seq, owner: str, slot: str = "chart1") -> ExamAudioStream:
+    """
+    검사 오디오를 조각이 준비되는 대로 owner의 보관소 파일에 이어 쓰기 시작.
+    다 쓰면 파일을 확정하고 타임라인(.events.json)을 함께 저장.
+    """
+    store = get_artifact_store()
+    part_path = store.begin(owner, slot=slot)
+    stream = ExamAudioStream(
+        get_backend(),
+        build_script_segments(seq),
+        part_path,
+        cache=get_audio_cache(),
+        library=get_audio_library(),
+        owner=owner,
+        on_finish=lambda path, timeline: store.finish(
+            path, sidecars={"events.json": timeline_to_json(timeline).encode("utf-8")}
+        ),
+    )
+    return get_stream_registry().start(stream)
+
+
+def start_live_scoring(timeline: dict, owner: str) -> OnlineScorer:
+    """
+    차트 하나의 실시간 채점 시작. 같은 owner의 이전 채점은 대체.
+    """
+    return get_live_scores().start(OnlineScorer(timeline, owner=owner))
@@ -0,0 +1,175 @@
+# ophtheon/exam/script.py
+import hashlib
+import json
+import re
+
+# ---------------------------------------------------------
+# 고정 안내 문구 (모든 검사에서 동일 → 한 번만 합성해서 재사용)
+# ---------------------------------------------------------
+INTRO_TEXT = (
+    "이제 옵시언 자동 검사를 시작하겠습니다. "
+    "화면 중앙의 십자를 조용히 응시해 주세요. "
+    "눈을 장시간 감거나 자주 깜빡이지 않도록 노력해 주시고, 몸을 최대한 움직이지 말아 주세요. "
+    "연습했던 열한 개의 질문이 순서대로 제시됩니다. "
+    "모든 질문에 대해 또렷한 목소리로 예 또는 아니오라고 대답해 주세요."
+)
+QUESTION_PROMPT_TEXT = (
+    "이어서 잠시 후 질문을 드리겠습니다. "
+    "질문이 끝난 후 삼 초 뒤, 예 또는 아니오라고 대답해 주세요. "
+    "잠시 후 다음 질문을 읽어 드리겠습니다. 천천히 내용을 들으신 뒤, 삼 초 후에 예 또는 아니오로 대답해 주세요."
+)
+OUTRO_TEXT = (
+    "이상으로 옵시언 자동 검사를 모두 마쳤습니다. "
+    "십자 응시를 멈추시고 편안한 자세를 취하셔도 좋습니다."
+)
+# 여러 차트를 진행할 때 마지막이 아닌 차트의 마무리 문구
+CHART_OUTRO_TEXT = (
+    "이번 차트를 마쳤습니다. "
+    "잠시 휴식한 뒤 같은 질문으로 다음 차트를 진행하겠습니다."
+)
+FIXED_SEGMENT_TEXTS = [INTRO_TEXT, QUESTION_PROMPT_TEXT, OUTRO_TEXT, CHART_OUTRO_TEXT]
+
+# 질문이 끝난 뒤의 무음 구간(ms). 예전의 "삼, 이이, 일" 카운트다운 자리를 정확한 길이의 무음으로 대체.
+RESPONSE_DELAY_MS = 3000    # 질문 종료 → 대답 시점
+RESPONSE_WINDOW_MS = 4000   # 대답 + 동공 반응 회복 (다음 안내 시작 전까지)
+
+
+# ---------------------------------------------------------
+# 텍스트 파싱 / 생성
+# ---------------------------------------------------------
+def format_question_set_txt(core_claim: str, qs: dict) -> str:
+    """
+    검사 전 단계의 question_set을 [피검자의 핵심 주장] / [최종 11문항 질문 세트] 형식 txt로 변환.
+    """
+    lines = []
+    lines.append("[피검자의 핵심 주장]")
+    lines.append(core_claim)
+    lines.append("")
+    lines.append("[최종 11문항 질문 세트]")
+    lines.append(f"I1. {qs['I']}")
+    lines.append(f"SR1. {qs['SR']}")
+    for i, q in enumerate(qs["N"], start=1):
+        lines.append(f"N{i}. {q}")
+    for i, q in enumerate(qs["C"], start=1):
+        lines.append(f"C{i}. {q}")
+    for i, q in enumerate(qs["R"], start=1):
+        lines.append(f"R{i}. {q}")
+    return "\n".join(lines)
+
+
+def parse_question_set_txt(text: str):
+    """
+    [피검자의 핵심 주장] / [최종 11문항 질문 세트] 형식의 txt에서
+    core_claim, questions 딕셔너리 반환.
+    """
+    lines = [l.strip() for l in text.splitlines()]
+    core_claim = ""
+    questions = {"I": [], "SR": [], "N": [], "C": [], "R": []}
+
+    for i, line in enumerate(lines):
+        if line.startswith("[피검자의 핵심 주장]"):
+            if i + 1 < len(lines):
+                core_claim = lines[i + 1].strip()
+            break
+
+    pattern = re.compile(r"^(I\d+|SR\d+|N\d+|C\d+|R\d+)\.\s*(.+)$")
+    for line in lines:
+        m = pattern.match(line)
+        if not m:
+            continue
+        code = m.group(1)
+        question = m.group(2).strip()
+        if code.startswith("SR"):
+            qtype = "SR"
+        else:
+            qtype = code[0]
+        questions[qtype].append(question)
+
+    return core_claim, questions
+
+
+def build_exam_sequence(questions: dict, order: dict | None = None):
+    """
+    I, SR, N1 C1 R1, N2 C2 R2, N3 C3 R3 순서 시퀀스 생성.
+    order({"N": [2, 0, 1], ...})를 주면 해당 유형의 질문을 그 순서(0부터)로 배치 (차트 회전용).
+    """
+    pattern = ["I", "SR", "N", "C", "R", "N", "C", "R", "N", "C", "R"]
+    counters = {"I": 0, "SR": 0, "N": 0, "C": 0, "R": 0}
+    seq = []
+    for t in pattern:
+        slot = counters[t]
+        idx = order[t][slot] if order and t in order and slot < len(order[t]) else slot
+        try:
+            q_text = questions[t][idx]
+        except IndexError:
+            q_text = f"[{t} 질문이 부족합니다]"
+        seq.append({"type": t, "index": idx + 1, "text": q_text})
+        if t in ["N", "C", "R"]:
+            counters[t] += 1
+    return seq
+
+
+def questions_from_question_set(qs: dict) -> dict:
+    """
+    검사 전 단계의 question_set(I/SR는 문자열, N/C/R는 리스트)을
+    parse_question_set_txt와 같은 questions 딕셔너리 형태로 변환.
+    """
+    return {
+        "I": [qs["I"]],
+        "SR": [qs["SR"]],
+        "N": list(qs["N"]),
+        "C": list(qs["C"]),
+        "R": list(qs["R"]),
+    }
+
+
+def exam_key(seq) -> str:
+    """
+    검사 시퀀스(질문 유형/순서/문구)의 해시. 같은 질문 세트면 어느 페이지에서 계산해도 같은 값.
+    """
+    payload = json.dumps(
+        [[item["type"], item["index"], item["text"]] for item in seq],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ---------------------------------------------------------
+# 스크립트 구성
+# ---------------------------------------------------------
+def question_segment_text(q_text: str) -> str:
+    """
+    질문 한 문항을 읽을 때 TTS에 넣는 문자열.
+    """
+    return f"{q_text} ."
+
+
+def build_script_segments(seq, last_chart: bool = True):
+    """
+    검사 스크립트를 합성 단위(segment) 리스트로 분해.
+    fixed=True 인 조각은 모든 검사에서 같은 문구이고, 질문 텍스트만 검사마다 달라짐.
+    kind="gap" 조각은 합성하지 않고 ms 길이의 무음으로 채움.
+    last_chart=False 이면 마무리 문구 대신 다음 차트 안내 문구로 끝남.
+    """
+    segments = [{"kind": "intro", "text": INTRO_TEXT, "fixed": True}]
+    for position, item in enumerate(seq, start=1):
+        segments.append({"kind": "prompt", "text": QUESTION_PROMPT_TEXT, "fixed": True})
+        segments.append({
+            "kind": "question",
+            "text": question_segment_text(item["text"]),
+            "fixed": False,
+            "type": item["type"],
+            "index": item["index"],
+            "position": position,
+        })
+        segments.append({"kind": "gap", "ms": RESPONSE_DELAY_MS, "role": "response_delay"})
+        segments.append({"kind": "gap", "ms": RESPONSE_WINDOW_MS, "role": "response_window"})
+    segments.append({"kind": "outro", "text": OUTRO_TEXT if last_chart else CHART_OUTRO_TEXT, "fixed": True})
+    return segments
+
+
+def build_full_script(seq):
+    """
+    베이스라인 안내 + 11개 질문을 하나의 긴 한국어 스크립트로 생성 (무음 구간 제외, 확인용).
+    """
+    return " ".join(seg["text"] for seg in build_script_segments(seq) if "text" in seg)
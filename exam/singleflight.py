@@ -0,0 +1,108 @@
+# ophtheon/exam/singleflight.py
+# 같은 키의 요청이 동시에 여러 번 들어오면 실제 작업은 한 번만 수행하고 결과를 나눠 주는 장치.
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 프로세스 내부 중복 제거만 수행
+    fcntl = None
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    프로세스 내부 single-flight.
+    같은 key로 진행 중인 호출이 있으면 새로 실행하지 않고 그 결과(또는 예외)를 기다렸다 받음.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key: str, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.followers += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "followers": self.followers,
+                "in_flight": len(self._calls),
+            }
+
+
+@contextmanager
+def file_lock(lock_dir: str, key: str, blocking: bool = True, unlink: bool = False):
+    """
+    같은 디렉터리를 공유하는 여러 워커 프로세스 사이의 배타적 잠금 (flock). 잡았는지(True / False)를 넘겨 줌.
+    blocking=False면 다른 쪽이 잡고 있을 때 기다리지 않고 False (같은 프로세스의 다른 잠금과도 겹치면 False).
+    unlink=True면 놓기 직전에 잠금 파일을 지움 (키마다 파일이 쌓이지 않게). 지운 파일을 이미 열어 둔 쪽과
+    새로 만든 쪽이 드물게 동시에 잡을 수 있으므로, 잡은 뒤 결과가 이미 있는지 다시 확인하는 용도에만 씀.
+    """
+    if fcntl is None:
+        yield True
+        return
+    os.makedirs(lock_dir, exist_ok=True)
+    path = os.path.join(lock_dir, f"{key}.lock")
+    fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            if unlink:
+                _unlink_if_same(path, fd)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def _unlink_if_same(path: str, fd: int):
+    # 그 사이 다른 쪽이 같은 이름으로 새 잠금 파일을 만들었으면 그건 남겨 둠
+    try:
+        if os.path.samestat(os.stat(path), os.fstat(fd)):
+            os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,286 @@
+# ophtheon/exam/streaming.py
+# 합성이 끝나기 전에 재생을 시작할 수 있도록, 조각이 준비되는 대로 검사 오디오 파일 뒤에 이어 씀.
+#
+# 조각은 스레드 풀에서 병렬로 합성하지만 파일에는 항상 스크립트 순서대로만 붙이므로,
+# 읽는 쪽(HTTP 스트림)은 "앞에서부터 준비된 바이트"까지만 받아 재생이 합성을 앞지르지 않음.
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from exam.latency import Deadline
+from exam.mp3 import extract_frames
+from exam.timeline import DEFAULT_FORMAT, TimelineBuilder, gap_frames
+from exam.tts import TTS_EXAM_DEADLINE, TTS_MAX_WORKERS, TTS_RETRIES, synthesize_with_retry
+
+CHUNK_SIZE = 16 * 1024
+# 끝난 스트림을 레지스트리에 남겨 두는 시간(초)
+STREAM_TTL_SECONDS = 2 * 3600
+# drop()이 취소한 스트림의 쓰기 스레드가 멈추기를 기다리는 최대 시간(초) / 조각을 기다리며 취소를 확인하는 간격
+STREAM_CANCEL_TIMEOUT = 5.0
+STREAM_CANCEL_POLL = 0.1
+
+
+class StreamCancelled(RuntimeError):
+    pass
+
+
+class ExamAudioStream:
+    """
+    segments(build_script_segments 결과)를 path(.part)에 순서대로 이어 쓰는 백그라운드 작업.
+
+    - 조각별 준비 상태(ready_segments)와 파일에 쓴 바이트 수(ready_bytes)를 추적
+    - iter_bytes()는 준비된 바이트까지만 내보내고, 다음 조각이 붙을 때까지 기다림
+    - 다 쓰면 on_finish(path, timeline)으로 파일을 확정하고 그 반환값을 최종 경로로 사용
+    - cancel()하면 조각 사이에서 멈추고 파일을 확정하지 않음 (보관소 정리 전에 호출)
+    """
+
+    def __init__(self, backend, segments, path: str, cache=None, library=None, on_finish=None,
+                 max_workers: int = TTS_MAX_WORKERS, retries: int = TTS_RETRIES,
+                 deadline_seconds: float | None = TTS_EXAM_DEADLINE, owner: str | None = None):
+        self.token = uuid.uuid4().hex
+        self.owner = owner
+        self.backend = backend
+        self.segments = segments
+        self.path = path
+        self.cache = cache
+        self.library = library
+        self.on_finish = on_finish
+        self.max_workers = max_workers
+        self.retries = retries
+        self.deadline_seconds = deadline_seconds
+
+        self.ready_segments = 0
+        self.ready_bytes = 0
+        self.ready_ms = 0.0
+        self.done = False
+        self.error = None
+        self.finished_at = None
+        self._result = None
+        self._cond = threading.Condition()
+        self._cancel = threading.Event()
+        self._thread = None
+
+    @property
+    def total_segments(self) -> int:
+        return len(self.segments)
+
+    def start(self) -> "ExamAudioStream":
+        self._thread = threading.Thread(target=self._run, name="ophtheon-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        deadline = Deadline(self.deadline_seconds)
+        unique_texts = list(dict.fromkeys(seg["text"] for seg in self.segments if "text" in seg))
+        ready = {}
+        if self.library is not None:
+            for text in unique_texts:
+                audio_bytes = self.library.get(text, self.backend)
+                if audio_bytes is not None:
+                    ready[text] = audio_bytes
+
+        missing = [t for t in unique_texts if t not in ready]
+        pool = ThreadPoolExecutor(
+            max_workers=max(1, min(self.max_workers, len(missing) or 1)),
+            thread_name_prefix="ophtheon-stream-tts",
+        )
+        try:
+            # 스크립트에 처음 나오는 순서대로 제출 → 앞쪽 조각이 먼저 준비됨
+            futures = {
+                t: pool.submit(synthesize_with_retry, self.backend, t, self.cache, self.retries, deadline)
+                for t in missing
+            }
+            timeline = self._write(ready, futures, deadline)
+            self._check_cancelled()
+            path = self.on_finish(self.path, timeline) if self.on_finish is not None else self.path
+            with self._cond:
+                self._result = (path, timeline)
+        except Exception as e:
+            if self._cancel.is_set():
+                _remove_quietly(self.path)
+                e = StreamCancelled("검사 오디오 스트림이 취소되었습니다.")
+            with self._cond:
+                self.error = e
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            with self._cond:
+                self.done = True
+                self.finished_at = time.time()
+                self._cond.notify_all()
+
+    def _write(self, ready: dict, futures: dict, deadline: Deadline) -> dict:
+        extracted = {}
+        gaps = {}
+        fmt = None
+        builder = None
+        with open(self.path, "wb") as f:
+            for seg in self.segments:
+                self._check_cancelled()
+                if seg["kind"] == "gap":
+                    key = seg["ms"]
+                    if key not in gaps:
+                        gaps[key] = gap_frames(seg["ms"], fmt or DEFAULT_FORMAT)
+                    frames, samples = gaps[key]
+                else:
+                    text = seg["text"]
+                    if text not in extracted:
+                        audio_bytes = ready.get(text)
+                        if audio_bytes is None:
+                            audio_bytes = self._await(futures[text], deadline)
+                        extracted[text] = extract_frames(audio_bytes)
+                    frames, samples, seg_fmt = extracted[text]
+                    if seg_fmt is not None:
+                        if fmt is None:
+                            fmt = seg_fmt
+                        elif seg_fmt != fmt:
+                            raise ValueError(f"mp3 조각의 포맷이 다릅니다: {seg_fmt} != {fmt}")
+
+                if builder is None:
+                    builder = TimelineBuilder((fmt or DEFAULT_FORMAT)[1])
+                f.write(frames)
+                f.flush()
+                builder.add(seg, samples)
+                with self._cond:
+                    self.ready_segments += 1
+                    self.ready_bytes += len(frames)
+                    self.ready_ms = builder.to_ms(builder.cursor)
+                    self._cond.notify_all()
+        return builder.build() if builder is not None else TimelineBuilder(DEFAULT_FORMAT[1]).build()
+
+    def _await(self, future, deadline: Deadline) -> bytes:
+        # 조각을 기다리는 동안에도 취소 / 마감 시간을 확인
+        while True:
+            self._check_cancelled()
+            remaining = deadline.remaining()
+            done, _ = wait([future], STREAM_CANCEL_POLL if remaining is None else min(STREAM_CANCEL_POLL, remaining))
+            if done:
+                return future.result()
+            deadline.check()
+
+    def _check_cancelled(self):
+        if self._cancel.is_set():
+            raise StreamCancelled("검사 오디오 스트림이 취소되었습니다.")
+
+    def cancel(self):
+        self._cancel.set()
+
+    def join(self, timeout: float | None = None) -> bool:
+        """
+        쓰기 스레드가 끝날 때까지 기다림. 끝났으면 True.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self.done, timeout)
+
+    def status(self) -> dict:
+        with self._cond:
+            return {
+                "ready_segments": self.ready_segments,
+                "total_segments": self.total_segments,
+                "ready_bytes": self.ready_bytes,
+                "ready_ms": self.ready_ms,
+                "done": self.done,
+                "error": None if self.error is None else str(self.error),
+            }
+
+    def wait(self, min_bytes: int, timeout: float | None = None) -> int:
+        """
+        min_bytes 이상 준비되거나 끝날 때까지 기다린 뒤, 현재 준비된 바이트 수 반환.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self.ready_bytes >= min_bytes or self.done, timeout)
+            if self.error is not None:
+                raise self.error
+            return self.ready_bytes
+
+    def iter_bytes(self, start: int = 0, chunk_size: int = CHUNK_SIZE, idle_timeout: float | None = None):
+        """
+        start부터 준비된 바이트를 순서대로 생성. 준비된 끝에 닿으면 다음 조각을 기다림.
+        파일이 finish()로 이름이 바뀌어도 열어 둔 핸들로 계속 읽음.
+        """
+        pos = start
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            # 이미 끝나서 확정된 경우
+            f = open(self.result()[0], "rb")
+        with f:
+            f.seek(pos)
+            while True:
+                available = self.wait(pos + 1, idle_timeout)
+                if available <= pos:
+                    if self.done:
+                        return
+                    raise TimeoutError("검사 오디오 스트림이 멈췄습니다.")
+                while pos < available:
+                    chunk = f.read(min(chunk_size, available - pos))
+                    if not chunk:
+                        break
+                    pos += len(chunk)
+                    yield chunk
+
+    def result(self, timeout: float | None = None) -> tuple[str, dict]:
+        """
+        끝날 때까지 기다려 (확정된 mp3 경로, 이벤트 타임라인) 반환. 실패했으면 그 예외를 올림.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.done, timeout):
+                raise TimeoutError("검사 오디오 스트림이 아직 끝나지 않았습니다.")
+            if self.error is not None:
+                raise self.error
+            return self._result
+
+
+class StreamRegistry:
+    """
+    token → ExamAudioStream. token은 추측할 수 없는 값이라 HTTP 경로에 그대로 씀.
+    """
+
+    def __init__(self, ttl_seconds: int = STREAM_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._streams: dict[str, ExamAudioStream] = {}
+        self._lock = threading.Lock()
+
+    def start(self, stream: ExamAudioStream) -> ExamAudioStream:
+        with self._lock:
+            self._expire()
+            if stream.owner is not None:
+                for token, other in list(self._streams.items()):
+                    if other.owner == stream.owner:
+                        other.cancel()
+                        del self._streams[token]
+            self._streams[stream.token] = stream
+        return stream.start()
+
+    def get(self, token: str) -> ExamAudioStream | None:
+        with self._lock:
+            return self._streams.get(token)
+
+    def drop(self, owner: str, timeout: float | None = STREAM_CANCEL_TIMEOUT):
+        """
+        owner의 스트림을 취소하고 쓰기 스레드가 멈출 때까지(최대 timeout초) 기다림.
+        보관소에서 owner 파일을 지우기(ArtifactStore.release) 전에 호출.
+        """
+        dropped = []
+        with self._lock:
+            for token, stream in list(self._streams.items()):
+                if stream.owner == owner:
+                    stream.cancel()
+                    dropped.append(stream)
+                    del self._streams[token]
+        for stream in dropped:
+            stream.join(timeout)
+
+    def _expire(self):
+        now = time.time()
+        for token, stream in list(self._streams.items()):
+            if stream.done and now - stream.finished_at > self.ttl_seconds:
+                del self._streams[token]
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,101 @@
+# ophtheon/exam/timeline.py
+# 조각 오디오 + 무음 구간을 이어 붙이면서, 각 질문의 시작/끝 시점을 샘플 단위로 기록.
+import json
+
+from exam.mp3 import extract_frames, silence
+
+TIMELINE_VERSION = 1
+
+
+DEFAULT_FORMAT = (2, 24000, 1)
+
+
+class TimelineBuilder:
+    """
+    이어 붙이는 조각을 순서대로 받아 질문별 이벤트(샘플 단위)를 누적.
+    한 번에 조립(assemble_exam_audio)할 때와 스트리밍으로 조립할 때 같은 방식으로 기록.
+    """
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self.cursor = 0
+        self.events = []
+        self._current = None
+
+    def add(self, seg: dict, samples: int):
+        start = self.cursor
+        self.cursor += samples
+
+        if seg["kind"] == "question":
+            self._current = {
+                "position": seg["position"],
+                "type": seg["type"],
+                "index": seg["index"],
+                "onset_sample": start,
+                "offset_sample": self.cursor,
+            }
+            self.events.append(self._current)
+        elif seg["kind"] == "gap" and self._current is not None:
+            if seg.get("role") == "response_delay":
+                self._current["response_sample"] = self.cursor
+            elif seg.get("role") == "response_window":
+                self._current["window_end_sample"] = self.cursor
+
+    def to_ms(self, n: int) -> float:
+        return round(n * 1000 / self.sample_rate, 3)
+
+    def build(self) -> dict:
+        events = []
+        for event in self.events:
+            event = dict(event)
+            for name in ("onset", "offset", "response", "window_end"):
+                if f"{name}_sample" in event:
+                    event[f"{name}_ms"] = self.to_ms(event[f"{name}_sample"])
+            events.append(event)
+        return {
+            "version": TIMELINE_VERSION,
+            "sample_rate": self.sample_rate,
+            "duration_ms": self.to_ms(self.cursor),
+            "events": events,
+        }
+
+
+def gap_frames(ms: float, fmt: tuple) -> tuple[bytes, int]:
+    """
+    fmt(버전, 샘플레이트, 채널 수) 포맷의 ms 길이 무음 (프레임 바이트, 샘플 수).
+    """
+    version, sample_rate, channels = fmt
+    frames, samples, _ = extract_frames(silence(ms, version, sample_rate, channels))
+    return frames, samples
+
+
+def assemble_exam_audio(segments, rendered: dict) -> tuple[bytes, dict]:
+    """
+    segments(build_script_segments 결과)를 순서대로 이어 붙여 (mp3 바이트, 이벤트 타임라인) 반환.
+    rendered는 {조각 텍스트: mp3 바이트}. gap 조각은 같은 포맷의 무음 프레임으로 채움.
+
+    타임라인의 시각은 프레임 헤더의 샘플 수를 누적해서 계산하므로 재생 시점과 샘플 단위로 일치.
+    """
+    extracted = {text: extract_frames(data) for text, data in rendered.items()}
+    formats = {fmt for _, _, fmt in extracted.values() if fmt is not None}
+    if len(formats) > 1:
+        raise ValueError(f"mp3 조각의 포맷이 다릅니다: {sorted(formats)}")
+    fmt = formats.pop() if formats else DEFAULT_FORMAT
+
+    gaps = {}
+    out = bytearray()
+    builder = TimelineBuilder(fmt[1])
+    for seg in segments:
+        if seg["kind"] == "gap":
+            if seg["ms"] not in gaps:
+                gaps[seg["ms"]] = gap_frames(seg["ms"], fmt)
+            frames, samples = gaps[seg["ms"]]
+        else:
+            frames, samples, _ = extracted[seg["text"]]
+        out += frames
+        builder.add(seg, samples)
+    return bytes(out), builder.build()
+
+
+def timeline_to_json(timeline: dict) -> str:
+    return json.dumps(timeline, ensure_ascii=False, indent=2)
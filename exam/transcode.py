@@ -0,0 +1,69 @@
+# ophtheon/exam/transcode.py
+# 완성된 검사 오디오(mp3)를 음성용 저비트레이트 코덱으로 다시 인코딩. (ffmpeg가 있을 때만)
+#
+# 조각 합성 / 캐시 / 이어 붙이기는 계속 mp3 프레임 기준이고, 마지막에 한 번만 변환.
+# 타임라인은 ms 기준이라 그대로 유효 (인코더 지연은 ogg pre-skip / mp4 edit list로 보정됨).
+import os
+import shutil
+import subprocess
+import tempfile
+
+# 세션 보관소에 저장할 검사 오디오 포맷 / 비트레이트
+EXAM_AUDIO_FORMAT = os.environ.get("OPHTHEON_EXAM_AUDIO_FORMAT", "mp3")
+EXAM_AUDIO_BITRATE = os.environ.get("OPHTHEON_EXAM_AUDIO_BITRATE", "24k")
+FFMPEG = os.environ.get("OPHTHEON_FFMPEG", "ffmpeg")
+TRANSCODE_TIMEOUT = 60
+
+# 포맷 → (확장자, MIME, ffmpeg 인코더 옵션)
+EXAM_AUDIO_FORMATS = {
+    "mp3": ("mp3", "audio/mpeg", None),
+    "opus": ("ogg", "audio/ogg", ["-c:a", "libopus", "-application", "voip", "-f", "ogg"]),
+    "aac": ("m4a", "audio/mp4", ["-c:a", "aac", "-movflags", "+faststart", "-f", "mp4"]),
+}
+
+MIME_TYPES = {ext: mime for ext, mime, _ in EXAM_AUDIO_FORMATS.values()}
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which(FFMPEG) is not None
+
+
+def exam_audio_format(fmt: str = EXAM_AUDIO_FORMAT) -> str:
+    """
+    실제로 쓸 포맷. 알 수 없는 포맷이거나 ffmpeg가 없으면 mp3.
+    """
+    if fmt not in EXAM_AUDIO_FORMATS or (fmt != "mp3" and not ffmpeg_available()):
+        return "mp3"
+    return fmt
+
+
+def encode_exam_audio(mp3_bytes: bytes, fmt: str = EXAM_AUDIO_FORMAT,
+                      bitrate: str = EXAM_AUDIO_BITRATE) -> tuple[bytes, str]:
+    """
+    mp3 바이트를 fmt로 변환해 (오디오 바이트, 확장자) 반환. 변환할 수 없으면 mp3 그대로.
+    mp4는 출력 파일을 되돌아가며 쓰므로 파이프 대신 임시 파일을 사용.
+    """
+    fmt = exam_audio_format(fmt)
+    ext, _, codec_args = EXAM_AUDIO_FORMATS[fmt]
+    if codec_args is None:
+        return mp3_bytes, ext
+
+    with tempfile.TemporaryDirectory(prefix="ophtheon-transcode-") as tmp:
+        src = os.path.join(tmp, "in.mp3")
+        dst = os.path.join(tmp, f"out.{ext}")
+        with open(src, "wb") as f:
+            f.write(mp3_bytes)
+        cmd = [
+            FFMPEG, "-hide_banner", "-loglevel", "error", "-y",
+            "-i", src, "-ac", "1", "-b:a", bitrate, *codec_args, dst,
+        ]
+        try:
+            subprocess.run(cmd, check=True, capture_output=True, timeout=TRANSCODE_TIMEOUT)
+        except (OSError, subprocess.SubprocessError):
+            return mp3_bytes, "mp3"
+        with open(dst, "rb") as f:
+            return f.read(), ext
+
+
+def mime_type(path: str) -> str:
+    return MIME_TYPES.get(os.path.splitext(path)[1].lstrip("."), "application/octet-stream")
@@ -0,0 +1,215 @@
+# ophtheon/exam/tts.py
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from exam.cache import AudioCache, make_cache_key
+from exam.charts import assemble_charts, chart_segments
+from exam.latency import Deadline, LatencyTracker, backoff_delay, call_with_hedge, is_retryable, is_timeout
+from exam.script import build_script_segments
+from exam.singleflight import SingleFlight
+from exam.timeline import assemble_exam_audio
+
+# 조각을 프레임 단위로 이어 붙이므로 파이프라인 전체가 mp3 기준
+TTS_FORMAT = "mp3"
+
+# 동시에 보낼 TTS 요청 수 / 조각별 재시도 횟수
+TTS_MAX_WORKERS = int(os.environ.get("OPHTHEON_TTS_MAX_WORKERS", 6))
+TTS_RETRIES = int(os.environ.get("OPHTHEON_TTS_RETRIES", 2))
+TTS_RETRY_DELAY = 0.5
+TTS_RETRY_MAX_DELAY = 8.0
+# 같은 조각을 다른 워커가 합성 중일 때 캐시를 다시 확인하는 간격(초)
+TTS_LOCK_POLL = 0.05
+
+# 검사 한 벌 합성 마감 시간(초) / 헤지 요청 기준 백분위수
+TTS_EXAM_DEADLINE = float(os.environ.get("OPHTHEON_TTS_EXAM_DEADLINE", 90.0))
+TTS_HEDGE_PERCENTILE = float(os.environ.get("OPHTHEON_TTS_HEDGE_PERCENTILE", 95.0))
+TTS_HEDGE_MIN_SAMPLES = 20
+TTS_HEDGE_MIN_DELAY = 1.0
+# 헤지할 때 요청 하나가 기다리는 최대 시간 = 헤지 기준 × 이 배수. 진 쪽 요청은 이 타임아웃으로 끊김
+TTS_HEDGE_TIMEOUT_FACTOR = float(os.environ.get("OPHTHEON_TTS_HEDGE_TIMEOUT_FACTOR", 4.0))
+
+
+_segment_flight = SingleFlight()
+_latency = LatencyTracker()
+# 조각 길이에 따라 소요 시간이 달라지므로, 헤지 기준은 글자당 소요 시간으로 잡음
+_latency_per_char = LatencyTracker()
+
+
+def segment_key(backend, text: str) -> str:
+    return make_cache_key(text, backend.model, backend.voice, backend.format)
+
+
+def synthesize(backend, text: str, cache: AudioCache | None = None,
+               deadline: Deadline | None = None) -> bytes:
+    """
+    텍스트 한 조각을 TTS로 합성. 캐시가 있으면 먼저 조회.
+    같은 조각을 동시에 요청하면 (프로세스 내부 / 캐시 디렉터리를 공유하는 워커 사이 모두)
+    실제 TTS 호출은 한 번만 하고 결과를 나눠 받음.
+    """
+    key = segment_key(backend, text)
+    if cache is not None:
+        audio_bytes = cache.get(key, TTS_FORMAT)
+        if audio_bytes is not None:
+            return audio_bytes
+    return _segment_flight.do(key, lambda: _synthesize_once(backend, text, key, cache, deadline))
+
+
+def _synthesize_once(backend, text: str, key: str, cache: AudioCache | None,
+                     deadline: Deadline | None) -> bytes:
+    if cache is None:
+        return _call_tts(backend, text, deadline)
+    while True:
+        with cache.lock(key, blocking=False) as locked:
+            if locked:
+                # 잠금을 기다리는 동안 다른 워커가 이미 합성했을 수 있음
+                audio_bytes = cache.peek(key, TTS_FORMAT)
+                if audio_bytes is None:
+                    audio_bytes = _call_tts(backend, text, deadline)
+                    cache.put(key, audio_bytes, TTS_FORMAT)
+                return audio_bytes
+        # 다른 워커가 같은 조각을 합성 중: 마감 시간 안에서 결과가 캐시에 오르기를 기다림
+        audio_bytes = cache.peek(key, TTS_FORMAT)
+        if audio_bytes is not None:
+            return audio_bytes
+        if deadline is not None:
+            deadline.check()
+        time.sleep(TTS_LOCK_POLL)
+
+
+def _hedge_after(text: str) -> float | None:
+    if _latency_per_char.snapshot()["count"] < TTS_HEDGE_MIN_SAMPLES:
+        return None
+    per_char = _latency_per_char.percentile(TTS_HEDGE_PERCENTILE)
+    return max(TTS_HEDGE_MIN_DELAY, per_char * len(text))
+
+
+def _call_tts(backend, text: str, deadline: Deadline | None = None) -> bytes:
+    """
+    실제 TTS 요청 1회. 남은 마감 시간을 요청 타임아웃으로 쓰고,
+    평소(p95)보다 오래 걸리면 같은 요청을 하나 더 보내 먼저 온 응답을 사용.
+    헤지할 때는 요청마다 타임아웃을 헤지 기준의 TTS_HEDGE_TIMEOUT_FACTOR배로 줄여, 진 쪽 요청이 오래 남지 않게 함.
+    """
+    if deadline is not None:
+        deadline.check()
+    hedge_after = _hedge_after(text)
+
+    def request():
+        timeout = None
+        if hedge_after is not None:
+            timeout = hedge_after * TTS_HEDGE_TIMEOUT_FACTOR
+        if deadline is not None:
+            timeout = max(0.1, min(timeout or float("inf"), deadline.remaining()))
+        started = time.monotonic()
+        try:
+            audio_bytes = backend.speech(text, timeout=timeout)
+        except Exception as e:
+            # 타임아웃은 기다린 시간만큼을 지연으로 기록 (헤지 기준 / p99가 느려진 백엔드를 따라가도록)
+            elapsed = time.monotonic() - started
+            timed_out = is_timeout(e)
+            _latency.record_failure(elapsed, timed_out)
+            _latency_per_char.record_failure(elapsed / max(1, len(text)), timed_out)
+            raise
+        elapsed = time.monotonic() - started
+        _latency.record(elapsed)
+        _latency_per_char.record(elapsed / max(1, len(text)))
+        return audio_bytes
+
+    return call_with_hedge(request, hedge_after, deadline)
+
+
+def single_flight_stats() -> dict:
+    return _segment_flight.stats()
+
+
+def latency_stats() -> dict:
+    """
+    최근 TTS 호출 소요 시간(초)의 p50 / p95 / p99 (타임아웃 포함) + 실패 / 타임아웃 횟수.
+    """
+    return _latency.snapshot()
+
+
+def synthesize_with_retry(backend, text: str, cache: AudioCache | None = None,
+                          retries: int = TTS_RETRIES, deadline: Deadline | None = None) -> bytes:
+    """
+    429 / 5xx / 연결 오류면 retries 번까지 지터 백오프 후 다시 시도.
+    그 밖의 오류나 마감 시간을 넘기는 경우는 그대로 올림.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return synthesize(backend, text, cache, deadline)
+        except Exception as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(e, attempt, TTS_RETRY_DELAY, TTS_RETRY_MAX_DELAY)
+            remaining = deadline.remaining() if deadline is not None else None
+            if remaining is not None and delay >= remaining:
+                raise
+            time.sleep(delay)
+
+
+def synthesize_many(backend, texts: list[str], cache: AudioCache | None = None,
+                    max_workers: int = TTS_MAX_WORKERS, retries: int = TTS_RETRIES,
+                    deadline: Deadline | None = None) -> list[bytes]:
+    """
+    여러 조각을 스레드 풀에서 동시에(최대 max_workers개) 합성하고, 입력 순서대로 반환.
+    """
+    if not texts:
+        return []
+    workers = max(1, min(max_workers, len(texts)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ophtheon-tts") as pool:
+        return list(pool.map(
+            lambda t: synthesize_with_retry(backend, t, cache, retries, deadline), texts
+        ))
+
+
+def render_texts(backend, texts, cache: AudioCache | None = None, library=None,
+                 deadline_seconds: float | None = TTS_EXAM_DEADLINE) -> dict:
+    """
+    조각 텍스트들을 {텍스트: mp3 바이트}로 합성. 같은 텍스트는 한 번만, 서로 다른 텍스트는 병렬로.
+    미리 합성된 라이브러리(exam.library.AudioLibrary)에 있는 조각은 그대로 사용.
+    deadline_seconds 안에 끝나지 않으면 TimeoutError.
+    """
+    unique_texts = list(dict.fromkeys(texts))
+
+    rendered = {}
+    if library is not None:
+        for text in unique_texts:
+            audio_bytes = library.get(text, backend)
+            if audio_bytes is not None:
+                rendered[text] = audio_bytes
+
+    missing = [t for t in unique_texts if t not in rendered]
+    deadline = Deadline(deadline_seconds)
+    rendered.update(zip(missing, synthesize_many(backend, missing, cache, deadline=deadline)))
+    return rendered
+
+
+def render_exam_segments(backend, seq, cache: AudioCache | None = None, library=None,
+                         deadline_seconds: float | None = TTS_EXAM_DEADLINE) -> tuple[list, dict]:
+    """
+    검사 시퀀스를 조각 단위로 합성해 (segments, {조각 텍스트: mp3 바이트}) 반환.
+    """
+    segments = build_script_segments(seq)
+    texts = [seg["text"] for seg in segments if "text" in seg]
+    return segments, render_texts(backend, texts, cache, library, deadline_seconds)
+
+
+def render_exam_audio(backend, seq, cache: AudioCache | None = None, library=None,
+                      deadline_seconds: float | None = TTS_EXAM_DEADLINE) -> tuple[bytes, dict]:
+    """
+    검사 시퀀스를 조각 단위로 합성한 뒤, 재인코딩 없이 하나의 mp3로 이어 붙임.
+    (mp3 바이트, 질문별 시작/끝 시각 타임라인) 반환.
+    """
+    segments, rendered = render_exam_segments(backend, seq, cache, library, deadline_seconds)
+    return assemble_exam_audio(segments, rendered)
+
+
+def render_exam_charts(backend, charts, cache: AudioCache | None = None, library=None,
+                       deadline_seconds: float | None = TTS_EXAM_DEADLINE) -> list[tuple[bytes, dict]]:
+    """
+    여러 차트의 오디오. 모든 차트에 필요한 조각을 한 번에 합성한 뒤 차트별로 순서만 바꿔 조립.
+    """
+    texts = [seg["text"] for segments in chart_segments(charts) for seg in segments if "text" in seg]
+    rendered = render_texts(backend, texts, cache, library, deadline_seconds)
+    return assemble_charts(charts, rendered)
@@ -3,6 +3,21 @@ import streamlit as st
 import random
 import io
 
+from exam.questions import (
+    I_QUESTION,
+    SR_QUESTION,
+    DLCQ_ITEMS,
+    OFFENSE_CATEGORIES,
+    DEFAULT_OFFENSE_TEXT,
+    make_core_claim_suspect,
+    make_r_questions_suspect,
+)
+from exam.bundle import build_bundle_bytes
+from exam.prefetch import get_prefetcher
+from exam.resources import render_segments
+from exam.script import build_exam_sequence, format_question_set_txt, questions_from_question_set
+from exam.timeline import assemble_exam_audio
+
 # ---------------------------------------------------------
 # 1. 공통 스타일 (폰트 + 사이드바 숨김)
 # ---------------------------------------------------------
@@ -93,51 +108,13 @@ def reset_all():
         "cq_indices",
         "question_set",
         "final_shuffle_order",
+        "case_bundle",
     ]:
         if key in st.session_state:
             del st.session_state[key]
     st.session_state["step"] = "interview_info"
     st.rerun()
 
-# ---------------------------------------------------------
-# 질문 템플릿 함수들
-# ---------------------------------------------------------
-def make_core_claim_suspect(offense_text: str) -> str:
-    return f"저는 {offense_text}한 사실이 없습니다."
-
-
-def make_r_questions_suspect(offense_text: str) -> list[str]:
-    return [
-        f"당신은 그 당시 {offense_text}한 사실이 있습니까?",
-        f"당신은 직접 {offense_text}한 적이 있습니까?",
-        f"당신이 {offense_text}한 것이 사실입니까?",
-    ]
-
-
-# I / SR 질문 텍스트 (고정)
-I_QUESTION = "당신은 오늘 검사관이 연습한 것만 질문한다는 것을 믿습니까?"
-SR_QUESTION = "당신은 오늘 검사관이 묻는 질문에 사실대로 대답하겠습니까?"
-
-# 성향 설문 문항 (DLCQ 후보)
-DLCQ_ITEMS = [
-    "당신은 지금까지 살면서 가족이나 친구에게 거짓말을 해본 적이 있습니까?",
-    "당신은 지금까지 살면서 누군가에게 단 한 번이라도 거짓말을 한 적이 있습니까?",
-    "당신은 지금까지 살면서 실수를 저지른 뒤 그것을 비밀로 한 적이 있습니까?",
-    "당신은 지금까지 살면서 규칙이나 규정을 어긴 적이 있습니까?",
-    "당신은 지금까지 살면서 책임을 피하기 위해 거짓말을 한 적이 있습니까?",
-    "당신은 지금까지 살면서 다른 사람의 흉이나 뒷담화를 한 적이 있습니까?",
-    "당신은 지금까지 살면서 본인의 잘못을 타인에게 돌린 적이 있습니까?",
-    "당신은 지금까지 살면서 가족들에게 말하지 못한 비밀이 있습니까?",
-    "당신은 지금까지 살면서 본인의 잘못을 숨긴 사실이 있습니까?",
-    "당신은 지금까지 살면서 없는 말을 꾸며서 말한 적이 있습니까?",
-    "당신은 지금까지 살면서 나쁜 행동을 해본 적이 있습니까?",
-    "당신은 지금까지 살면서 주변 사람들이 알면 안 되는 행동을 한 사실이 있습니까?",
-    "당신은 지금까지 살면서 잘못된 것임을 알고도 행동한 적이 있습니까?",
-    "당신은 지금까지 살면서 본인을 위해 남에게 피해를 준 적이 있습니까?",
-    "당신은 지금까지 살면서 다른 사람을 미워하거나 시기한 적이 있습니까?",
-    "당신은 지금까지 살면서 양심에 찔리는 행동을 한 적이 있습니까?",
-    "당신은 지금까지 살면서 다른 사람에게 상처 되는 말을 한 적이 있습니까?",
-]
 
 def pick_cq_indices(dlcq_answers: dict[int, bool], k: int = 3) -> list[int]:
     yes_indices = [i for i, ans in dlcq_answers.items() if ans]
@@ -164,46 +141,13 @@ if step == "interview_info":
 
     offense_category = st.selectbox(
         "사건의 대분류를 선택해 주세요.",
-        [
-            "실험참여",
-            "성범죄",
-            "폭력범죄",
-            "재산범죄",
-            "공무원범죄",
-            "기타",
-        ],
+        list(OFFENSE_CATEGORIES),
     )
 
-    if offense_category == "실험참여":
-        offense_type = st.selectbox(
-            "사건의 세부유형을 선택해 주세요.",
-            ["빨간 버튼을 클릭", "인형을 폭행"],
-        )
-    elif offense_category == "성범죄":
-        offense_type = st.selectbox(
-            "사건의 세부유형을 선택해 주세요.",
-            ["성희롱", "강제추행", "강간", "불법촬영"],
-        )
-    elif offense_category == "폭력범죄":
-        offense_type = st.selectbox(
-            "사건의 세부유형을 선택해 주세요.",
-            ["폭행", "상해", "협박", "체포·감금", "주거침입"],
-        )
-    elif offense_category == "재산범죄":
-        offense_type = st.selectbox(
-            "사건의 세부유형을 선택해 주세요.",
-            ["절도", "강도", "위조", "사기 행위", "횡령", "배임"],
-        )
-    elif offense_category == "공무원범죄":
-        offense_type = st.selectbox(
-            "사건의 세부유형을 선택해 주세요.",
-            ["직무 유기", "직권 남용", "비밀 누설", "선거 방해", "뇌물 요구", "뇌물 수수", "뇌물 공여"],
-        )
-    else:
-        offense_type = st.selectbox(
-            "사건의 세부유형을 선택해 주세요.",
-            ["기타"],
-        )
+    offense_type = st.selectbox(
+        "사건의 세부유형을 선택해 주세요.",
+        OFFENSE_CATEGORIES[offense_category],
+    )
 
     offense_free = ""
     if offense_type == "기타":
@@ -213,7 +157,7 @@ if step == "interview_info":
         )
 
     if offense_type == "기타":
-        offense_text = offense_free.strip() if offense_free else "행위를"
+        offense_text = offense_free.strip() if offense_free else DEFAULT_OFFENSE_TEXT
     else:
         offense_text = offense_type
 
@@ -680,6 +624,11 @@ elif step == "interview_n_practice":
                     "C": c_set,
                     "R": r_set,
                 }
+                st.session_state["case_bundle"] = None
+
+                # 질문 세트 확정 → 최종 연습 동안 검사 오디오를 백그라운드에서 미리 합성
+                seq = build_exam_sequence(questions_from_question_set(st.session_state["question_set"]))
+                get_prefetcher().submit(seq)
                 goto("interview_final_intro")
 
 # ---------- 13) 11문항 최종 연습 안내 ----------
@@ -836,21 +785,7 @@ Ophtheon 검사 전 안내 및 연습이 모두 종료되었습니다.
             """
         )
 
-        lines = []
-        lines.append("[피검자의 핵심 주장]")
-        lines.append(core_claim)
-        lines.append("")
-        lines.append("[최종 11문항 질문 세트]")
-        lines.append(f"I1. {qs['I']}")
-        lines.append(f"SR1. {qs['SR']}")
-        for i, q in enumerate(qs["N"], start=1):
-            lines.append(f"N{i}. {q}")
-        for i, q in enumerate(qs["C"], start=1):
-            lines.append(f"C{i}. {q}")
-        for i, q in enumerate(qs["R"], start=1):
-            lines.append(f"R{i}. {q}")
-
-        summary_text = "\n".join(lines)
+        summary_text = format_question_set_txt(core_claim, qs)
         buffer = io.BytesIO(summary_text.encode("utf-8"))
 
         st.download_button(
@@ -860,6 +795,31 @@ Ophtheon 검사 전 안내 및 연습이 모두 종료되었습니다.
             mime="text/plain",
         )
 
+        # 선택: 합성된 검사 오디오까지 담은 번들 → 검사 시행 단계에서 바로 시작 가능
+        st.markdown("---")
+        st.markdown("검사 오디오까지 포함된 **검사 번들(.zip)** 을 받으면, 검사 시행 단계에서 음성 생성 없이 바로 시작할 수 있습니다.")
+        if st.session_state.get("case_bundle") is None:
+            if st.button("검사 번들 만들기"):
+                seq = build_exam_sequence(questions_from_question_set(qs))
+                try:
+                    with st.spinner("검사 오디오를 준비하고 있습니다..."):
+                        segments, rendered = render_segments(seq)
+                        _, timeline = assemble_exam_audio(segments, rendered)
+                        st.session_state["case_bundle"] = build_bundle_bytes(
+                            core_claim, qs, segments, rendered, timeline
+                        )
+                except TimeoutError:
+                    st.error("검사 오디오 준비가 지연되고 있습니다. 텍스트 파일을 사용하거나 잠시 후 다시 시도해 주세요.")
+                else:
+                    st.rerun()
+        else:
+            st.download_button(
+                label="검사 번들 다운로드 (.zip)",
+                data=st.session_state["case_bundle"],
+                file_name="ophtheon_case_bundle.zip",
+                mime="application/zip",
+            )
+
     st.markdown("---")
     col1, col2 = st.columns(2)
     with col1:
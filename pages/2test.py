@@ -1,25 +1,200 @@
 import streamlit as st
-import re
-import tempfile
-from openai import OpenAI
+import streamlit.components.v1 as components
+import io
+import os
+import uuid
+
+from exam.bundle import BundleError, is_bundle, load_bundle
+from exam.charts import ROTATIONS, assemble_charts, build_exam_charts
+from exam.prefetch import get_prefetcher
+from exam.resources import (
+    get_artifact_store,
+    get_audio_cache,
+    get_audio_server,
+    get_connection_stats,
+    get_live_scores,
+    get_stream_registry,
+    render_charts,
+    render_exam,
+    start_exam_stream,
+    start_live_scoring,
+)
+from exam.script import parse_question_set_txt, questions_from_question_set
+from exam.timeline import timeline_to_json
+from exam.transcode import encode_exam_audio, mime_type
+from exam.tts import latency_stats
+from pupil.scoring import VERDICT_LABELS
 
-client = OpenAI()
+ROTATION_LABELS = {"rotate": "묶음 회전", "random": "무작위", "fixed": "고정"}
 
 # ---------------------------------------------------------
-# 0. TTS: 텍스트 → mp3 파일 하나 생성
+# 0. TTS: 검사 시퀀스(차트별) → mp3 파일 생성
 # ---------------------------------------------------------
-def generate_exam_mp3(full_script: str) -> str:
+def generate_exam_charts(charts, owner: str, prefetched=None) -> list[dict]:
+    """
+    차트별 검사 오디오를 owner(세션) 소유의 mp3 파일로 저장하고, 차트 목록을 반환.
+    질문별 시작/끝 시각 타임라인은 같은 이름의 .events.json 으로 함께 저장.
+    차트가 하나면 검사 전 단계에서 미리 합성해 둔 결과를 그대로 사용하고,
+    여러 개면 조각을 한 번만 합성(대부분 캐시 적중)한 뒤 차트마다 순서만 바꿔 조립.
+    prefetched: 호출 측이 이미 꺼낸 미리 합성 결과 (take는 결과를 보관소에서 빼므로 한 번만 꺼냄).
+    """
+    if len(charts) == 1:
+        rendered = prefetched or get_prefetcher().take(charts[0])
+        if rendered is None:
+            rendered = render_exam(charts[0])
+        results = [rendered]
+    else:
+        results = render_charts(charts)
+    return store_exam_charts(charts, results, owner)
+
+
+def store_exam_charts(charts, results, owner: str) -> list[dict]:
+    """
+    차트별 검사 오디오 + 타임라인(.events.json)을 보관소에 저장하고
+    [{"seq", "audio"(mp3 경로), "timeline"}] 반환. 이전 검사의 파일은 모두 정리.
+    """
+    st.session_state["exam_stream"] = None
+    get_stream_registry().drop(owner)
+    store = get_artifact_store()
+    store.release(owner)
+    stored = []
+    for k, (seq, (audio_bytes, timeline)) in enumerate(zip(charts, results), start=1):
+        audio_bytes, ext = encode_exam_audio(audio_bytes)
+        path = store.put(
+            owner, audio_bytes, ext=ext, slot=f"chart{k}",
+            sidecars={"events.json": timeline_to_json(timeline).encode("utf-8")},
+        )
+        stored.append({"seq": seq, "audio": path, "timeline": timeline})
+    return stored
+
+
+def select_chart(index: int):
+    """
+    현재 진행할 차트를 바꿈. exam_full_audio / exam_timeline / exam_questions 는 선택된 차트를 가리킴.
+    """
+    chart = st.session_state["exam_charts"][index]
+    st.session_state["exam_chart"] = index
+    st.session_state["exam_questions"] = chart["seq"]
+    st.session_state["exam_full_audio"] = chart["audio"]
+    st.session_state["exam_timeline"] = chart["timeline"]
+
+
+def active_stream():
+    """
+    진행 중인 스트리밍 합성. 이미 끝났으면 확정된 파일 / 타임라인을 1번 차트에 반영하고 None.
+    (재생이 끊기지 않도록 화면이 다시 그려질 때만 전환)
+    """
+    token = st.session_state.get("exam_stream")
+    if not token:
+        return None
+    stream = get_stream_registry().get(token)
+    if stream is not None and not stream.done:
+        return stream
+
+    st.session_state["exam_stream"] = None
+    if stream is not None and stream.error is None:
+        path, timeline = stream.result()
+        st.session_state["exam_charts"][0].update(audio=path, timeline=timeline)
+        select_chart(0)
+    return None
+
+
+@st.fragment(run_every=1.0)
+def stream_progress(token: str):
+    stream = get_stream_registry().get(token)
+    if stream is None:
+        return
+    status = stream.status()
+    if status["error"]:
+        st.error("검사용 질문 생성에 실패했습니다. 다시 업로드해 주세요.")
+    elif status["done"]:
+        st.caption("검사용 질문 생성이 모두 끝났습니다.")
+    else:
+        st.progress(
+            status["ready_segments"] / status["total_segments"],
+            text=(
+                f"검사용 질문 생성 중 — {status['ready_segments']} / {status['total_segments']} 조각 "
+                f"({status['ready_ms'] / 1000:.0f}초 분량 재생 가능)"
+            ),
+        )
+
+
+def audio_server():
     """
-    OpenAI TTS로 전체 검사 스크립트를 mp3 파일로 저장하고, 경로를 반환.
+    이 브라우저가 닿을 수 있는 오디오 서버. 서버를 못 띄웠거나, 로컬 전용(127.0.0.1)인데
+    다른 컴퓨터에서 접속했으면 None (st.audio로 대체).
     """
-    response = client.audio.speech.create(
-        model="gpt-4o-mini-tts",
-        voice="alloy",
-        input=full_script,
+    server = get_audio_server()
+    if server is None or not server.reachable_from(st.context.headers.get("Host")):
+        return None
+    return server
+
+
+def play_exam_audio(full_audio, stream, on_play: str | None = None):
+    """
+    스트리밍 중이면 준비된 구간까지만 내보내는 HTTP 스트림을, 아니면 완성된 파일을 재생.
+    완성된 파일은 오디오 서버(Range / 브라우저 캐시)로 내보내고, 브라우저가 서버에 닿지 않을 때만 st.audio.
+    on_play: 처음 재생할 때 신호를 보낼 오디오 서버 경로 (실시간 채점의 오디오 시작 시각)
+    """
+    server = audio_server()
+    if stream is not None:
+        components.html(server.player_html(server.stream_path(stream.token), on_play), height=60)
+        stream_progress(stream.token)
+    elif server is not None:
+        components.html(server.player_html(server.artifact_path(full_audio), on_play), height=60)
+    else:
+        st.audio(full_audio, format=mime_type(full_audio))
+
+
+def live_scorer(chart: int):
+    """
+    현재 차트의 실시간 채점. 차트(오디오 파일)가 바뀌었거나 아직 없으면 새로 시작. 타임라인이 없으면 None.
+    """
+    timeline = st.session_state.get("exam_timeline")
+    if not timeline:
+        return None
+    key = [chart, st.session_state.get("exam_full_audio")]
+    live = st.session_state.get("live_score")
+    scorer = get_live_scores().get(live["token"]) if live and live["key"] == key else None
+    if scorer is None:
+        scorer = start_live_scoring(timeline, st.session_state["exam_owner"])
+        st.session_state["live_score"] = {"token": scorer.token, "key": key}
+    return scorer
+
+
+@st.fragment(run_every=1.0)
+def live_score_panel(token: str):
+    scorer = get_live_scores().get(token)
+    if scorer is None:
+        return
+    status = scorer.status()
+    if not status["started"]:
+        st.caption("오디오 재생을 시작하면 실시간 채점이 시작됩니다.")
+        return
+    if status["samples"] == 0:
+        st.caption("동공 샘플을 기다리는 중입니다.")
+        return
+    st.progress(
+        status["closed"] / status["total"],
+        text=f"실시간 채점 — 질문 {status['closed']} / {status['total']} 반응 구간 완료",
     )
-    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-    response.stream_to_file(tmp_file.name)
-    return tmp_file.name
+    cols = st.columns(len(status["triplets"]) + 1)
+    for k, (col, value) in enumerate(zip(cols, status["triplets"]), start=1):
+        col.metric(f"{k}묶음", "—" if value is None else f"{value:+.2f}")
+    if status["done"]:
+        cols[-1].metric("판정", VERDICT_LABELS[status["verdict"]])
+    else:
+        cols[-1].metric("잠정 점수", "—" if status["score"] is None else f"{status['score']:+.2f}")
+
+
+def exam_audio_ready(path) -> bool:
+    """
+    보관소에서 idle TTL / 용량 정리로 지워졌을 수도 있으므로 파일 존재까지 확인.
+    """
+    if not path or not os.path.exists(path):
+        return False
+    get_artifact_store().touch(path)
+    return True
 
 
 # ---------------------------------------------------------
@@ -87,97 +262,20 @@ if "exam_questions" not in st.session_state:
     st.session_state["exam_questions"] = None
 if "exam_full_audio" not in st.session_state:
     st.session_state["exam_full_audio"] = None
+if "exam_timeline" not in st.session_state:
+    st.session_state["exam_timeline"] = None
+if "exam_charts" not in st.session_state:
+    st.session_state["exam_charts"] = []
+if "exam_chart" not in st.session_state:
+    st.session_state["exam_chart"] = 0
+if "exam_stream" not in st.session_state:
+    st.session_state["exam_stream"] = None
+if "exam_owner" not in st.session_state:
+    st.session_state["exam_owner"] = uuid.uuid4().hex
 
 
 # ---------------------------------------------------------
-# 3. 텍스트 파싱
-# ---------------------------------------------------------
-def parse_question_set_txt(text: str):
-    """
-    [피검자의 핵심 주장] / [최종 11문항 질문 세트] 형식의 txt에서
-    core_claim, questions 딕셔너리 반환.
-    """
-    lines = [l.strip() for l in text.splitlines()]
-    core_claim = ""
-    questions = {"I": [], "SR": [], "N": [], "C": [], "R": []}
-
-    for i, line in enumerate(lines):
-        if line.startswith("[피검자의 핵심 주장]"):
-            if i + 1 < len(lines):
-                core_claim = lines[i + 1].strip()
-            break
-
-    pattern = re.compile(r"^(I\d+|SR\d+|N\d+|C\d+|R\d+)\.\s*(.+)$")
-    for line in lines:
-        m = pattern.match(line)
-        if not m:
-            continue
-        code = m.group(1)
-        question = m.group(2).strip()
-        if code.startswith("SR"):
-            qtype = "SR"
-        else:
-            qtype = code[0]
-        questions[qtype].append(question)
-
-    return core_claim, questions
-
-
-def build_exam_sequence(questions: dict):
-    """
-    I, SR, N1 C1 R1, N2 C2 R2, N3 C3 R3 순서 시퀀스 생성.
-    """
-    pattern = ["I", "SR", "N", "C", "R", "N", "C", "R", "N", "C", "R"]
-    counters = {"I": 0, "SR": 0, "N": 0, "C": 0, "R": 0}
-    seq = []
-    for t in pattern:
-        idx = counters[t]
-        try:
-            q_text = questions[t][idx]
-        except IndexError:
-            q_text = f"[{t} 질문이 부족합니다]"
-        seq.append({"type": t, "index": idx + 1, "text": q_text})
-        if t in ["N", "C", "R"]:
-            counters[t] += 1
-    return seq
-
-
-def build_full_script(seq):
-    """
-    베이스라인 안내 + 11개 질문을 하나의 긴 한국어 스크립트로 생성.
-    중간 타이밍은 말로 안내하는 방식.
-    """
-    # 베이스라인
-    script_parts = []
-    script_parts.append(
-        "이제 옵시언 자동 검사를 시작하겠습니다. "
-        "화면 중앙의 십자를 조용히 응시해 주세요. "
-        "눈을 장시간 감거나 자주 깜빡이지 않도록 노력해 주시고, 몸을 최대한 움직이지 말아 주세요. "
-        "연습했던 열한 개의 질문이 순서대로 제시됩니다. "
-        "모든 질문에 대해 또렷한 목소리로 예 또는 아니오라고 대답해 주세요. "
-    )
-
-    # 질문 11개
-    for i, item in enumerate(seq, start=1):
-        q_text = item["text"]
-        script_parts.append(
-            f"\n\n이어서 잠시 후 질문을 드리겠습니다. "
-            "질문이 끝난 후 삼 초 뒤, 예 또는 아니오라고 대답해 주세요. "
-            f"잠시 후 다음 질문을 읽어 드리겠습니다. 천천히 내용을 들으신 뒤, 삼 초 후에 예 또는 아니오로 대답해 주세요. {q_text} . 삼, 이이, 일."
-        )
-
-    # 마지막 마무리
-    script_parts.append(
-        "\n\n이상으로 옵시언 자동 검사를 모두 마쳤습니다. "
-        "십자 응시를 멈추시고 편안한 자세를 취하셔도 좋습니다."
-    )
-
-    full_script = " ".join(script_parts)
-    return full_script
-
-
-# ---------------------------------------------------------
-# 4. 단계별 화면
+# 3. 단계별 화면
 # ---------------------------------------------------------
 step = st.session_state["test_step"]
 
@@ -188,36 +286,104 @@ if step == "upload":
     st.markdown(
         """
 검사 전 단계에서 생성한  
-**질문 텍스트(.txt)** 파일을 업로드해 주세요.
+**질문 텍스트(.txt)** 또는 **검사 번들(.zip)** 파일을 업로드해 주세요.
         """
     )
 
-    uploaded = st.file_uploader("질문 텍스트 파일(.txt) 업로드", type=["txt"])
-
-    if uploaded is not None:
-        text = uploaded.read().decode("utf-8")
-        core_claim, questions = parse_question_set_txt(text)
-        seq = build_exam_sequence(questions)
-
-        st.session_state["exam_core_claim"] = core_claim
-        st.session_state["exam_questions"] = seq
-
-        full_script = build_full_script(seq)
+    col_charts, col_rotation = st.columns(2)
+    with col_charts:
+        n_charts = st.number_input("차트 수", min_value=1, max_value=5, value=1, step=1)
+    with col_rotation:
+        rotation = st.selectbox(
+            "차트별 질문 순서",
+            ROTATIONS[1:] + ROTATIONS[:1],
+            format_func=ROTATION_LABELS.get,
+            disabled=n_charts == 1,
+        )
 
-        st.markdown("질문이 로드되었습니다. 이제 검사 질문을 생성합니다.")
+    streaming = st.checkbox(
+        "질문 생성이 끝나기 전에 재생 시작",
+        value=False,
+        disabled=n_charts > 1,
+        help="앞부분 안내가 준비되는 대로 재생할 수 있습니다. 재생은 생성된 부분을 앞지르지 않습니다.",
+    )
 
-        with st.spinner("검사용 질문을 생성하고 있습니다. 잠시만 기다려 주세요..."):
-            full_audio = generate_exam_mp3(full_script)
+    uploaded = st.file_uploader("질문 텍스트(.txt) / 검사 번들(.zip) 업로드", type=["txt", "zip"])
 
-        st.session_state["exam_full_audio"] = full_audio
-        st.session_state["test_step"] = "prepare"
-        st.rerun()
+    if uploaded is not None:
+        data = uploaded.read()
+
+        if is_bundle(data):
+            # 번들: 오디오 조각이 들어 있으므로 합성 없이 바로 준비 단계로
+            try:
+                bundle = load_bundle(io.BytesIO(data))
+                if n_charts == 1:
+                    charts = [bundle["seq"]]
+                    results = [(bundle["audio"], bundle["timeline"])]
+                else:
+                    charts = build_exam_charts(
+                        questions_from_question_set(bundle["question_set"]), n_charts, rotation
+                    )
+                    results = assemble_charts(charts, bundle["rendered"])
+            except (BundleError, ValueError) as e:
+                st.error(str(e))
+            else:
+                st.session_state["exam_core_claim"] = bundle["core_claim"]
+                st.session_state["exam_charts"] = store_exam_charts(
+                    charts, results, st.session_state["exam_owner"]
+                )
+                select_chart(0)
+                st.session_state["test_step"] = "prepare"
+                st.rerun()
+        else:
+            text = data.decode("utf-8")
+            core_claim, questions = parse_question_set_txt(text)
+            charts = build_exam_charts(questions, n_charts, rotation)
+
+            st.session_state["exam_core_claim"] = core_claim
+
+            st.markdown("질문이 로드되었습니다. 이제 검사 질문을 생성합니다.")
+
+            owner = st.session_state["exam_owner"]
+            prefetched = get_prefetcher().take(charts[0], timeout=0) if n_charts == 1 else None
+            if streaming and n_charts == 1 and prefetched is None and audio_server() is not None:
+                # 합성을 기다리지 않고 바로 안내 단계로. 오디오는 준비되는 대로 스트리밍
+                get_stream_registry().drop(owner)
+                get_artifact_store().release(owner)
+                stream = start_exam_stream(charts[0], owner)
+                st.session_state["exam_stream"] = stream.token
+                st.session_state["exam_charts"] = [{"seq": charts[0], "audio": None, "timeline": None}]
+                select_chart(0)
+                st.session_state["test_step"] = "prepare"
+                st.rerun()
+
+            try:
+                with st.spinner("검사용 질문을 생성하고 있습니다. 잠시만 기다려 주세요..."):
+                    stored = generate_exam_charts(charts, st.session_state["exam_owner"], prefetched)
+            except TimeoutError:
+                st.error("검사용 질문 생성이 지연되고 있습니다. 잠시 후 파일을 다시 업로드해 주세요.")
+            else:
+                st.session_state["exam_charts"] = stored
+                select_chart(0)
+                st.session_state["test_step"] = "prepare"
+                st.rerun()
 
 # ---------- (2) 검사 전 안내 ----------
 elif step == "prepare":
+    if len(st.session_state["exam_charts"]) > 1:
+        chart = st.radio(
+            "진행할 차트",
+            range(len(st.session_state["exam_charts"])),
+            index=st.session_state["exam_chart"],
+            format_func=lambda k: f"{k + 1}번째 차트",
+            horizontal=True,
+        )
+        if chart != st.session_state["exam_chart"]:
+            select_chart(chart)
+    stream = active_stream()
     full_audio = st.session_state.get("exam_full_audio", None)
 
-    if not full_audio:
+    if stream is None and not exam_audio_ready(full_audio):
         st.error("검사용 질문이 준비되지 않았습니다. 다시 업로드해 주세요.")
         if st.button("다시 업로드하기"):
             st.session_state["test_step"] = "upload"
@@ -250,13 +416,45 @@ Ophtheon은 자동 음성으로 질문을 안내합니다.
 
         st.markdown("---")
         st.markdown("생성된 검사용 오디오를 미리 들어보고 싶다면 아래 플레이어를 사용할 수 있습니다.")
-        st.audio(full_audio)
+        play_exam_audio(full_audio, stream)
+
+        timeline = st.session_state.get("exam_timeline")
+        if timeline:
+            chart_no = st.session_state["exam_chart"] + 1
+            st.download_button(
+                label="질문 타임라인 다운로드 (.json)",
+                data=timeline_to_json(timeline).encode("utf-8"),
+                file_name=(
+                    f"ophtheon_exam_events_chart{chart_no}.json"
+                    if len(st.session_state["exam_charts"]) > 1 else "ophtheon_exam_events.json"
+                ),
+                mime="application/json",
+            )
+
+        cache_stats = get_audio_cache().stats()
+        st.caption(
+            f"오디오 캐시 — 적중 {cache_stats['hits']}회 / 미스 {cache_stats['misses']}회 "
+            f"({cache_stats['entries']}개, {cache_stats['bytes'] / 1e6:.1f} MB)"
+        )
+        conn_stats = get_connection_stats().snapshot()
+        st.caption(
+            f"TTS 연결 — 요청 {conn_stats['requests']}회 / 새 연결 {conn_stats['new_connections']}회 "
+            f"(재사용률 {conn_stats['reuse_rate']:.0%})"
+        )
+        lat = latency_stats()
+        if lat["count"]:
+            st.caption(
+                f"TTS 지연 — p50 {lat['p50']:.2f}s / p95 {lat['p95']:.2f}s / p99 {lat['p99']:.2f}s "
+                f"(최근 {lat['count']}회, 실패 {lat['failures']}회 중 타임아웃 {lat['timeouts']}회)"
+            )
 
 # ---------- (3) 실제 검사 화면 ----------
 elif step == "run":
+    n_charts = len(st.session_state["exam_charts"])
+    stream = active_stream()
     full_audio = st.session_state.get("exam_full_audio", None)
 
-    if not full_audio:
+    if stream is None and not exam_audio_ready(full_audio):
         st.error("검사용 질문이 준비되지 않았습니다. 다시 업로드해 주세요.")
         if st.button("다시 업로드하기"):
             st.session_state["test_step"] = "upload"
@@ -296,13 +494,44 @@ elif step == "run":
             """
         )
 
-        st.audio(full_audio)
+        chart = st.session_state["exam_chart"]
+        server = audio_server()
+        scorer = None
+        if server is not None and st.checkbox(
+            "실시간 채점",
+            key="live_scoring",
+            help="시선 추적기 중계 프로그램이 동공 샘플을 보내면 질문마다 R 대 C 점수를 바로 갱신합니다.",
+        ):
+            scorer = live_scorer(chart)
+            if scorer is None:
+                st.caption("검사용 질문 생성이 끝나면 실시간 채점을 사용할 수 있습니다.")
+
+        play_exam_audio(full_audio, stream, None if scorer is None else f"{server.pupil_path(scorer.token)}/play")
+
+        if scorer is not None:
+            st.caption(f"동공 샘플 전송 주소: `POST {server.base_url()}{server.pupil_path(scorer.token)}`")
+            live_score_panel(scorer.token)
+
+        if n_charts > 1:
+            st.caption(f"{chart + 1} / {n_charts} 차트")
+        if chart + 1 < n_charts:
+            if st.button("다음 차트로 이동"):
+                select_chart(chart + 1)
+                st.rerun()
 
         st.markdown("---")
 if st.button("검사 종료"):
     # 검사 상태 초기화
     st.session_state["test_step"] = "upload"
     st.session_state["exam_full_audio"] = None
-    
+    st.session_state["exam_timeline"] = None
+    st.session_state["exam_charts"] = []
+    st.session_state["exam_chart"] = 0
+    st.session_state["exam_stream"] = None
+    st.session_state["live_score"] = None
+    get_stream_registry().drop(st.session_state["exam_owner"])
+    get_live_scores().drop(st.session_state["exam_owner"])
+    get_artifact_store().release(st.session_state["exam_owner"])
+
     # 홈(app.py)로 이동
     st.switch_page("app.py")
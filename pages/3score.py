@@ -1,6 +1,88 @@
 # 3score.py
+import json
+import os
+import tempfile
+import warnings
+
+import numpy as np
 import streamlit as st
 
+from exam.resources import get_norms_index, get_pupil_model, get_stage_cache
+from pupil.epochs import Epochs
+from pupil.ingest import IngestError
+from pupil.norms import ALL, METRIC_LABELS, record_values
+from pupil.pipeline import run_pipeline
+from pupil.resample import RESAMPLE_ALPHA
+from pupil.scoring import FEATURES, SCORE_CUTOFF, VERDICT_LABELS
+
+FEATURE_LABELS = {"peak": "최대 확장", "latency": "지연 시간", "auc": "반응 면적"}
+
+
+# ---------------------------------------------------------
+# 0. 채점: 시선 추적기 파일 → 변환 → 정리 → 구간 → R 대 C 비교
+# ---------------------------------------------------------
+def run_scoring(upload, timelines: list[dict], offsets: list[float]) -> dict:
+    """
+    업로드한 원본을 단계 캐시(같은 파일 / 설정이면 재사용)로 채점하고, 화면에 필요한 값만 남김.
+    """
+    with tempfile.TemporaryDirectory(prefix="ophtheon-score-") as tmp:
+        src = os.path.join(tmp, os.path.basename(upload.name))
+        with open(src, "wb") as f:
+            f.write(upload.getbuffer())
+        summary = run_pipeline(src, list(zip(timelines, offsets)), get_stage_cache(), with_epochs=True)
+
+    rows = []
+    for k, chart in enumerate(summary["triplets"]):
+        for j, value in enumerate(chart):
+            row = {"차트": k + 1, "묶음": j + 1}
+            for name in FEATURES:
+                row[FEATURE_LABELS[name]] = summary["diffs"][name][k][j]
+            row["묶음 점수"] = value
+            rows.append(row)
+    epochs = Epochs.load(summary["epochs"])
+    with warnings.catch_warnings():
+        # 모든 차트에서 빈 샘플인 시점은 NaN으로 둠
+        warnings.simplefilter("ignore", RuntimeWarning)
+        curves = {
+            "시간(초)": epochs.times.tolist(),
+            "C": np.nanmean(epochs.of_type("C"), axis=(0, 1)).tolist(),
+            "R": np.nanmean(epochs.of_type("R"), axis=(0, 1)).tolist(),
+        }
+    return {
+        "score": summary["score"],
+        "verdict": summary["verdict"],
+        "n_triplets": summary["n_triplets"],
+        "ci": summary["ci"],
+        "p_value": summary["p_value"],
+        "verdict_support": summary["verdict_support"],
+        "rows": rows,
+        "curves": curves,
+        "quality": summary["quality"],
+        "norm_values": record_values(summary),
+    }
+
+
+def norm_rows(result: dict, case_info: dict | None) -> list[dict]:
+    """
+    검사 점수 / R 대 C 비교 지표를 같은 사건 유형(있으면 연령 / 수면 구간까지)의 과거 검사와 비교.
+    """
+    norms = get_norms_index()
+    if norms is None:
+        return []
+    values = {m: v for m, v in result["norm_values"].items() if m in METRIC_LABELS}
+    rows = []
+    for found in norms.compare(case_info, values):
+        group = found["group"] if found["covariate"] == "all" else f"{found['group']} · {found['bucket']}"
+        rows.append({
+            "지표": METRIC_LABELS[found["metric"]],
+            "값": found["value"],
+            "비교 집단": group,
+            "과거 검사 수": found["n"],
+            "백분위": round(found["percentile"], 1),
+        })
+    return rows
+
+
 # ---------------------------------------------------------
 # 1. 스타일 (폰트 + 사이드바 숨김)
 # ---------------------------------------------------------
@@ -48,16 +130,78 @@ st.title("데이터 기반 자동 판정")
 
 st.markdown(
     """
-현재 동공 기반 자동 판정 로직은  
-파일럿 연구 및 알고리즘 고도화 단계에 있습니다.
-
-향후에는 검사 시 수집된 동공 시계열 데이터와  
-질문 유형별 동공 크기를 기반으로,  
+검사 중 기록한 **시선 추적기 파일(CSV/TSV)**과 검사 타임라인으로  
+각 묶음(N C R)에서 관련 질문(R)과 비교 질문(C)의 동공 반응을 비교합니다.
 
-**실시간으로 진위 판정** 의견을 제시하는 형태로 제공될 예정입니다.
+현재 판정 기준은 파일럿 연구 단계의 값이며, 참고 의견으로만 사용해 주세요.
 """
 )
 
+# 타임라인: 이번 세션에서 진행한 검사가 있으면 그대로, 없으면 .events.json 업로드
+timelines = [c["timeline"] for c in st.session_state.get("exam_charts", []) if c.get("timeline")]
+if timelines:
+    st.caption(f"이번 세션의 검사 타임라인 {len(timelines)}차트를 사용합니다.")
+else:
+    uploaded_timelines = st.file_uploader(
+        "검사 타임라인(.events.json) 업로드 — 차트 순서대로", type=["json"], accept_multiple_files=True
+    )
+    timelines = [json.loads(f.read().decode("utf-8")) for f in sorted(uploaded_timelines or [], key=lambda f: f.name)]
+
+pupil_file = st.file_uploader("시선 추적기 기록(.csv / .tsv / .txt) 업로드", type=["csv", "tsv", "txt"])
+
+offsets = []
+if timelines:
+    st.markdown("각 차트의 검사 오디오가 기록 시작 후 몇 초에 재생되었는지 입력해 주세요.")
+    cols = st.columns(len(timelines))
+    for k, col in enumerate(cols):
+        with col:
+            offsets.append(st.number_input(f"{k + 1}차트 시작(초)", min_value=0.0, value=0.0, step=0.1, key=f"score_offset_{k}"))
+
+if st.button("채점", disabled=pupil_file is None or not timelines):
+    try:
+        with st.spinner("동공 기록을 정리하고 채점하는 중입니다..."):
+            st.session_state["score_result"] = run_scoring(pupil_file, timelines, offsets)
+    except (IngestError, ValueError) as e:
+        st.session_state["score_result"] = None
+        st.error(str(e))
+
+result = st.session_state.get("score_result")
+if result:
+    col_score, col_verdict, col_triplets = st.columns(3)
+    col_score.metric("검사 점수", f"{result['score']:+.3f}")
+    col_verdict.metric("판정", VERDICT_LABELS[result["verdict"]])
+    col_triplets.metric("채점한 묶음", result["n_triplets"])
+    st.caption(
+        f"점수는 묶음별 (C − R) 비교의 평균입니다. +{SCORE_CUTOFF:g} 이상은 진실 반응, "
+        f"−{SCORE_CUTOFF:g} 이하는 거짓 반응으로 봅니다."
+    )
+    model = get_pupil_model()
+    if model is not None:
+        best = next(r for r in model.meta["cv"] if r["l2"] == model.meta["l2"])
+        st.metric("모델 추정 거짓 반응 확률", f"{model.predict_values(result['norm_values']):.0%}")
+        st.caption(
+            f"분류 모델 {model.version} (과거 검사 {model.meta['n_train']}건 학습, 교차 검증 AUC {best['auc']:.2f}). "
+            "위 판정과 별개의 참고 값입니다."
+        )
+    if np.isfinite(result["p_value"]):
+        low, high = result["ci"]
+        st.caption(
+            f"점수 {1 - RESAMPLE_ALPHA:.0%} 신뢰구간 [{low:+.3f}, {high:+.3f}] · "
+            f"순열 검정 p = {result['p_value']:.4f} · "
+            f"묶음을 다시 뽑았을 때 같은 판정 {result['verdict_support']:.0%}"
+        )
+    st.line_chart(result["curves"], x="시간(초)", y=["C", "R"])
+    st.dataframe(result["rows"], hide_index=True)
+
+    norms = norm_rows(result, st.session_state.get("case_info"))
+    if norms:
+        st.markdown("#### 과거 검사 대비")
+        st.dataframe(norms, hide_index=True)
+        st.caption(
+            f"같은 사건 유형에서 과거 검사가 충분하지 않으면 더 넓은 집단({ALL} 포함)과 비교합니다. "
+            "백분위가 높을수록 과거 검사보다 값이 큽니다."
+        )
+
 st.info(
     """Ophtheon은 지속적인 연구를 통해,  
 AI 검사관이 수행하는 동공 기반 자동 판정을 목표로 합니다."""
@@ -0,0 +1,2 @@
+# ophtheon/pupil
+# 자동 판정(pages/3score.py) 단계에서 쓰는 동공 기록 수집 / 전처리 / 채점 모듈 모음.
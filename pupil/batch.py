@@ -0,0 +1,292 @@
+# ophtheon/pupil/batch.py
+# 보관 중인 검사 세션 전체를 Streamlit 없이 다시 채점 (야간 재채점용).
+#
+#   python -m pupil.batch archive/ -o rescore/ --workers 4
+#
+# 보관소 구조 (세션마다 디렉터리 하나):
+#   archive/<세션>/
+#     *.csv | *.tsv | *.txt | *.pupil/   시선 추적기 원본 또는 이미 변환한 기록
+#     *.events.json                      차트별 검사 타임라인 (이름순 = 차트 순서)
+#     *.zip                              events.json이 없으면 사건 번들의 타임라인(1차트)
+#     session.json                       선택: {"audio_onsets": [차트별 오디오 시작(초, 기록 시작 기준)],
+#                                              "case_info": 검사 전 단계의 사건 / 피검자 정보 (규준 색인용),
+#                                              "ground_truth": 확인된 결과 "DI" / "NDI" (분류 모델 학습용)}
+#
+# 세션 묶음(chunk) 단위로 프로세스 풀에 나눠 주고, 작업자는 경로만 받아 기록을 memmap으로 엶
+# (큰 배열을 피클로 주고받지 않음). 결과는 세션이 끝날 때마다 results.jsonl에 한 줄씩 덧붙이므로,
+# 중간에 멈춰도 다시 실행하면 입력 / 매개변수가 바뀌지 않은 세션은 건너뜀.
+# 단계 결과는 공용 단계 캐시(pupil.cache)에 남으므로, 매개변수를 바꿔 다시 돌리면 바뀐 단계부터만 계산.
+#
+#   python -m pupil.batch archive/ -o rescore-bl1/ --param epoch.baseline_s=1.0
+import argparse
+import hashlib
+import json
+import os
+import time
+import traceback
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from exam.bundle import MANIFEST_NAME
+from pupil.cache import DEFAULT_STAGE_CACHE_DIR, StageCache, hash_json
+from pupil.pipeline import RAW_EXTENSIONS, is_recording, parse_param, resolve_params, run_pipeline
+from pupil.scoring import VERDICT_LABELS
+
+RESULTS_NAME = "results.jsonl"
+SESSION_META_NAME = "session.json"
+BATCH_WORKERS = int(os.environ.get("OPHTHEON_BATCH_WORKERS", os.cpu_count() or 1))
+# 작업자에게 한 번에 넘기는 세션 수
+BATCH_CHUNK_SESSIONS = int(os.environ.get("OPHTHEON_BATCH_CHUNK_SESSIONS", 8))
+
+
+class ArchiveError(ValueError):
+    pass
+
+
+def _fingerprint(paths) -> str:
+    """
+    입력 파일(디렉터리면 그 안의 파일)의 이름 / 크기 / 수정 시각 해시. 바뀌면 다시 채점.
+    """
+    h = hashlib.sha256()
+    for path in sorted(paths):
+        files = [path] if os.path.isfile(path) else sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+        )
+        for f in files:
+            st = os.stat(f)
+            h.update(f"{os.path.basename(f)}:{st.st_size}:{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _bundle_timeline(path: str) -> dict:
+    with zipfile.ZipFile(path) as zf:
+        return json.loads(zf.read(MANIFEST_NAME).decode("utf-8"))["timeline"]
+
+
+def load_session(path: str) -> dict:
+    """
+    세션 디렉터리 → {"name", "source", "timelines", "onsets", "case_info", "ground_truth", "fingerprint"}.
+    """
+    names = sorted(os.listdir(path))
+    full = [os.path.join(path, n) for n in names]
+    sources = [
+        f for f in full
+        if (os.path.isfile(f) and f.lower().endswith(RAW_EXTENSIONS)) or (os.path.isdir(f) and is_recording(f))
+    ]
+    if len(sources) != 1:
+        raise ArchiveError(f"{path}: 동공 기록 파일이 하나여야 합니다 ({len(sources)}개).")
+    events = [f for f in full if f.endswith(".events.json")]
+    if events:
+        timelines = []
+        for f in events:
+            with open(f, encoding="utf-8") as fp:
+                timelines.append(json.load(fp))
+    else:
+        bundles = [f for f in full if f.lower().endswith(".zip")]
+        if not bundles:
+            raise ArchiveError(f"{path}: 검사 타임라인(.events.json / 번들)이 없습니다.")
+        events = bundles[:1]
+        timelines = [_bundle_timeline(bundles[0])]
+
+    onsets = [0.0] * len(timelines)
+    case_info = None
+    ground_truth = None
+    meta_path = os.path.join(path, SESSION_META_NAME)
+    inputs = [sources[0], *events]
+    if os.path.isfile(meta_path):
+        with open(meta_path, encoding="utf-8") as fp:
+            meta = json.load(fp)
+        onsets = [float(x) for x in meta.get("audio_onsets", onsets)]
+        case_info = meta.get("case_info")
+        ground_truth = meta.get("ground_truth")
+        if len(onsets) != len(timelines):
+            raise ArchiveError(f"{path}: audio_onsets 개수({len(onsets)})가 차트 수({len(timelines)})와 다릅니다.")
+        inputs.append(meta_path)
+
+    return {
+        "name": os.path.basename(os.path.normpath(path)),
+        "source": sources[0],
+        "timelines": timelines,
+        "onsets": onsets,
+        "case_info": case_info,
+        "ground_truth": ground_truth,
+        "fingerprint": _fingerprint(inputs),
+    }
+
+
+def discover_sessions(root: str) -> list[str]:
+    return [
+        os.path.join(root, name) for name in sorted(os.listdir(root))
+        if os.path.isdir(os.path.join(root, name)) and not is_recording(os.path.join(root, name))
+    ]
+
+
+def load_results(path: str, params: str | None = None) -> dict[str, dict]:
+    """
+    results.jsonl → 세션 이름별 마지막 성공 결과. 중간에 끊긴 마지막 줄은 무시.
+    params(매개변수 해시)를 주면 그 매개변수로 채점한 줄만 봄.
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "error" not in row and (params is None or row.get("params") == params):
+                done[row["session"]] = row
+    return done
+
+
+def _trim_partial_line(path: str, block: int = 1 << 16):
+    """
+    이전 실행이 줄 중간에 끊겼으면 마지막 줄바꿈 뒤의 조각을 잘라 냄 (다음 줄이 그 조각에 붙지 않게).
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "r+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(0, pos - block)
+            f.seek(start)
+            chunk = f.read(pos - start)
+            cut = chunk.rfind(b"\n")
+            if cut >= 0:
+                pos = start + cut + 1
+                break
+            pos = start
+        if pos < end:
+            f.truncate(pos)
+
+
+def score_sessions(paths: list[str], cache_dir: str, params: dict) -> list[dict]:
+    """
+    작업자 프로세스에서 세션 묶음 채점. 세션별 실패는 결과 줄에 오류로 남기고 계속.
+    """
+    cache = StageCache(cache_dir)
+    params_key = hash_json(params)
+    rows = []
+    for path in paths:
+        started = time.perf_counter()
+        name = os.path.basename(os.path.normpath(path))
+        try:
+            session = load_session(path)
+            summary = run_pipeline(
+                session["source"], list(zip(session["timelines"], session["onsets"])), cache, params
+            )
+            row = {"session": name, "fingerprint": session["fingerprint"], "params": params_key, **summary}
+            for key in ("case_info", "ground_truth"):
+                if session[key]:
+                    row[key] = session[key]
+        except Exception as e:
+            row = {"session": name, "error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()}
+        row["elapsed"] = time.perf_counter() - started
+        rows.append(row)
+    return rows
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def run_batch(root: str, out: str, workers: int = BATCH_WORKERS, chunk_sessions: int = BATCH_CHUNK_SESSIONS,
+              resume: bool = True, params: dict | None = None, cache_dir: str = DEFAULT_STAGE_CACHE_DIR,
+              on_row=None) -> dict:
+    """
+    root 아래 세션을 모두 채점해 out/results.jsonl에 덧붙임. resume이면 입력 / 매개변수가 같은 세션은 건너뜀.
+    params는 pupil.pipeline.resolve_params 형식의 덮어쓰기. on_row(row)는 세션이 끝날 때마다 호출.
+    """
+    params = resolve_params(params)
+    params_key = hash_json(params)
+    os.makedirs(out, exist_ok=True)
+    results_path = os.path.join(out, RESULTS_NAME)
+    done = load_results(results_path) if resume else {}
+    if not resume and os.path.exists(results_path):
+        os.remove(results_path)
+    _trim_partial_line(results_path)
+
+    todo = []
+    skipped = 0
+    for path in discover_sessions(root):
+        name = os.path.basename(path)
+        if name in done and done[name].get("params") == params_key:
+            try:
+                if load_session(path)["fingerprint"] == done[name].get("fingerprint"):
+                    skipped += 1
+                    continue
+            except ArchiveError:
+                pass
+        todo.append(path)
+
+    started = time.perf_counter()
+    counts = {"scored": 0, "failed": 0, "skipped": skipped, "stage_hits": 0, "stage_runs": 0}
+    with open(results_path, "a", encoding="utf-8") as f:
+        def write(rows):
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                counts["failed" if "error" in row else "scored"] += 1
+                for state in row.get("stages", {}).values():
+                    if state in ("hit", "run"):
+                        counts[f"stage_{state}s"] += 1
+                if on_row:
+                    on_row(row)
+            f.flush()
+
+        chunks = _chunks(todo, max(1, chunk_sessions))
+        if workers <= 1:
+            for chunk in chunks:
+                write(score_sessions(chunk, cache_dir, params))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(score_sessions, chunk, cache_dir, params))
+                    if len(pending) >= workers * 2:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+
+    counts["elapsed"] = time.perf_counter() - started
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="보관 중인 검사 세션 일괄 채점")
+    parser.add_argument("archive", help="세션 디렉터리들이 있는 보관소")
+    parser.add_argument("-o", "--output", required=True, help="결과 디렉터리 (results.jsonl)")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--chunk", type=int, default=BATCH_CHUNK_SESSIONS, help="작업자에게 한 번에 넘길 세션 수")
+    parser.add_argument("--restart", action="store_true", help="이전 결과를 지우고 처음부터")
+    parser.add_argument("--cache", default=DEFAULT_STAGE_CACHE_DIR, help="단계 캐시 디렉터리")
+    parser.add_argument("--param", action="append", default=[], metavar="STAGE.NAME=VALUE",
+                        help="단계 매개변수 덮어쓰기 (예: clean.lowpass_hz=3, 여러 번 지정 가능)")
+    args = parser.parse_args(argv)
+
+    params = {}
+    for item in args.param:
+        stage, name, value = parse_param(item)
+        params.setdefault(stage, {})[name] = value
+
+    def report(row):
+        if "error" in row:
+            print(f"{row['session']}\t실패\t{row['error']}")
+        else:
+            print(f"{row['session']}\t{row['score']:+.3f}\t{VERDICT_LABELS[row['verdict']]}\t{row['elapsed']:.2f}s")
+
+    counts = run_batch(
+        args.archive, args.output, args.workers, args.chunk,
+        resume=not args.restart, params=params, cache_dir=args.cache, on_row=report,
+    )
+    print(
+        f"채점 {counts['scored']}건 / 실패 {counts['failed']}건 / 건너뜀 {counts['skipped']}건 "
+        f"(단계 캐시 적중 {counts['stage_hits']} / 계산 {counts['stage_runs']}, {counts['elapsed']:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# ophtheon/pupil/cache.py
+# 채점 단계(pupil.pipeline)의 결과를 입력 / 매개변수 해시 기준으로 디스크에 보관하는 캐시.
+#
+#   <root>/<단계>/<키>/          단계 결과 디렉터리 (기록 / 구간 / 특징 / 요약)
+#   <root>/<단계>/<키>/.entry    항목 크기(바이트)
+#
+# 디렉터리 mtime을 마지막 사용 시각으로 쓰고, 만료 / 용량 초과분은 오래 안 쓴 항목부터 삭제 (LRU).
+# 뒤 단계는 앞 단계 결과(예: 변환 단계의 memmap)를 잠금 밖에서 읽으므로, 최근 grace_seconds 안에 쓴 항목과
+# 다른 프로세스가 키 잠금을 잡고 있는 항목은 지우지 않음 (용량을 잠시 넘을 수 있음).
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from exam.singleflight import file_lock
+
+DEFAULT_STAGE_CACHE_DIR = os.environ.get(
+    "OPHTHEON_STAGE_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "ophtheon_stage_cache"),
+)
+DEFAULT_STAGE_CACHE_MAX_BYTES = int(os.environ.get("OPHTHEON_STAGE_CACHE_MAX_BYTES", 8 * 1024 ** 3))
+DEFAULT_STAGE_CACHE_TTL = int(os.environ.get("OPHTHEON_STAGE_CACHE_TTL", 30 * 24 * 3600))
+DEFAULT_STAGE_CACHE_GRACE = int(os.environ.get("OPHTHEON_STAGE_CACHE_GRACE", 600))
+
+ENTRY_NAME = ".entry"
+
+
+def hash_json(value) -> str:
+    """
+    JSON으로 표현 가능한 값의 sha256 (키 순서 / 공백과 무관).
+    """
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=float)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+_content_hashes = {}
+_content_lock = threading.Lock()
+
+
+def content_hash(path: str, block: int = 1 << 20) -> str:
+    """
+    파일(또는 디렉터리 안 파일 전체) 내용의 sha256. (경로, 크기, 수정 시각)이 같으면 프로세스 안에서 재사용.
+    """
+    files = [path] if os.path.isfile(path) else sorted(
+        os.path.join(path, name) for name in os.listdir(path) if not name.startswith(".")
+    )
+    stamp = tuple((f, os.stat(f).st_size, os.stat(f).st_mtime_ns) for f in files)
+    with _content_lock:
+        cached = _content_hashes.get(stamp)
+    if cached:
+        return cached
+    h = hashlib.sha256()
+    for f in files:
+        h.update(os.path.basename(f).encode("utf-8") + b"\x00")
+        with open(f, "rb") as fp:
+            while chunk := fp.read(block):
+                h.update(chunk)
+    digest = h.hexdigest()
+    with _content_lock:
+        _content_hashes[stamp] = digest
+    return digest
+
+
+def _tree_bytes(path: str) -> int:
+    total = 0
+    for dirpath, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+class StageCache:
+    """
+    단계 이름 + 키 → 결과 디렉터리.
+
+        path = cache.get_or_build("clean", key, lambda out: preprocess_recording(rec, out))
+
+    build(out)은 임시 디렉터리 out에 결과를 쓰고, 끝나면 원자적으로 제자리로 옮김.
+    같은 디렉터리를 쓰는 다른 프로세스(일괄 채점 작업자)와는 키 단위 파일 잠금으로 한 번만 계산.
+    """
+
+    def __init__(self, root: str = DEFAULT_STAGE_CACHE_DIR, max_bytes: int = DEFAULT_STAGE_CACHE_MAX_BYTES,
+                 ttl_seconds: int = DEFAULT_STAGE_CACHE_TTL, grace_seconds: int = DEFAULT_STAGE_CACHE_GRACE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.grace_seconds = grace_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.lock_dir = os.path.join(self.root, ".locks")
+        os.makedirs(self.root, exist_ok=True)
+
+    def path_for(self, stage: str, key: str) -> str:
+        return os.path.join(self.root, stage, key)
+
+    def _lock_name(self, path: str) -> str:
+        return f"{os.path.basename(os.path.dirname(path))}-{os.path.basename(path)}"
+
+    def peek(self, stage: str, key: str) -> str | None:
+        path = self.path_for(stage, key)
+        if not os.path.isfile(os.path.join(path, ENTRY_NAME)):
+            return None
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            return None
+        return path
+
+    def get_or_build(self, stage: str, key: str, build) -> tuple[str, bool]:
+        """
+        (결과 디렉터리, 캐시 적중 여부).
+        """
+        path = self.peek(stage, key)
+        if path is None:
+            with file_lock(self.lock_dir, self._lock_name(self.path_for(stage, key))):
+                path = self.peek(stage, key)
+                if path is None:
+                    path = self._build(stage, key, build)
+                    with self._lock:
+                        self.misses += 1
+                    self.evict(keep=path)
+                    return path, False
+        with self._lock:
+            self.hits += 1
+        return path, True
+
+    def _build(self, stage: str, key: str, build) -> str:
+        path = self.path_for(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=os.path.dirname(path), prefix=f".{key[:12]}-", suffix=".part")
+        try:
+            build(tmp)
+            with open(os.path.join(tmp, ENTRY_NAME), "w", encoding="utf-8") as f:
+                json.dump({"bytes": _tree_bytes(tmp), "created": time.time()}, f)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            os.replace(tmp, path)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return path
+
+    def _entries(self):
+        entries = []
+        for stage in os.listdir(self.root):
+            stage_dir = os.path.join(self.root, stage)
+            if stage.startswith(".") or not os.path.isdir(stage_dir):
+                continue
+            for key in os.listdir(stage_dir):
+                path = os.path.join(stage_dir, key)
+                try:
+                    with open(os.path.join(path, ENTRY_NAME), encoding="utf-8") as f:
+                        size = json.load(f)["bytes"]
+                    mtime = os.path.getmtime(path)
+                except (OSError, ValueError, KeyError):
+                    continue
+                entries.append((mtime, size, path))
+        return entries
+
+    def evict(self, keep: str | None = None):
+        """
+        만료 항목 삭제 후, 용량 초과분을 LRU 순서로 삭제. keep(방금 만든 항목)은 남김.
+        지울 항목은 키 잠금을 (기다리지 않고) 잡은 뒤 사용 시각을 다시 보고 지움. 못 잡으면 건너뜀.
+        """
+        now = time.time()
+        with self._lock:
+            alive = []
+            for mtime, size, path in sorted(self._entries()):
+                if now - mtime > self.ttl_seconds and self._remove(path, keep):
+                    continue
+                alive.append((mtime, size, path))
+
+            total = sum(size for _, size, _ in alive)
+            for mtime, size, path in alive:
+                if total <= self.max_bytes:
+                    break
+                if self._remove(path, keep):
+                    total -= size
+
+    def _remove(self, path: str, keep: str | None) -> bool:
+        """
+        항목 하나 삭제. keep이거나, 최근 grace_seconds 안에 쓰였거나, 다른 쪽이 잠금을 잡고 있으면 False.
+        """
+        if path == keep:
+            return False
+        with file_lock(self.lock_dir, self._lock_name(path), blocking=False) as locked:
+            if not locked:
+                return False
+            try:
+                if time.time() - os.path.getmtime(path) < self.grace_seconds:
+                    return False
+            except OSError:
+                return True
+            shutil.rmtree(path, ignore_errors=True)
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._entries()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,196 @@
+# ophtheon/pupil/epochs.py
+# 정리된 동공 기록(pupil.preprocess) + 검사 이벤트 타임라인(exam.timeline) → 질문별 구간(epoch).
+#
+# 결과는 (세션 × 질문 × 샘플) 배열 하나. 세션마다 질문 11개의 구간을 인덱스 배열 한 번으로 잘라내고
+# 기준선 보정 / 유효 비율도 질문 축 전체에 한 번에 적용 (세션 수만큼만 반복).
+import json
+import os
+
+import numpy as np
+
+from pupil.recording import Recording
+
+# 질문 시점 기준 앞 / 뒤 구간(초)과 기준선 구간(질문 직전 BASELINE_S초)
+PRE_S = 1.0
+POST_S = 6.0
+BASELINE_S = 0.5
+ALIGN_EVENTS = ("onset", "offset", "response")
+BASELINE_MODES = ("subtract", "divide", None)
+
+
+class Epochs:
+    """
+    data[s, q, k]: s번째 세션, q번째 질문(검사 순서), 질문 시점 기준 times[k]초의 동공 크기.
+
+    types / positions 는 모든 세션에 공통, indices[s, q] 는 세션별 질문 번호(차트 회전 시 다름).
+    baseline[s, q] 는 보정에 쓴 기준선 값, valid[s, q] 는 질문 후 구간에서 유효 샘플 비율.
+    """
+
+    def __init__(self, data, times, rate, types, positions, indices, sessions, baseline, valid,
+                 meta: dict | None = None):
+        self.data = data
+        self.times = times
+        self.rate = rate
+        self.types = np.asarray(types)
+        self.positions = np.asarray(positions)
+        self.indices = np.asarray(indices)
+        self.sessions = list(sessions)
+        self.baseline = baseline
+        self.valid = valid
+        self.meta = meta or {}
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return self.data.shape
+
+    def of_type(self, question_type: str) -> np.ndarray:
+        """
+        해당 유형 질문만 모은 (세션 × 질문 × 샘플) 뷰.
+        """
+        return self.data[:, self.types == question_type]
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        for name in ("data", "times", "indices", "baseline", "valid"):
+            array = getattr(self, name)
+            if isinstance(array, np.memmap) and os.path.abspath(array.filename) == os.path.abspath(
+                os.path.join(path, f"{name}.npy")
+            ):
+                array.flush()
+                continue
+            np.save(os.path.join(path, f"{name}.npy"), np.asarray(getattr(self, name)))
+        with open(os.path.join(path, "epochs.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "rate": self.rate,
+                "types": self.types.tolist(),
+                "positions": self.positions.tolist(),
+                "sessions": self.sessions,
+                **self.meta,
+            }, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: str | None = "r") -> "Epochs":
+        with open(os.path.join(path, "epochs.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ("data", "times", "indices", "baseline", "valid")
+        }
+        return cls(
+            arrays["data"], arrays["times"], meta.pop("rate"), meta.pop("types"), meta.pop("positions"),
+            arrays["indices"], meta.pop("sessions"), arrays["baseline"], arrays["valid"], meta,
+        )
+
+
+def load_timeline(source) -> dict:
+    """
+    타임라인 dict 또는 .events.json 경로.
+    """
+    if isinstance(source, dict):
+        return source
+    with open(source, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def event_times(timeline: dict, align: str = "onset") -> np.ndarray:
+    """
+    질문별 기준 시점(초, 오디오 시작 기준).
+    """
+    if align not in ALIGN_EVENTS:
+        raise ValueError(f"알 수 없는 기준 시점입니다: {align}")
+    return np.array([e.get(f"{align}_ms", np.nan) for e in timeline["events"]], dtype=np.float64) / 1000
+
+
+def epoch_recording(pupil: np.ndarray, t_start: float, rate: float, onsets: np.ndarray,
+                    pre: float = PRE_S, post: float = POST_S) -> np.ndarray:
+    """
+    균일 간격 신호 pupil(첫 샘플 시각 t_start)에서 onsets(초) 주변 구간을 한 번에 잘라 (질문 × 샘플).
+    기록 밖으로 나가는 부분은 NaN. memmap이면 필요한 구간만 읽음.
+    """
+    offsets = np.arange(-int(round(pre * rate)), int(round(post * rate)))
+    starts = np.round((onsets - t_start) * rate).astype(np.int64)
+    idx = starts[:, None] + offsets[None, :]
+    inside = (idx >= 0) & (idx < len(pupil))
+    out = np.full(idx.shape, np.nan, dtype=np.float32)
+    out[inside] = pupil[idx[inside]]
+    return out
+
+
+def baseline_correct(data: np.ndarray, times: np.ndarray, baseline_s: float = BASELINE_S,
+                     mode: str | None = "subtract") -> tuple[np.ndarray, np.ndarray]:
+    """
+    마지막 축의 [-baseline_s, 0) 구간 평균으로 보정. (보정된 배열, 기준선 값) 반환. 앞 축 개수는 상관없음.
+    """
+    if mode not in BASELINE_MODES:
+        raise ValueError(f"알 수 없는 기준선 보정 방식입니다: {mode}")
+    window = (times >= -baseline_s) & (times < 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        finite = np.isfinite(data[..., window])
+        count = finite.sum(axis=-1)
+        base = np.where(count > 0, np.where(finite, data[..., window], 0).sum(axis=-1) / np.maximum(count, 1), np.nan)
+        base = base.astype(np.float32)
+        if mode == "subtract":
+            data = data - base[..., None]
+        elif mode == "divide":
+            data = data / base[..., None]
+    return data, base
+
+
+def epoch_sessions(sessions, pre: float = PRE_S, post: float = POST_S, baseline_s: float = BASELINE_S,
+                   baseline: str | None = "subtract", align: str = "onset", rate: float | None = None,
+                   out: str | None = None) -> Epochs:
+    """
+    sessions: (이름, 기록(경로 또는 Recording), 타임라인(dict 또는 경로), audio_onset) 튜플 목록.
+    audio_onset은 기록 시계 기준 검사 오디오 재생 시작 시각(초). None이면 기록의 첫 샘플 시각.
+
+    모든 세션은 같은 샘플링 주기(정리 단계의 재표본화 주기)와 같은 질문 유형 순서여야 함.
+    out을 주면 data를 그 디렉터리의 .npy memmap으로 만들어 RAM보다 많은 세션도 처리.
+    """
+    sessions = list(sessions)
+    if not sessions:
+        raise ValueError("세션이 없습니다.")
+    types = positions = times = data = None
+    indices = []
+    base = np.empty((len(sessions), 0), dtype=np.float32)
+    valid = base
+
+    for s, (name, rec, timeline, audio_onset) in enumerate(sessions):
+        rec = rec if isinstance(rec, Recording) else Recording(rec)
+        timeline = load_timeline(timeline)
+        if rate is None:
+            rate = rec.sample_rate
+        if not rec.sample_rate or abs(rec.sample_rate - rate) > 1e-6:
+            raise ValueError(f"{name}: 샘플링 주기가 다릅니다 ({rec.sample_rate} != {rate}). 같은 주기로 정리해 주세요.")
+
+        events = timeline["events"]
+        session_types = [e["type"] for e in events]
+        if types is None:
+            types = session_types
+            positions = [e["position"] for e in events]
+            times = np.arange(-int(round(pre * rate)), int(round(post * rate))) / rate
+            shape = (len(sessions), len(types), len(times))
+            if out is not None:
+                os.makedirs(out, exist_ok=True)
+                data = np.lib.format.open_memmap(os.path.join(out, "data.npy"), "w+", np.float32, shape)
+            else:
+                data = np.empty(shape, dtype=np.float32)
+            base = np.empty(shape[:2], dtype=np.float32)
+            valid = np.empty(shape[:2], dtype=np.float32)
+        elif session_types != types:
+            raise ValueError(f"{name}: 질문 유형 순서가 다른 세션입니다.")
+        indices.append([e["index"] for e in events])
+
+        ts = rec["timestamp"]
+        t_start = float(ts[0])
+        onset = t_start if audio_onset is None else float(audio_onset)
+        epochs = epoch_recording(rec["pupil"], t_start, rate, onset + event_times(timeline, align), pre, post)
+        valid[s] = np.isfinite(epochs[:, times >= 0]).mean(axis=-1)
+        data[s], base[s] = baseline_correct(epochs, times, baseline_s, baseline)
+
+    epochs = Epochs(
+        data, times, rate, types, positions, np.array(indices), [name for name, *_ in sessions], base, valid,
+        {"pre": pre, "post": post, "baseline_s": baseline_s, "baseline": baseline, "align": align},
+    )
+    if out is not None:
+        epochs.save(out)
+    return epochs
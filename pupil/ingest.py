@@ -0,0 +1,291 @@
+# ophtheon/pupil/ingest.py
+# 시선 추적기 CSV/TSV 내보내기 → 열 단위 .npy 기록(pupil.recording) 변환.
+#
+#   python -m pupil.ingest export.tsv -o session01.pupil
+#
+# 원본 텍스트는 CHUNK_BYTES 단위로만 읽고 바로 숫자 배열로 바꿔 디스크에 씀.
+# 따라서 메모리 사용량은 파일 크기와 무관하고, 파싱은 np.loadtxt(C 구현)가 맡음.
+# workers > 1 이면 청크 파싱을 프로세스 풀에 나눠 맡기고 (동시에 workers * 2 청크까지), 쓰기는 순서대로.
+import argparse
+import csv
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from pupil.recording import COLUMN_DTYPES, RecordingWriter
+
+CHUNK_BYTES = int(os.environ.get("OPHTHEON_PUPIL_INGEST_CHUNK_BYTES", 8 * 1024 * 1024))
+INGEST_WORKERS = int(os.environ.get("OPHTHEON_PUPIL_INGEST_WORKERS", 1))
+
+# 표준 열 이름 → 장비별 헤더 이름 (소문자 영숫자만 남겨 비교)
+COLUMN_ALIASES = {
+    "timestamp": [
+        "timestamp", "time", "t", "recordingtimestamp", "devicetimestamp", "systemtimestamp",
+        "pupiltimestamp", "eyetrackertimestamp", "timestampms", "timestampus",
+    ],
+    "left_diameter": [
+        "leftdiameter", "pupildiameterleft", "leftpupildiameter", "diameterleft", "pupilleft",
+        "leftpupildiametermm", "pupildiameterleftmm",
+    ],
+    "right_diameter": [
+        "rightdiameter", "pupildiameterright", "rightpupildiameter", "diameterright", "pupilright",
+        "rightpupildiametermm", "pupildiameterrightmm",
+    ],
+    "gaze_x": ["gazex", "gazepointx", "gazepointxmcspx", "normposx", "x"],
+    "gaze_y": ["gazey", "gazepointy", "gazepointymcspx", "normposy", "y"],
+    "left_validity": ["leftvalidity", "validityleft", "leftpupilvalidity", "leftconfidence"],
+    "right_validity": ["rightvalidity", "validityright", "rightpupilvalidity", "rightconfidence"],
+}
+
+# 유효성 열 해석 방식 (전처리 단계에서 meta["validity"]를 보고 판단)
+VALIDITY_CONVENTIONS = ("binary", "tobii", "confidence")
+
+TIMESTAMP_UNITS = {"s": 1.0, "ms": 1e-3, "us": 1e-6, "ns": 1e-9}
+# 타임스탬프 단위를 추정하기 전에 모으는 최소 행 수 (청크가 작아도 첫 청크 한두 줄로 정하지 않게)
+SCALE_MIN_ROWS = 100
+
+
+class IngestError(ValueError):
+    pass
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[^0-9a-z]", "", name.lower())
+
+
+def map_columns(header: list[str], overrides: dict | None = None) -> dict[str, int]:
+    """
+    헤더에서 표준 열 이름 → 열 번호. overrides({"timestamp": "MyTime"})가 별칭보다 우선.
+    """
+    normalized = [_normalize(h) for h in header]
+    mapping = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        wanted = [_normalize(overrides[column])] if overrides and column in overrides else aliases
+        for alias in wanted:
+            if alias in normalized:
+                mapping[column] = normalized.index(alias)
+                break
+    if "timestamp" not in mapping:
+        raise IngestError("타임스탬프 열을 찾을 수 없습니다.")
+    if "left_diameter" not in mapping and "right_diameter" not in mapping:
+        raise IngestError("동공 크기 열을 찾을 수 없습니다.")
+    return mapping
+
+
+def sniff_delimiter(header_line: str) -> str:
+    counts = {d: header_line.count(d) for d in ("\t", ",", ";")}
+    return max(counts, key=counts.get)
+
+
+def _fill_empty(data: bytes, delimiter: bytes) -> bytes:
+    """
+    빈 칸(장비가 무효 샘플을 비워 둔 경우)을 nan으로. 바이트 치환이라 청크 전체에 C 속도로 적용.
+    """
+    d = delimiter
+    data = b"\n" + data.replace(b"\r", b"") + b"\n"
+    if d + d in data:
+        data = data.replace(d + d, d + b"nan" + d).replace(d + d, d + b"nan" + d)
+    if b"\n" + d in data:
+        data = data.replace(b"\n" + d, b"\nnan" + d)
+    if d + b"\n" in data:
+        data = data.replace(d + b"\n", d + b"nan\n")
+    return data
+
+
+def parse_chunk(data: bytes, delimiter: str, usecols: list[int], decimal: str = ".") -> np.ndarray:
+    """
+    줄 경계로 자른 바이트 청크 → (행, len(usecols)) float64 배열.
+    숫자 열만 쓰므로 latin-1로 풀어도 값이 바뀌지 않음 (UTF-8 검사 비용 없음).
+    """
+    if decimal != "." and delimiter != decimal:
+        data = data.replace(decimal.encode("ascii"), b".")
+    data = _fill_empty(data, delimiter.encode("ascii"))
+    return np.loadtxt(
+        data.decode("latin-1").split("\n"), delimiter=delimiter, usecols=usecols,
+        dtype=np.float64, ndmin=2, comments="#",
+    )
+
+
+def _infer_timestamp_scale(ts: np.ndarray) -> float:
+    """
+    연속 샘플 간격의 중앙값으로 단위 추정 (초 / ms / us / ns).
+    """
+    dt = np.diff(ts[np.isfinite(ts)])
+    dt = dt[dt > 0]
+    if dt.size == 0:
+        return 1.0
+    # 간격이 0.5 단위 미만이면 그 단위 (2 Hz 이상 기록 가정)
+    step = float(np.median(dt))
+    for unit in ("s", "ms", "us"):
+        if step * TIMESTAMP_UNITS[unit] < 0.5:
+            return TIMESTAMP_UNITS[unit]
+    return TIMESTAMP_UNITS["ns"]
+
+
+def iter_byte_chunks(f, chunk_bytes: int = CHUNK_BYTES):
+    """
+    바이너리 파일에서 줄 경계로 자른 (시작 오프셋, 바이트 청크)를 생성. 한 번에 chunk_bytes 남짓만 메모리에 둠.
+    """
+    offset = f.tell()
+    leftover = b""
+    while True:
+        block = f.read(chunk_bytes)
+        if not block:
+            break
+        block = leftover + block
+        cut = block.rfind(b"\n")
+        if cut < 0:
+            leftover = block
+            continue
+        leftover = block[cut + 1:]
+        yield offset, block[:cut + 1]
+        offset += cut + 1
+    if leftover.strip():
+        yield offset, leftover
+
+
+def _parse_chunks(chunks, parse, workers: int):
+    """
+    (오프셋, 배열)을 입력 순서대로 생성. workers > 1 이면 프로세스 풀에서 미리 파싱.
+    """
+    if workers <= 1:
+        for offset, data in chunks:
+            yield offset, _parse_or_raise(parse, offset, data)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for offset, data in chunks:
+            pending.append((offset, pool.submit(_parse_or_raise, parse, offset, data)))
+            if len(pending) >= workers * 2:
+                offset, future = pending.popleft()
+                yield offset, future.result()
+        while pending:
+            offset, future = pending.popleft()
+            yield offset, future.result()
+
+
+def _parse_or_raise(parse, offset: int, data: bytes) -> np.ndarray:
+    try:
+        return parse(data)
+    except ValueError as e:
+        raise IngestError(f"{offset}바이트 부근을 숫자로 읽을 수 없습니다: {e}") from e
+
+
+def ingest(src: str, dst: str, columns: dict | None = None, delimiter: str | None = None,
+           decimal: str = ".", timestamp_unit: str = "auto", validity: str = "binary",
+           skip_rows: int = 0, chunk_bytes: int = CHUNK_BYTES, workers: int = INGEST_WORKERS) -> dict:
+    """
+    src(CSV/TSV)를 dst 기록 디렉터리로 변환하고 meta 반환.
+
+    - columns: 헤더 이름 직접 지정 ({"left_diameter": "PupilLeft"})
+    - timestamp_unit: "s" / "ms" / "us" / "ns" / "auto"(간격으로 추정). 저장은 항상 초 단위
+    - validity: 유효성 열 해석 방식 (VALIDITY_CONVENTIONS), meta에 기록만 함
+    - workers: 청크 파싱 프로세스 수 (1이면 현재 프로세스에서)
+    """
+    if timestamp_unit != "auto" and timestamp_unit not in TIMESTAMP_UNITS:
+        raise IngestError(f"알 수 없는 타임스탬프 단위입니다: {timestamp_unit}")
+    if validity not in VALIDITY_CONVENTIONS:
+        raise IngestError(f"알 수 없는 유효성 해석 방식입니다: {validity}")
+
+    started = time.perf_counter()
+    with open(src, "rb") as f:
+        for _ in range(skip_rows):
+            f.readline()
+        header_line = f.readline().decode("utf-8-sig", errors="replace").rstrip("\r\n")
+        if not header_line:
+            raise IngestError("헤더 줄이 없습니다.")
+        delimiter = delimiter or sniff_delimiter(header_line)
+        header = next(csv.reader([header_line], delimiter=delimiter))
+        mapping = map_columns(header, columns)
+        names = list(mapping)
+        usecols = [mapping[c] for c in names]
+
+        scale = None if timestamp_unit == "auto" else TIMESTAMP_UNITS[timestamp_unit]
+        ts_col = names.index("timestamp")
+        first_ts = None
+        last_ts = None
+        steps = []
+        parse = partial(parse_chunk, delimiter=delimiter, usecols=usecols, decimal=decimal)
+        with RecordingWriter(dst, names, {c: COLUMN_DTYPES[c] for c in names}) as writer:
+            def write(values):
+                nonlocal first_ts, last_ts
+                ts = values[:, ts_col] * scale
+                if first_ts is None:
+                    first_ts = float(ts[0])
+                # 청크 경계의 간격도 포함 (청크 크기와 무관하게 같은 표본 간격)
+                edges = ts if last_ts is None else np.concatenate([[last_ts], ts])
+                if edges.size > 1:
+                    steps.append(float(np.median(np.diff(edges))))
+                last_ts = float(ts[-1])
+                chunk = {c: values[:, i] for i, c in enumerate(names)}
+                chunk["timestamp"] = ts
+                writer.append(chunk)
+
+            pending = []
+            for _, values in _parse_chunks(iter_byte_chunks(f, chunk_bytes), parse, workers):
+                if values.shape[0] == 0:
+                    continue
+                if scale is None:
+                    pending.append(values)
+                    if sum(len(v) for v in pending) < SCALE_MIN_ROWS:
+                        continue
+                    values = np.concatenate(pending)
+                    pending = []
+                    scale = _infer_timestamp_scale(values[:, ts_col])
+                write(values)
+            if pending:
+                # 파일 전체가 SCALE_MIN_ROWS 행보다 짧음
+                values = np.concatenate(pending)
+                scale = _infer_timestamp_scale(values[:, ts_col])
+                write(values)
+
+            step = float(np.median(steps)) if steps else 0.0
+            writer.meta.update({
+                "source": os.path.basename(src),
+                "source_bytes": os.path.getsize(src),
+                "source_columns": {c: header[mapping[c]] for c in names},
+                "timestamp_scale": scale or 1.0,
+                "t0": first_ts,
+                "sample_rate": round(1.0 / step, 3) if step > 0 else None,
+                "validity": validity,
+            })
+            meta = dict(writer.meta, n_samples=writer.n_samples)
+
+    meta["elapsed"] = time.perf_counter() - started
+    return meta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="시선 추적기 CSV/TSV → 동공 기록(.npy 열) 변환")
+    parser.add_argument("src")
+    parser.add_argument("-o", "--output", default=None, help="기록 디렉터리 (기본: <src>.pupil)")
+    parser.add_argument("--delimiter", default=None)
+    parser.add_argument("--decimal", default=".")
+    parser.add_argument("--timestamp-unit", default="auto", choices=["auto", *TIMESTAMP_UNITS])
+    parser.add_argument("--validity", default="binary", choices=VALIDITY_CONVENTIONS)
+    parser.add_argument("--skip-rows", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    parser.add_argument("--column", action="append", default=[], metavar="NAME=HEADER",
+                        help="표준 열 이름과 헤더 이름 직접 연결 (여러 번 지정 가능)")
+    args = parser.parse_args(argv)
+
+    overrides = dict(item.split("=", 1) for item in args.column)
+    dst = args.output or os.path.splitext(args.src)[0] + ".pupil"
+    meta = ingest(
+        args.src, dst, overrides, args.delimiter, args.decimal, args.timestamp_unit,
+        args.validity, args.skip_rows, workers=args.workers,
+    )
+    mb = meta["source_bytes"] / 1e6
+    print(
+        f"{dst}: {meta['n_samples']}샘플, {meta['sample_rate']} Hz, "
+        f"{mb:.1f} MB / {meta['elapsed']:.2f}s ({mb / max(meta['elapsed'], 1e-9):.0f} MB/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
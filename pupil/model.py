@@ -0,0 +1,322 @@
+# ophtheon/pupil/model.py
+# 검사 요약 지표(pupil.norms.METRICS)로 DI / NDI를 가르는 분류 모델. L2 로지스틱 회귀, NumPy만 사용.
+#
+#   python -m pupil.model train archive/ -o models/pupil-lr --workers 4    # 보관 세션 채점 → 교차 검증 → 저장
+#   python -m pupil.model train rescore/results.jsonl -o models/pupil-lr   # 이미 일괄 채점한 결과로
+#   python -m pupil.model info models/pupil-lr
+#
+# 학습 라벨은 세션 session.json의 "ground_truth" ("DI" / "NDI", 사건 종결 후 확인된 결과). 라벨 없는 세션은 뺌.
+# 교차 검증은 (L2 강도 × fold) 조합을 프로세스 풀에 나눠 돌리고, 로그 손실이 가장 낮은 강도로 전체 데이터를 다시 학습.
+#
+# 모델 디렉터리 (Recording / Epochs처럼 JSON + .npy):
+#   model.json    형식 버전, 특징 이름, 교차 검증 결과, 모델 버전(가중치 해시)
+#   weights.npy   (3, 특징 수 + 1): 표준화 평균 / 척도 / 계수 (마지막 열은 절편). memmap으로 읽음.
+import argparse
+import datetime
+import hashlib
+import json
+import math
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pupil.norms import METRICS, record_values
+
+MODEL_FORMAT = 1
+MODEL_FEATURES = tuple(METRICS)
+MODEL_PATH = os.environ.get("OPHTHEON_MODEL_PATH", "")
+MODEL_WORKERS = int(os.environ.get("OPHTHEON_MODEL_WORKERS", os.cpu_count() or 1))
+MODEL_FOLDS = 5
+# 교차 검증으로 고를 L2 강도 후보 (표준화한 특징 기준)
+MODEL_L2 = (0.01, 0.1, 1.0, 10.0)
+# 라벨 → 목표값. 모델 출력은 DI일 확률.
+LABELS = {"DI": 1, "NDI": 0}
+
+META_NAME = "model.json"
+WEIGHTS_NAME = "weights.npy"
+
+
+class ModelError(ValueError):
+    pass
+
+
+def feature_matrix(summaries) -> np.ndarray:
+    """
+    채점 요약(또는 일괄 채점 결과 줄) 목록 → (검사, 특징) 배열. 없는 값은 NaN.
+    """
+    rows = []
+    for summary in summaries:
+        values = record_values(summary)
+        rows.append([values.get(name, np.nan) for name in MODEL_FEATURES])
+    return np.array(rows, dtype=np.float64).reshape(len(rows), len(MODEL_FEATURES))
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+
+def _standardize(X: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    학습 데이터의 특징별 평균 / 척도. 값이 전부 없거나 일정하면 척도 1.
+    """
+    finite = np.isfinite(X)
+    n = np.maximum(finite.sum(axis=0), 1)
+    mean = np.where(finite, X, 0).sum(axis=0) / n
+    var = (np.where(finite, X - mean, 0) ** 2).sum(axis=0) / n
+    scale = np.where(var > 1e-12, np.sqrt(var), 1.0)
+    return mean, scale
+
+
+def _design(X: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    표준화 + 결측은 평균(0)으로 + 절편 열.
+    """
+    Z = np.where(np.isfinite(X), (X - mean) / scale, 0.0)
+    return np.hstack([Z, np.ones((len(Z), 1))])
+
+
+def fit_logistic(X: np.ndarray, y: np.ndarray, l2: float, iterations: int = 50,
+                 tol: float = 1e-8) -> np.ndarray:
+    """
+    뉴턴법(IRLS)으로 L2 로지스틱 회귀. 반환: (3, 특징 수 + 1) 가중치 (평균 / 척도 / 계수+절편).
+    절편에는 벌점을 주지 않음.
+    """
+    mean, scale = _standardize(X)
+    A = _design(X, mean, scale)
+    penalty = np.full(A.shape[1], float(l2))
+    penalty[-1] = 0.0
+    w = np.zeros(A.shape[1])
+    for _ in range(iterations):
+        p = _sigmoid(A @ w)
+        grad = A.T @ (p - y) + penalty * w
+        hess = (A * (p * (1 - p))[:, None]).T @ A + np.diag(penalty + 1e-9)
+        step = np.linalg.solve(hess, grad)
+        w -= step
+        if np.abs(step).max() < tol:
+            break
+    return np.vstack([np.append(mean, 0.0), np.append(scale, 1.0), w])
+
+
+def predict_proba(weights: np.ndarray, X: np.ndarray) -> np.ndarray:
+    mean, scale, w = weights[0, :-1], weights[1, :-1], weights[2]
+    return _sigmoid(_design(X, mean, scale) @ w)
+
+
+def roc_auc(y: np.ndarray, p: np.ndarray) -> float:
+    """
+    순위 기반 AUC (동점은 평균 순위). 한 쪽 라벨만 있으면 NaN.
+    """
+    n_pos = int(y.sum())
+    n_neg = len(y) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return float("nan")
+    order = np.argsort(p, kind="stable")
+    ranks = np.empty(len(p))
+    ranks[order] = np.arange(1, len(p) + 1)
+    for value in np.unique(p):
+        tied = p == value
+        if tied.sum() > 1:
+            ranks[tied] = ranks[tied].mean()
+    return float((ranks[y == 1].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg))
+
+
+def stratified_folds(y: np.ndarray, k: int = MODEL_FOLDS, seed: int = 0) -> list[np.ndarray]:
+    """
+    라벨 비율을 유지한 k개 검증 fold (검사 번호 배열).
+    """
+    rng = np.random.default_rng(seed)
+    folds = [[] for _ in range(k)]
+    for label in (0, 1):
+        idx = rng.permutation(np.flatnonzero(y == label))
+        for j, part in enumerate(np.array_split(idx, k)):
+            folds[j].extend(part.tolist())
+    return [np.sort(np.array(f, dtype=np.intp)) for f in folds if f]
+
+
+def _fit_fold(X: np.ndarray, y: np.ndarray, test: np.ndarray, l2: float) -> np.ndarray:
+    train = np.setdiff1d(np.arange(len(y)), test)
+    return predict_proba(fit_logistic(X[train], y[train], l2), X[test])
+
+
+def cross_validate(X: np.ndarray, y: np.ndarray, l2_grid=MODEL_L2, k: int = MODEL_FOLDS, seed: int = 0,
+                   workers: int = MODEL_WORKERS) -> list[dict]:
+    """
+    L2 강도마다 k-fold 검증 예측(out-of-fold)으로 AUC / 정확도 / 로그 손실.
+    """
+    folds = stratified_folds(y, k, seed)
+    tasks = [(X, y, test, l2) for l2 in l2_grid for test in folds]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            predictions = list(pool.map(_fit_fold, *zip(*tasks)))
+    else:
+        predictions = [_fit_fold(*task) for task in tasks]
+
+    results = []
+    for i, l2 in enumerate(l2_grid):
+        p = np.empty(len(y))
+        for test, pred in zip(folds, predictions[i * len(folds):(i + 1) * len(folds)]):
+            p[test] = pred
+        clipped = np.clip(p, 1e-12, 1 - 1e-12)
+        results.append({
+            "l2": float(l2),
+            "auc": roc_auc(y, p),
+            "accuracy": float(np.mean((p >= 0.5) == (y == 1))),
+            "log_loss": float(-np.mean(y * np.log(clipped) + (1 - y) * np.log(1 - clipped))),
+        })
+    return results
+
+
+class PupilModel:
+    """
+    학습한 분류 모델.
+
+        model = PupilModel.load("models/pupil-lr")
+        model.predict(summary)      # DI일 확률 (검사 하나, 파이썬 산술만 — 수 µs)
+        model.predict_many(X)       # (검사, 특징) 배열
+    """
+
+    def __init__(self, weights: np.ndarray, meta: dict):
+        if weights.shape != (3, len(meta["features"]) + 1):
+            raise ModelError(f"가중치 크기 {weights.shape}가 특징 수({len(meta['features'])})와 맞지 않습니다.")
+        self.weights = weights
+        self.meta = meta
+        self.features = tuple(meta["features"])
+        # 검사 하나의 추론은 NumPy 호출 비용이 더 크므로 파이썬 실수로 풀어 둠
+        self._terms = [
+            (name, float(weights[0, j]), float(weights[1, j]), float(weights[2, j]))
+            for j, name in enumerate(self.features)
+        ]
+        self._intercept = float(weights[2, -1])
+
+    @property
+    def version(self) -> str:
+        return self.meta["version"]
+
+    def predict_values(self, values: dict[str, float]) -> float:
+        """
+        지표 이름 → 값 (pupil.norms.record_values 형식). 없는 지표는 학습 평균으로 봄.
+        """
+        z = self._intercept
+        for name, mean, scale, coef in self._terms:
+            value = values.get(name)
+            if value is not None and value == value:
+                z += (value - mean) / scale * coef
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
+
+    def predict(self, summary: dict) -> float:
+        return self.predict_values(record_values(summary))
+
+    def predict_many(self, X: np.ndarray) -> np.ndarray:
+        return predict_proba(self.weights, X)
+
+    def save(self, path: str):
+        """
+        임시 디렉터리에 쓴 뒤 교체.
+        """
+        tmp = f"{path}.part"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        np.save(os.path.join(tmp, WEIGHTS_NAME), np.ascontiguousarray(self.weights, dtype=np.float64))
+        with open(os.path.join(tmp, META_NAME), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "PupilModel":
+        try:
+            with open(os.path.join(path, META_NAME), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ModelError(f"모델을 읽을 수 없습니다: {path} ({e})") from e
+        if meta.get("format") != MODEL_FORMAT:
+            raise ModelError(f"모델 형식 버전이 다릅니다: {meta.get('format')} (지원: {MODEL_FORMAT})")
+        return cls(np.load(os.path.join(path, WEIGHTS_NAME), mmap_mode="r"), meta)
+
+
+def load_model(path: str = MODEL_PATH) -> PupilModel | None:
+    if not path or not os.path.isdir(path):
+        return None
+    return PupilModel.load(path)
+
+
+def train(rows: list[dict], l2_grid=MODEL_L2, k: int = MODEL_FOLDS, seed: int = 0,
+          workers: int = MODEL_WORKERS) -> PupilModel:
+    """
+    일괄 채점 결과 줄(ground_truth가 있는 것)로 교차 검증 후 전체 학습.
+    """
+    labelled = [row for row in rows if row.get("ground_truth") in LABELS and "error" not in row]
+    y = np.array([LABELS[row["ground_truth"]] for row in labelled], dtype=np.float64)
+    if len(y) < 2 * k or y.sum() < k or (1 - y).sum() < k:
+        raise ModelError(f"라벨이 있는 검사가 부족합니다 (DI {int(y.sum())}건 / NDI {int((1 - y).sum())}건, 각 {k}건 이상 필요).")
+    X = feature_matrix(labelled)
+    cv = cross_validate(X, y, l2_grid, k, seed, workers)
+    best = min(cv, key=lambda r: r["log_loss"])
+    weights = fit_logistic(X, y, best["l2"])
+    meta = {
+        "format": MODEL_FORMAT,
+        "kind": "logistic",
+        "version": hashlib.sha256(weights.tobytes()).hexdigest()[:12],
+        "trained_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "features": list(MODEL_FEATURES),
+        "labels": {str(v): k for k, v in LABELS.items()},
+        "l2": best["l2"],
+        "n_train": len(y),
+        "n_di": int(y.sum()),
+        "folds": k,
+        "cv": cv,
+    }
+    return PupilModel(weights, meta)
+
+
+def load_rows(sources: list[str], results_dir: str, workers: int = MODEL_WORKERS) -> list[dict]:
+    """
+    results.jsonl은 그대로 읽고, 보관소 디렉터리는 pupil.batch로 채점(이어서 하기)한 뒤 읽음.
+    """
+    from pupil.batch import RESULTS_NAME, load_results, run_batch
+
+    rows = []
+    for k, src in enumerate(sources):
+        if os.path.isdir(src):
+            out = os.path.join(results_dir, f"{k:02d}-{os.path.basename(os.path.normpath(src))}")
+            run_batch(src, out, workers=workers)
+            src = os.path.join(out, RESULTS_NAME)
+        rows.extend(load_results(src).values())
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="동공 검사 분류 모델")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fit = sub.add_parser("train", help="보관소 / 일괄 채점 결과로 학습")
+    fit.add_argument("sources", nargs="+", help="보관소 디렉터리 또는 results.jsonl")
+    fit.add_argument("-o", "--output", required=True, help="모델 디렉터리")
+    fit.add_argument("--results", default=None, help="보관소 채점 결과 디렉터리 (기본: <모델>.results)")
+    fit.add_argument("--folds", type=int, default=MODEL_FOLDS)
+    fit.add_argument("--seed", type=int, default=0)
+    fit.add_argument("--workers", type=int, default=MODEL_WORKERS)
+    info = sub.add_parser("info", help="모델 정보")
+    info.add_argument("model")
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        rows = load_rows(args.sources, args.results or f"{os.path.normpath(args.output)}.results", args.workers)
+        model = train(rows, k=args.folds, seed=args.seed, workers=args.workers)
+        model.save(args.output)
+    else:
+        model = PupilModel.load(args.model)
+    meta = model.meta
+    print(f"{meta['kind']} {meta['version']} ({meta['trained_at']}), 학습 {meta['n_train']}건 (DI {meta['n_di']}건)")
+    for r in meta["cv"]:
+        mark = "*" if r["l2"] == meta["l2"] else " "
+        print(f"{mark} l2={r['l2']:g}\tAUC {r['auc']:.3f}\t정확도 {r['accuracy']:.1%}\t로그 손실 {r['log_loss']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+# ophtheon/pupil/norms.py
+# 과거 검사 결과의 규준(norm) 색인: 사건 유형 × 지표(질문 유형별 반응 / R 대 C 비교) × 공변량 구간마다
+# 분위수 스케치 하나. 이번 검사 값이 같은 집단의 과거 검사 중 몇 번째 백분위인지 바로 조회.
+#
+#   python -m pupil.norms build rescore/results.jsonl -o norms.npz            # 일괄 채점 결과로 만들기
+#   python -m pupil.norms build more/results.jsonl -o norms.npz --update      # 기존 색인에 덧붙이기
+#   python -m pupil.norms merge node1.npz node2.npz -o norms.npz              # 다른 노드의 조각 합치기
+#   python -m pupil.norms query norms.npz score -0.35 --group 재산범죄
+#
+# 스케치는 지표마다 고정 범위를 NORM_BINS 칸으로 나눈 개수 히스토그램. 값의 범위가 정해져 있으므로
+# (R 대 C 비교는 [-1, 1]) 칸 폭만큼의 오차로 분위수를 주고, 칸별 개수를 더하기만 하면 정확히 합쳐짐.
+# 조회는 누적 개수 배열에서 칸 하나를 읽는 O(1) 연산.
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from pupil.batch import load_results
+from pupil.epochs import POST_S
+from pupil.scoring import FEATURES
+
+NORM_BINS = int(os.environ.get("OPHTHEON_NORM_BINS", 1024))
+NORMS_PATH = os.environ.get("OPHTHEON_NORMS_PATH", "")
+# 백분위를 보여 주려면 비교 집단에 최소 이만큼의 과거 검사가 있어야 함
+NORM_MIN_COUNT = int(os.environ.get("OPHTHEON_NORM_MIN_COUNT", 30))
+
+# 지표 → (하한, 상한). 범위 밖 값은 양 끝 칸에 셈.
+METRICS = {
+    "score": (-1.0, 1.0),
+    **{f"diff_{name}": (-1.0, 1.0) for name in FEATURES},
+    **{f"{t}_peak": (-2.0, 2.0) for t in ("C", "R")},
+    **{f"{t}_latency": (0.0, POST_S) for t in ("C", "R")},
+    **{f"{t}_auc": (-10.0, 10.0) for t in ("C", "R")},
+}
+METRIC_LABELS = {"score": "검사 점수", "diff_peak": "R 대 C 최대 확장", "diff_latency": "R 대 C 지연 시간",
+                 "diff_auc": "R 대 C 반응 면적"}
+
+# 공변량 → 구간 시작값 (case_info 키와 같은 이름). 마지막 구간은 위로 열려 있음.
+COVARIATES = {
+    "age": (18, 30, 40, 50, 60),
+    "sleep_hours": (0, 5, 7, 9),
+}
+ALL = "전체"
+
+
+def bucket(covariate: str, value) -> str | None:
+    """
+    공변량 값 → 구간 이름 ("30-39", "60+"). 값이 없으면 None.
+    """
+    if value is None:
+        return None
+    starts = COVARIATES[covariate]
+    k = int(np.searchsorted(starts, float(value), side="right")) - 1
+    if k < 0:
+        return f"<{starts[0]}"
+    if k == len(starts) - 1:
+        return f"{starts[k]}+"
+    return f"{starts[k]}-{starts[k + 1] - 1}"
+
+
+def groups(case_info: dict | None) -> list[str]:
+    """
+    전체 → 사건 분류 → 분류/세부유형 (넓은 집단부터).
+    """
+    info = case_info or {}
+    out = [ALL]
+    if info.get("offense_category"):
+        out.append(info["offense_category"])
+        if info.get("offense_type"):
+            out.append(f"{info['offense_category']}/{info['offense_type']}")
+    return out
+
+
+def strata(case_info: dict | None) -> list[tuple[str, str]]:
+    """
+    (공변량, 구간) 목록. 공변량을 가리지 않는 ("all", "all")이 항상 처음.
+    """
+    info = case_info or {}
+    out = [("all", "all")]
+    for covariate in COVARIATES:
+        b = bucket(covariate, info.get(covariate))
+        if b is not None:
+            out.append((covariate, b))
+    return out
+
+
+def record_values(summary: dict) -> dict[str, float]:
+    """
+    채점 요약(pupil.pipeline.run_pipeline) → 지표별 값. 값이 없는 지표는 뺌.
+    """
+    values = {"score": summary.get("score")}
+    for name in FEATURES:
+        diff = np.asarray(summary.get("diffs", {}).get(name, []), dtype=np.float64)
+        diff = diff[np.isfinite(diff)]
+        values[f"diff_{name}"] = float(diff.mean()) if diff.size else None
+    for t, features in (summary.get("responses") or {}).items():
+        for name, value in features.items():
+            values[f"{t}_{name}"] = value
+    return {
+        metric: float(value) for metric, value in values.items()
+        if metric in METRICS and value is not None and np.isfinite(value)
+    }
+
+
+def _key(group: str, metric: str, covariate: str, bucket_name: str) -> str:
+    return f"{group}|{metric}|{covariate}={bucket_name}"
+
+
+class NormsIndex:
+    """
+    스케치 하나 = counts의 한 행. rows: 키("집단|지표|공변량=구간") → 행 번호.
+
+        index.add(case_info, summary)                       # 검사 한 건 반영 (관련 스케치 모두)
+        index.percentile("score", -0.35, group="재산범죄")    # (백분위 0-100, 비교 검사 수)
+        index.merge(other)                                  # 같은 설정의 다른 색인 합치기
+    """
+
+    def __init__(self, bins: int = NORM_BINS, metrics: dict | None = None):
+        self.bins = bins
+        self.metrics = {m: tuple(map(float, r)) for m, r in (metrics or METRICS).items()}
+        self.rows: dict[str, int] = {}
+        self._counts = np.zeros((64, bins), dtype=np.uint32)
+        self._cum = None
+        self.n_records = 0
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self._counts[:len(self.rows)]
+
+    @property
+    def spec(self) -> dict:
+        return {"bins": self.bins, "metrics": {m: list(r) for m, r in self.metrics.items()}}
+
+    def _row(self, key: str) -> int:
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = len(self.rows)
+            if row >= len(self._counts):
+                grown = np.zeros((len(self._counts) * 2, self.bins), dtype=np.uint32)
+                grown[:row] = self._counts[:row]
+                self._counts = grown
+        return row
+
+    def bin_of(self, metric: str, value: float) -> int:
+        lo, hi = self.metrics[metric]
+        b = int((value - lo) / (hi - lo) * self.bins)
+        return min(max(b, 0), self.bins - 1)
+
+    def add(self, case_info: dict | None, summary: dict) -> int:
+        """
+        검사 한 건을 (집단 × 공변량 구간 × 지표) 스케치에 모두 반영. 반영한 스케치 수 반환.
+        """
+        values = record_values(summary)
+        updated = 0
+        for group in groups(case_info):
+            for covariate, bucket_name in strata(case_info):
+                for metric, value in values.items():
+                    row = self._row(_key(group, metric, covariate, bucket_name))
+                    self._counts[row, self.bin_of(metric, value)] += 1
+                    updated += 1
+        self.n_records += 1
+        self._cum = None
+        return updated
+
+    def count(self, metric: str, group: str = ALL, covariate: str = "all", bucket_name: str = "all") -> int:
+        row = self.rows.get(_key(group, metric, covariate, bucket_name))
+        return 0 if row is None else int(self._cumulative()[row, -1])
+
+    def _cumulative(self) -> np.ndarray:
+        if self._cum is None:
+            self._cum = np.cumsum(self.counts, axis=1, dtype=np.int64)
+        return self._cum
+
+    def percentile(self, metric: str, value: float, group: str = ALL, covariate: str = "all",
+                   bucket_name: str = "all") -> tuple[float, int] | None:
+        """
+        value가 비교 집단에서 차지하는 백분위(같은 칸은 절반만 아래로 셈)와 비교 검사 수. 스케치가 없으면 None.
+        """
+        row = self.rows.get(_key(group, metric, covariate, bucket_name))
+        if row is None:
+            return None
+        cum = self._cumulative()[row]
+        total = cum[-1]
+        if total == 0:
+            return None
+        b = self.bin_of(metric, value)
+        below = cum[b - 1] if b else 0
+        return float((below + (cum[b] - below) / 2) * 100 / total), int(total)
+
+    def quantile(self, metric: str, q: float, group: str = ALL, covariate: str = "all",
+                 bucket_name: str = "all") -> float | None:
+        """
+        q(0-1) 분위수. 칸 가운데 값으로 답함.
+        """
+        row = self.rows.get(_key(group, metric, covariate, bucket_name))
+        if row is None:
+            return None
+        cum = self._cumulative()[row]
+        if cum[-1] == 0:
+            return None
+        b = int(np.searchsorted(cum, q * cum[-1], side="left"))
+        lo, hi = self.metrics[metric]
+        return lo + (min(b, self.bins - 1) + 0.5) * (hi - lo) / self.bins
+
+    def compare(self, case_info: dict | None, values: dict[str, float], min_count: int = NORM_MIN_COUNT) -> list[dict]:
+        """
+        지표마다 과거 검사가 min_count건 이상인 가장 좁은 비교 집단에서의 백분위.
+        """
+        out = []
+        candidates = [(g, c, b) for g in groups(case_info) for c, b in strata(case_info)]
+        # 좁은 집단(세부유형 > 분류 > 전체)을 먼저, 같은 집단에서는 공변량 구간을 먼저
+        candidates.sort(key=lambda k: (-groups(case_info).index(k[0]), k[1] == "all"))
+        for metric, value in values.items():
+            for group, covariate, bucket_name in candidates:
+                found = self.percentile(metric, value, group, covariate, bucket_name)
+                if found is not None and found[1] >= min_count:
+                    out.append({
+                        "metric": metric, "value": value, "group": group, "covariate": covariate,
+                        "bucket": bucket_name, "percentile": found[0], "n": found[1],
+                    })
+                    break
+        return out
+
+    def merge(self, other: "NormsIndex") -> "NormsIndex":
+        if other.spec != self.spec:
+            raise ValueError("규준 색인의 설정(칸 수 / 지표 범위)이 달라 합칠 수 없습니다.")
+        for key, row in other.rows.items():
+            mine = self._row(key)
+            self._counts[mine] += other.counts[row]
+        self.n_records += other.n_records
+        self._cum = None
+        return self
+
+    def save(self, path: str):
+        """
+        .npz 한 파일 (임시 파일에 쓴 뒤 교체).
+        """
+        keys = sorted(self.rows, key=self.rows.get)
+        meta = {"spec": self.spec, "keys": keys, "n_records": self.n_records}
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, counts=self.counts, meta=np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), np.uint8))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NormsIndex":
+        with np.load(path) as f:
+            meta = json.loads(f["meta"].tobytes().decode("utf-8"))
+            counts = f["counts"]
+        index = cls(meta["spec"]["bins"], meta["spec"]["metrics"])
+        index.rows = {key: row for row, key in enumerate(meta["keys"])}
+        index._counts = np.array(counts, dtype=np.uint32) if len(counts) else index._counts
+        index.n_records = meta["n_records"]
+        return index
+
+
+def load_norms(path: str = NORMS_PATH) -> NormsIndex | None:
+    if not path or not os.path.exists(path):
+        return None
+    return NormsIndex.load(path)
+
+
+def build_from_results(paths, index: NormsIndex | None = None, params: str | None = None) -> NormsIndex:
+    """
+    pupil.batch의 results.jsonl들을 색인에 더함. 다시 채점한 세션이 여러 줄이어도 세션마다 마지막 성공 결과 하나만
+    (params를 주면 그 매개변수 해시로 채점한 것 중에서). 세션별 case_info가 없으면 "전체"에만 반영.
+    """
+    index = index or NormsIndex()
+    for path in paths:
+        for row in load_results(path, params).values():
+            index.add(row.get("case_info"), row)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="과거 검사 규준 색인")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="일괄 채점 결과(results.jsonl)로 색인 만들기")
+    build.add_argument("results", nargs="+")
+    build.add_argument("-o", "--output", required=True)
+    build.add_argument("--update", action="store_true", help="기존 색인에 덧붙이기")
+    build.add_argument("--params", default=None, help="이 매개변수 해시(results.jsonl의 params)로 채점한 결과만")
+    merge = sub.add_parser("merge", help="여러 색인 합치기")
+    merge.add_argument("indexes", nargs="+")
+    merge.add_argument("-o", "--output", required=True)
+    query = sub.add_parser("query", help="백분위 조회")
+    query.add_argument("index")
+    query.add_argument("metric", choices=list(METRICS))
+    query.add_argument("value", type=float)
+    query.add_argument("--group", default=ALL)
+    query.add_argument("--covariate", default="all", choices=["all", *COVARIATES])
+    query.add_argument("--covariate-value", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        base = NormsIndex.load(args.output) if args.update and os.path.exists(args.output) else None
+        index = build_from_results(args.results, base, args.params)
+        index.save(args.output)
+        print(f"{args.output}: 검사 {index.n_records}건, 스케치 {len(index.rows)}개")
+    elif args.command == "merge":
+        index = NormsIndex.load(args.indexes[0])
+        for path in args.indexes[1:]:
+            index.merge(NormsIndex.load(path))
+        index.save(args.output)
+        print(f"{args.output}: 검사 {index.n_records}건, 스케치 {len(index.rows)}개")
+    else:
+        index = NormsIndex.load(args.index)
+        bucket_name = "all" if args.covariate == "all" else bucket(args.covariate, args.covariate_value)
+        found = index.percentile(args.metric, args.value, args.group, args.covariate, bucket_name)
+        if found is None:
+            print("해당 비교 집단의 기록이 없습니다.")
+            return
+        n = 100000
+        started = time.perf_counter()
+        for _ in range(n):
+            index.percentile(args.metric, args.value, args.group, args.covariate, bucket_name)
+        per_query = (time.perf_counter() - started) / n
+        print(f"{found[0]:.1f} 백분위 (비교 검사 {found[1]}건, 조회 {per_query * 1e6:.1f}µs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# ophtheon/pupil/online.py
+# 검사 진행 중 실시간 채점: 도착하는 동공 샘플을 질문별 누적 통계(Welford)로만 유지하고,
+# 질문의 반응 구간이 닫힐 때마다 해당 묶음의 R 대 C 점수와 잠정 검사 점수를 갱신.
+#
+# 샘플을 쌓아 두지 않으므로 메모리는 질문 수에만 비례. 특징 정의는 pupil.scoring과 같지만
+# 보간 / 필터 없이 범위 밖 값만 버리므로, 검사 후 일괄 채점과 값이 조금 다를 수 있음.
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from pupil.epochs import BASELINE_S, event_times
+from pupil.preprocess import MAX_DIAMETER, MIN_DIAMETER, combine_eyes
+from pupil.scoring import (
+    FEATURES,
+    MIN_VALID,
+    RESPONSE_WINDOW_S,
+    SCORE_CUTOFF,
+    exam_score,
+    triplet_pairs,
+    triplet_scores,
+    verdict,
+)
+
+# 끝난 실시간 채점을 레지스트리에 남겨 두는 시간(초)
+LIVE_SCORE_TTL_SECONDS = 2 * 3600
+
+
+class RunningStats:
+    """
+    개수 / 평균 / 편차 제곱합(Welford) + 최댓값과 그 시각. 배치 단위로 합쳐도 결과는 샘플 단위와 같음.
+    """
+
+    __slots__ = ("n", "mean", "m2", "peak", "t_peak")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.peak = -np.inf
+        self.t_peak = np.nan
+
+    def update(self, t: np.ndarray, x: np.ndarray):
+        if len(x) == 0:
+            return
+        mean_b = float(x.mean())
+        k = int(x.argmax())
+        self._combine(len(x), mean_b, float(((x - mean_b) ** 2).sum()), float(x[k]), float(t[k]))
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """
+        다른 구간(또는 다른 작업자)에서 모은 통계를 합침. 한 번에 update한 것과 같음.
+        """
+        if other.n:
+            self._combine(other.n, other.mean, other.m2, other.peak, other.t_peak)
+        return self
+
+    def _combine(self, n_b: int, mean_b: float, m2_b: float, peak: float, t_peak: float):
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * self.n * n_b / n
+        self.n = n
+        if peak > self.peak:
+            self.peak = peak
+            self.t_peak = t_peak
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else np.nan
+
+
+class OnlineScorer:
+    """
+    검사 차트 하나(타임라인)의 실시간 채점.
+
+        scorer = OnlineScorer(timeline)
+        scorer.set_audio_onset(t0)          # 샘플과 같은 시계로 오디오 재생 시작 시각
+        scorer.push(ts, diameter)           # 샘플이 도착할 때마다 (배치 단위)
+        scorer.status()                     # 잠정 점수 / 묶음별 점수 / 판정
+    """
+
+    def __init__(self, timeline: dict, audio_onset: float | None = None, owner: str | None = None,
+                 cutoff: float = SCORE_CUTOFF):
+        self.token = uuid.uuid4().hex
+        self.owner = owner
+        self.cutoff = cutoff
+        events = timeline["events"]
+        self.types = np.array([e["type"] for e in events])
+        self.offsets = event_times(timeline)
+        self.questions = np.sort(np.concatenate(triplet_pairs(self.types)))
+        self.audio_onset = None
+        self.baseline = [RunningStats() for _ in events]
+        self.response = [RunningStats() for _ in events]
+        self.features = {name: np.full(len(events), np.nan, dtype=np.float32) for name in FEATURES}
+        self.closed = np.zeros(len(events), dtype=bool)
+        self.n_samples = 0
+        self.t_first = None
+        self.t_last = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        if audio_onset is not None:
+            self.set_audio_onset(audio_onset)
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def rate(self) -> float | None:
+        if self.n_samples < 2 or self.t_last <= self.t_first:
+            return None
+        return (self.n_samples - 1) / (self.t_last - self.t_first)
+
+    def set_audio_onset(self, t: float, replace: bool = True) -> bool:
+        """
+        오디오 재생 시작 시각. replace=False면 아직 없을 때만 설정 (브라우저 재생 신호용).
+        """
+        with self._lock:
+            if self.audio_onset is not None and not replace:
+                return False
+            self.audio_onset = float(t)
+            return True
+
+    def push(self, t, pupil):
+        """
+        샘플 배치(시각 오름차순). 범위 밖 / NaN 값은 버림.
+        """
+        t = np.asarray(t, dtype=np.float64)
+        x = np.asarray(pupil, dtype=np.float64)
+        if len(t) == 0:
+            return
+        with self._lock:
+            self.t_first = float(t[0]) if self.t_first is None else self.t_first
+            self.t_last = float(t[-1])
+            self.n_samples += len(t)
+            keep = np.isfinite(x) & (x >= MIN_DIAMETER) & (x <= MAX_DIAMETER)
+            t, x = t[keep], x[keep]
+            if self.audio_onset is None or self.done:
+                return
+
+            onsets = self.audio_onset + self.offsets
+            start, end = RESPONSE_WINDOW_S
+            for q in self.questions[~self.closed[self.questions]]:
+                on = onsets[q]
+                if not np.isfinite(on) or t.size == 0 or t[0] >= on + end or t[-1] < on - BASELINE_S:
+                    continue
+                lo, mid, hi = np.searchsorted(t, [on - BASELINE_S, on + start, on + end])
+                self.baseline[q].update(t[lo:mid], x[lo:mid])
+                self.response[q].update(t[mid:hi], x[mid:hi])
+            self._close(onsets)
+
+    def push_payload(self, payload: dict):
+        """
+        중계 프로그램이 보낸 JSON: {"t": [...], "pupil": [...]} 또는 left_diameter / right_diameter,
+        선택적으로 "audio_onset"(같은 시계).
+        """
+        if payload.get("audio_onset") is not None:
+            self.set_audio_onset(payload["audio_onset"])
+        if "t" not in payload:
+            return
+        if "pupil" in payload:
+            pupil = payload["pupil"]
+        else:
+            eyes = [payload.get(c) for c in ("left_diameter", "right_diameter")]
+            if eyes == [None, None]:
+                raise ValueError("동공 크기 값이 없습니다.")
+            pupil = combine_eyes(*[None if e is None else np.asarray(e, dtype=np.float64) for e in eyes])
+        if len(payload["t"]) != len(pupil):
+            raise ValueError("시각과 동공 크기 개수가 다릅니다.")
+        self.push(payload["t"], pupil)
+
+    def _close(self, onsets: np.ndarray):
+        """
+        반응 구간이 끝난 질문의 특징 계산. 마지막 질문까지 닫히면 채점 종료.
+        """
+        start, end = RESPONSE_WINDOW_S
+        expected = MIN_VALID * (self.rate or 0) * (end - start)
+        for q in self.questions[~self.closed[self.questions]]:
+            if self.t_last < onsets[q] + end:
+                continue
+            self.closed[q] = True
+            base, resp = self.baseline[q], self.response[q]
+            if base.n == 0 or resp.n == 0 or resp.n < expected:
+                continue
+            self.features["peak"][q] = resp.peak - base.mean
+            self.features["latency"][q] = resp.t_peak - (onsets[q] + start)
+            self.features["auc"][q] = (resp.mean - base.mean) * (end - start)
+        if self.closed[self.questions].all():
+            self.finished_at = time.time()
+
+    def status(self) -> dict:
+        with self._lock:
+            triplet, _ = triplet_scores(self.features, self.types)
+            score, n = exam_score(triplet[None])
+            c_idx, r_idx = triplet_pairs(self.types)
+            triplet_closed = self.closed[c_idx] & self.closed[r_idx]
+            return {
+                "started": self.audio_onset is not None,
+                "samples": self.n_samples,
+                "rate": self.rate,
+                "closed": int(self.closed[self.questions].sum()),
+                "total": len(self.questions),
+                "triplets": [
+                    float(s) if closed and np.isfinite(s) else None
+                    for s, closed in zip(triplet, triplet_closed)
+                ],
+                "triplets_closed": int(triplet_closed.sum()),
+                "score": float(score[0]) if np.isfinite(score[0]) else None,
+                "n_triplets": int(n[0]),
+                "done": self.done,
+                "verdict": int(verdict(score, n, self.cutoff)[0]) if self.done else None,
+            }
+
+
+class LiveScoreRegistry:
+    """
+    token → OnlineScorer. 추적기 중계 프로그램은 token이 든 HTTP 경로로 샘플을 보냄.
+    """
+
+    def __init__(self, ttl_seconds: int = LIVE_SCORE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._scorers: dict[str, OnlineScorer] = {}
+        self._lock = threading.Lock()
+
+    def start(self, scorer: OnlineScorer) -> OnlineScorer:
+        with self._lock:
+            self._expire()
+            if scorer.owner is not None:
+                for token, other in list(self._scorers.items()):
+                    if other.owner == scorer.owner:
+                        del self._scorers[token]
+            self._scorers[scorer.token] = scorer
+        return scorer
+
+    def get(self, token: str) -> OnlineScorer | None:
+        with self._lock:
+            return self._scorers.get(token)
+
+    def drop(self, owner: str):
+        with self._lock:
+            for token, scorer in list(self._scorers.items()):
+                if scorer.owner == owner:
+                    del self._scorers[token]
+
+    def _expire(self):
+        now = time.time()
+        for token, scorer in list(self._scorers.items()):
+            if scorer.done and now - scorer.finished_at > self.ttl_seconds:
+                del self._scorers[token]
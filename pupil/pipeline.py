@@ -0,0 +1,236 @@
+# ophtheon/pupil/pipeline.py
+# 시선 추적기 원본 한 건의 채점 경로를 단계로 나눠 둠. 자동 판정 페이지(3score)와 일괄 채점(pupil.batch)이 같이 씀.
+#
+#   ingest → clean → epoch → features → verdict
+#
+# 단계마다 키 = hash(단계 이름, 단계 버전, 그 단계 매개변수, 앞 단계 키[, 차트 타임라인])이고,
+# 결과는 pupil.cache.StageCache에 보관. 매개변수 하나를 바꾸면 그 단계와 뒤 단계의 키만 바뀌므로
+# 예를 들어 기준선 길이만 바꾸면 변환 / 정리는 캐시에서 가져오고 구간부터 다시 계산.
+import copy
+import json
+import os
+
+import numpy as np
+
+from pupil.cache import StageCache, content_hash, hash_json
+from pupil.epochs import BASELINE_S, POST_S, PRE_S, Epochs, epoch_sessions
+from pupil.ingest import ingest
+from pupil.preprocess import LOWPASS_HZ, MAX_GAP_MS, PAD_AFTER_MS, PAD_BEFORE_MS, TARGET_RATE, preprocess_recording
+from pupil.recording import META_NAME, Recording
+from pupil.resample import RESAMPLE_ALPHA, RESAMPLE_BOOT, RESAMPLE_PERM, RESAMPLE_SEED, resample_scores
+from pupil.scoring import (
+    FEATURE_WEIGHTS,
+    FEATURES,
+    MIN_TRIPLETS,
+    MIN_VALID,
+    RESPONSE_WINDOW_S,
+    SCORE_CUTOFF,
+    exam_score,
+    question_features,
+    triplet_pairs,
+    triplet_scores,
+    verdict,
+)
+
+RAW_EXTENSIONS = (".csv", ".tsv", ".txt")
+
+STAGES = ("ingest", "clean", "epoch", "features", "verdict")
+# 단계 구현이 바뀌어 예전 캐시를 쓰면 안 될 때 올림
+STAGE_VERSIONS = {"ingest": 1, "clean": 1, "epoch": 1, "features": 1, "verdict": 3}
+DEFAULT_PARAMS = {
+    "ingest": {},
+    "clean": {
+        "target_rate": TARGET_RATE,
+        "lowpass_hz": LOWPASS_HZ,
+        "pad_before_ms": PAD_BEFORE_MS,
+        "pad_after_ms": PAD_AFTER_MS,
+        "max_gap_ms": MAX_GAP_MS,
+    },
+    "epoch": {"pre": PRE_S, "post": POST_S, "baseline_s": BASELINE_S, "baseline": "subtract", "align": "onset"},
+    "features": {"window": list(RESPONSE_WINDOW_S), "min_valid": MIN_VALID},
+    "verdict": {
+        "weights": dict(FEATURE_WEIGHTS),
+        "cutoff": SCORE_CUTOFF,
+        "min_triplets": MIN_TRIPLETS,
+        # 신뢰구간 / 순열 검정 (pupil.resample). seed가 null이면 계산할 때마다 새 난수.
+        "n_boot": RESAMPLE_BOOT,
+        "n_perm": RESAMPLE_PERM,
+        "alpha": RESAMPLE_ALPHA,
+        "seed": RESAMPLE_SEED,
+    },
+}
+
+
+def is_recording(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, META_NAME))
+
+
+def resolve_params(overrides: dict | None = None) -> dict:
+    """
+    DEFAULT_PARAMS에 {"단계": {"이름": 값}} 덮어쓰기. 모르는 단계 / 이름은 ValueError.
+    """
+    params = copy.deepcopy(DEFAULT_PARAMS)
+    for stage, values in (overrides or {}).items():
+        if stage not in params:
+            raise ValueError(f"알 수 없는 단계입니다: {stage}")
+        for name, value in values.items():
+            if name not in params[stage]:
+                raise ValueError(f"{stage} 단계에 없는 매개변수입니다: {name}")
+            params[stage][name] = value
+    return params
+
+
+def parse_param(text: str) -> tuple[str, str, object]:
+    """
+    "단계.이름=값" (값은 JSON, 아니면 문자열) → (단계, 이름, 값). CLI의 --param 용.
+    """
+    target, sep, raw = text.partition("=")
+    stage, dot, name = target.partition(".")
+    if not sep or not dot:
+        raise ValueError(f"단계.이름=값 형식이어야 합니다: {text}")
+    try:
+        value = json.loads(raw)
+    except json.JSONDecodeError:
+        value = raw
+    return stage, name, value
+
+
+def stage_keys(source_key: str, charts, params: dict) -> dict[str, str]:
+    """
+    원본 내용 해시 + 차트 + 매개변수 → 단계별 캐시 키. 앞 단계 키를 이어받으므로 변경은 뒤로만 전파.
+    """
+    keys = {}
+    upstream = source_key
+    for stage in STAGES:
+        parts = {"stage": stage, "version": STAGE_VERSIONS[stage], "params": params[stage], "upstream": upstream}
+        if stage == "epoch":
+            parts["charts"] = [[timeline["events"], float(onset)] for timeline, onset in charts]
+        upstream = keys[stage] = hash_json(parts)
+    return keys
+
+
+# ---------------------------------------------------------
+# 단계 구현: 모두 (입력, 매개변수, 결과 디렉터리) → 결과 디렉터리에 씀
+# 정리 단계의 품질 통계는 quality.json으로 뒤 단계에 그대로 넘겨, 요약만으로 결과를 만들 수 있게 함.
+# ---------------------------------------------------------
+QUALITY_NAME = "quality.json"
+
+
+def _copy_quality(src_dir: str, out: str):
+    with open(os.path.join(src_dir, QUALITY_NAME), encoding="utf-8") as f:
+        quality = f.read()
+    with open(os.path.join(out, QUALITY_NAME), "w", encoding="utf-8") as f:
+        f.write(quality)
+
+
+def _run_ingest(src: str, params: dict, out: str):
+    ingest(src, os.path.join(out, "raw.pupil"), **params)
+
+
+def _run_clean(raw: str, params: dict, out: str):
+    quality = preprocess_recording(Recording(raw), os.path.join(out, "clean.pupil"), **params)
+    with open(os.path.join(out, QUALITY_NAME), "w", encoding="utf-8") as f:
+        json.dump(quality, f, ensure_ascii=False)
+
+
+def _run_epoch(clean_dir: str, charts, params: dict, out: str):
+    rec = Recording(os.path.join(clean_dir, "clean.pupil"))
+    t_start = float(rec["timestamp"][0])
+    epoch_sessions(
+        [(f"chart{k}", rec, timeline, t_start + onset) for k, (timeline, onset) in enumerate(charts, start=1)],
+        params["pre"], params["post"], params["baseline_s"], params["baseline"], params["align"],
+        out=out,
+    )
+    _copy_quality(clean_dir, out)
+
+
+def _run_features(epoch_dir: str, params: dict, out: str):
+    epochs = Epochs.load(epoch_dir)
+    questions = np.sort(np.concatenate(triplet_pairs(epochs.types)))
+    features = question_features(epochs.data, epochs.times, questions, tuple(params["window"]), params["min_valid"])
+    np.savez(os.path.join(out, "features.npz"), questions=questions, types=epochs.types[questions], **features)
+    _copy_quality(epoch_dir, out)
+
+
+def _run_verdict(features_dir: str, params: dict, out: str):
+    with np.load(os.path.join(features_dir, "features.npz")) as f:
+        features = {name: f[name] for name in FEATURES}
+        types = f["types"]
+    triplet, diffs = triplet_scores(features, types, params["weights"])
+    score, n = exam_score(triplet[None])
+    code = verdict(score, n, params["cutoff"], params["min_triplets"])
+    spread = resample_scores(
+        triplet[None], params["n_boot"], params["n_perm"], params["alpha"], params["seed"],
+        cutoff=params["cutoff"], min_triplets=params["min_triplets"],
+    )
+    with open(os.path.join(features_dir, QUALITY_NAME), encoding="utf-8") as f:
+        quality = json.load(f)
+    # 유형(C / R)별 특징 평균 — 규준(pupil.norms)에서 질문 유형별 반응 분포에 씀
+    responses = {}
+    for t in ("C", "R"):
+        values = {name: features[name][..., types == t] for name in FEATURES}
+        responses[t] = {
+            name: float(v[np.isfinite(v)].mean()) if np.isfinite(v).any() else None
+            for name, v in values.items()
+        }
+    summary = {
+        "score": float(score[0]),
+        "verdict": int(code[0]),
+        "n_triplets": int(n[0]),
+        "ci": [float(spread["ci_low"][0]), float(spread["ci_high"][0])],
+        "p_value": float(spread["p_value"][0]),
+        "verdict_support": float(spread["verdict_support"][0]),
+        "triplets": triplet.tolist(),
+        "diffs": {name: diff.tolist() for name, diff in diffs.items()},
+        "responses": responses,
+        "quality": quality,
+    }
+    with open(os.path.join(out, "summary.json"), "w", encoding="utf-8") as fp:
+        json.dump(summary, fp, ensure_ascii=False, indent=2)
+
+
+def run_pipeline(src: str, charts, cache: StageCache, params: dict | None = None,
+                 with_epochs: bool = False) -> dict:
+    """
+    원본 한 건 채점. charts: 차트별 (타임라인, 오디오 시작 시각 — 기록 첫 샘플로부터 초).
+
+    마지막 단계부터 캐시를 찾고, 없는 단계만 앞 단계를 요청해 계산 (앞 단계가 캐시에서 지워졌어도
+    뒤 단계가 남아 있으면 다시 계산하지 않음).
+
+    반환: verdict 단계 요약(score / verdict / n_triplets / ci / p_value / verdict_support /
+          triplets / diffs / responses / quality)
+          + keys / stages(건드린 단계별 "hit" / "run"). with_epochs면 epochs(구간 디렉터리 경로)도.
+    """
+    params = resolve_params(params)
+    charts = [(timeline, float(onset)) for timeline, onset in charts]
+    keys = stage_keys(content_hash(src), charts, params)
+    stages = {}
+    paths = {}
+
+    def need(stage: str) -> str:
+        if stage not in paths:
+            paths[stage], hit = cache.get_or_build(stage, keys[stage], builders[stage])
+            stages[stage] = "hit" if hit else "run"
+        return paths[stage]
+
+    def raw() -> str:
+        if is_recording(src):
+            stages["ingest"] = "skip"
+            return src
+        return os.path.join(need("ingest"), "raw.pupil")
+
+    builders = {
+        "ingest": lambda out: _run_ingest(src, params["ingest"], out),
+        "clean": lambda out: _run_clean(raw(), params["clean"], out),
+        "epoch": lambda out: _run_epoch(need("clean"), charts, params["epoch"], out),
+        "features": lambda out: _run_features(need("epoch"), params["features"], out),
+        "verdict": lambda out: _run_verdict(need("features"), params["verdict"], out),
+    }
+
+    with open(os.path.join(need("verdict"), "summary.json"), encoding="utf-8") as f:
+        summary = json.load(f)
+    if with_epochs:
+        summary["epochs"] = need("epoch")
+    summary["keys"] = keys
+    summary["stages"] = {stage: stages[stage] for stage in STAGES if stage in stages}
+    return summary
@@ -0,0 +1,343 @@
+# ophtheon/pupil/preprocess.py
+# 채점 전 동공 기록 정리: 무효 샘플 / 깜빡임 검출 → 앞뒤 여유 구간 제거 → 선형 보간
+# → 저역 통과 필터 → 공통 샘플링 주기로 재표본화.
+#
+# 모든 단계는 NumPy 배열 연산이고, 파이썬 반복은 청크 단위로만 돎.
+# 청크 경계에서는 앞뒤로 OVERLAP 만큼 더 읽어 보간 / 필터 결과가 경계와 무관하게 같도록 함.
+import os
+
+import numpy as np
+
+from pupil.recording import Recording, RecordingWriter
+
+# 생리적으로 가능한 동공 지름(mm) 범위
+MIN_DIAMETER = float(os.environ.get("OPHTHEON_PUPIL_MIN_DIAMETER", 1.5))
+MAX_DIAMETER = float(os.environ.get("OPHTHEON_PUPIL_MAX_DIAMETER", 9.0))
+# 팽창 속도 이상치: 중앙값 + SPEED_MAD_K * MAD 를 넘으면 무효
+SPEED_MAD_K = 8.0
+# 깜빡임으로 볼 무효 구간 길이(ms). 더 길면 데이터 손실(dropout)로 분류
+BLINK_MIN_MS = 50.0
+BLINK_MAX_MS = 500.0
+# 무효 구간 앞뒤로 함께 버리는 길이(ms) — 눈꺼풀이 동공을 가리기 시작 / 다 뜨기까지
+PAD_BEFORE_MS = 50.0
+PAD_AFTER_MS = 100.0
+# 이보다 긴 공백은 보간하지 않고 NaN으로 남김
+MAX_GAP_MS = 1000.0
+# 저역 통과 차단 주파수(Hz) / 재표본화 주기(Hz)
+LOWPASS_HZ = 4.0
+TARGET_RATE = float(os.environ.get("OPHTHEON_PUPIL_TARGET_RATE", 60.0))
+
+CHUNK_SAMPLES = 1 << 20
+
+# 유효성 열 해석 (pupil.ingest.VALIDITY_CONVENTIONS)
+_VALIDITY_RULES = {
+    "binary": lambda v: v >= 0.5,
+    "tobii": lambda v: v <= 1,
+    "confidence": lambda v: v >= 0.6,
+}
+
+
+def find_runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    True가 이어지는 구간의 (시작 인덱스, 끝 인덱스(미포함)) 배열.
+    """
+    edges = np.diff(mask.astype(np.int8), prepend=0, append=0)
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def dilation_speed(diameter: np.ndarray, dt: float) -> np.ndarray:
+    """
+    샘플별 팽창 속도: 앞 / 뒤 샘플과의 변화율 중 큰 값 (Kret & Sjak-Shie, 2019).
+    """
+    d = np.asarray(diameter, dtype=np.float64)
+    step = np.abs(np.diff(d)) / dt
+    return np.fmax(np.concatenate(([np.nan], step)), np.concatenate((step, [np.nan])))
+
+
+def speed_threshold(speed: np.ndarray, k: float = SPEED_MAD_K) -> float:
+    """
+    중앙값 + k * MAD. 유한한 값이 없으면 inf (이상치 검출 안 함).
+    """
+    s = speed[np.isfinite(speed)]
+    if s.size == 0:
+        return np.inf
+    median = np.median(s)
+    return float(median + k * np.median(np.abs(s - median)))
+
+
+def validity_mask(diameter: np.ndarray, validity: np.ndarray | None = None, convention: str = "binary",
+                  dt: float | None = None, max_speed: float | None = None,
+                  min_diameter: float = MIN_DIAMETER, max_diameter: float = MAX_DIAMETER) -> np.ndarray:
+    """
+    샘플별 유효 여부. 장비 유효성 플래그 + 지름 범위 + (dt가 있으면) 팽창 속도 이상치.
+    max_speed를 주지 않으면 이 배열에서 speed_threshold로 정함.
+    """
+    d = np.asarray(diameter, dtype=np.float64)
+    valid = np.isfinite(d) & (d >= min_diameter) & (d <= max_diameter)
+    if validity is not None:
+        v = np.asarray(validity)
+        valid &= np.isfinite(v) & _VALIDITY_RULES[convention](np.nan_to_num(v, nan=-1.0))
+
+    if dt:
+        speed = dilation_speed(np.where(valid, d, np.nan), dt)
+        if max_speed is None:
+            max_speed = speed_threshold(speed)
+        valid &= ~(speed > max_speed)
+    return valid
+
+
+def recording_speed_threshold(rec: Recording, column: str, blocks: int = 256, block_size: int = 4096) -> float:
+    """
+    기록 전체에 고르게 퍼진 blocks개 구간에서 구한 팽창 속도 기준값.
+    청크 크기와 무관하게 같은 값이 나오므로 청크 처리 결과가 한 번에 처리한 결과와 같아짐.
+    """
+    n = rec.n_samples
+    d = rec[column]
+    starts = np.unique(np.linspace(0, max(0, n - block_size), min(blocks, max(1, n // block_size))).astype(int))
+    dt = 1.0 / rec.sample_rate
+    validity = rec[column.replace("diameter", "validity")] if column.replace("diameter", "validity") in rec else None
+    convention = rec.meta.get("validity", "binary")
+    speeds = []
+    for start in starts:
+        block = np.asarray(d[start:start + block_size], dtype=np.float64)
+        v = None if validity is None else validity[start:start + block_size]
+        valid = validity_mask(block, v, convention)
+        speeds.append(dilation_speed(np.where(valid, block, np.nan), dt))
+    return speed_threshold(np.concatenate(speeds)) if speeds else np.inf
+
+
+def pad_invalid(valid: np.ndarray, before: int, after: int) -> np.ndarray:
+    """
+    무효 구간을 앞으로 before, 뒤로 after 샘플만큼 넓힘.
+    """
+    if before <= 0 and after <= 0:
+        return valid
+    n = len(valid)
+    starts, ends = find_runs(~valid)
+    marks = np.zeros(n + 1, dtype=np.int32)
+    np.add.at(marks, np.maximum(starts - before, 0), 1)
+    np.add.at(marks, np.minimum(ends + after, n), -1)
+    return np.cumsum(marks[:-1]) == 0
+
+
+def interpolate_gaps(t: np.ndarray, x: np.ndarray, valid: np.ndarray,
+                     max_gap: float = MAX_GAP_MS / 1000) -> tuple[np.ndarray, np.ndarray]:
+    """
+    무효 샘플을 양옆 유효 샘플로 선형 보간. max_gap(초)보다 긴 공백과 양 끝은 NaN.
+    (보간된 신호, 보간된 샘플 표시) 반환.
+    """
+    out = np.full(len(x), np.nan)
+    if not valid.any():
+        return out, np.zeros(len(x), dtype=bool)
+    out[valid] = x[valid]
+    starts, ends = find_runs(~valid)
+    # 양 끝이 아닌, 길이가 max_gap 이하인 공백만 보간
+    inner = (starts > 0) & (ends < len(x))
+    starts, ends = starts[inner], ends[inner]
+    short = (t[ends] - t[starts - 1]) <= max_gap
+    fill = np.zeros(len(x) + 1, dtype=np.int32)
+    np.add.at(fill, starts[short], 1)
+    np.add.at(fill, ends[short], -1)
+    filled = np.cumsum(fill[:-1]) > 0
+    if filled.any():
+        out[filled] = np.interp(t[filled], t[valid], x[valid])
+    return out, filled
+
+
+def lowpass_kernel(rate: float, cutoff: float = LOWPASS_HZ) -> np.ndarray:
+    """
+    Hann 창을 씌운 sinc FIR 계수 (홀수 길이, 합 1). 길이는 차단 주파수 주기의 약 2배.
+    """
+    half = max(1, int(round(rate / cutoff)))
+    n = np.arange(-half, half + 1)
+    kernel = np.sinc(2 * cutoff / rate * n) * np.hanning(2 * half + 3)[1:-1]
+    return kernel / kernel.sum()
+
+
+def fir_filter(x: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """
+    FFT 합성곱으로 위상 지연 없이 필터링. NaN 구간은 잠시 선형으로 채워 계산한 뒤 다시 NaN.
+    """
+    finite = np.isfinite(x)
+    if not finite.any():
+        return x.copy()
+    idx = np.arange(len(x))
+    filled = np.where(finite, x, np.interp(idx, idx[finite], x[finite]))
+    half = len(kernel) // 2
+    padded = np.pad(filled, half, mode="edge")
+    size = len(padded) + len(kernel) - 1
+    nfft = 1 << (size - 1).bit_length()
+    y = np.fft.irfft(np.fft.rfft(padded, nfft) * np.fft.rfft(kernel, nfft), nfft)
+    out = y[2 * half:2 * half + len(x)]
+    out[~finite] = np.nan
+    return out
+
+
+def combine_eyes(left: np.ndarray | None, right: np.ndarray | None) -> np.ndarray:
+    """
+    두 눈 평균. 한쪽만 유효하면 그 값.
+    """
+    if left is None:
+        return right
+    if right is None:
+        return left
+    both = np.stack([left, right])
+    count = np.isfinite(both).sum(axis=0)
+    total = np.nansum(both, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def _clean_eye(t, diameter, validity, convention, rate, max_speed, pad_before, pad_after, max_gap):
+    raw_valid = validity_mask(diameter, validity, convention, dt=1.0 / rate, max_speed=max_speed)
+    valid = pad_invalid(raw_valid, pad_before, pad_after)
+    signal, filled = interpolate_gaps(t, np.asarray(diameter, dtype=np.float64), valid, max_gap)
+    return raw_valid, signal, filled
+
+
+def preprocess_recording(rec: Recording, dst: str, target_rate: float | None = TARGET_RATE,
+                         lowpass_hz: float | None = LOWPASS_HZ, chunk_size: int = CHUNK_SAMPLES,
+                         pad_before_ms: float = PAD_BEFORE_MS, pad_after_ms: float = PAD_AFTER_MS,
+                         max_gap_ms: float = MAX_GAP_MS) -> dict:
+    """
+    기록 rec를 정리해 dst에 새 기록(timestamp, pupil, interpolated)으로 쓰고 품질 통계 반환.
+    품질 통계는 dst의 meta["quality"]에도 저장.
+    """
+    n = rec.n_samples
+    rate = rec.sample_rate
+    if not n or not rate:
+        raise ValueError("샘플링 주기를 알 수 없는 기록입니다.")
+    convention = rec.meta.get("validity", "binary")
+    eyes = [e for e in ("left", "right") if f"{e}_diameter" in rec]
+    pad_before = int(round(pad_before_ms / 1000 * rate))
+    pad_after = int(round(pad_after_ms / 1000 * rate))
+    max_gap = max_gap_ms / 1000
+    kernel = lowpass_kernel(rate, lowpass_hz) if lowpass_hz and lowpass_hz < rate / 2 else None
+    # 보간 / 깜빡임 분류 / 필터가 청크 경계에 영향받지 않도록 앞뒤로 더 읽는 샘플 수
+    overlap = int(np.ceil((max_gap + max(pad_before_ms, pad_after_ms, BLINK_MAX_MS) / 1000) * rate))
+    if kernel is not None:
+        overlap += len(kernel) // 2
+
+    max_speed = {eye: recording_speed_threshold(rec, f"{eye}_diameter") for eye in eyes}
+
+    ts = rec["timestamp"]
+    t_first, t_last = float(ts[0]), float(ts[n - 1])
+    out_rate = target_rate or rate
+
+    totals = {"samples": 0, "lost": 0, "interpolated": 0, "unrecoverable": 0, "blinks": 0, "dropouts": 0}
+    for eye in eyes:
+        totals[f"{eye}_lost"] = 0
+
+    with RecordingWriter(dst, ["timestamp", "pupil", "interpolated"],
+                         {"pupil": np.float32, "interpolated": np.uint8}) as writer:
+        for start in range(0, n, chunk_size):
+            stop = min(n, start + chunk_size)
+            lo, hi = max(0, start - overlap), min(n, stop + overlap)
+            keep = slice(start - lo, stop - lo)
+            t = np.asarray(ts[lo:hi], dtype=np.float64)
+
+            cleaned, raw_valid_any, filled_any = {}, np.zeros(hi - lo, dtype=bool), np.zeros(hi - lo, dtype=bool)
+            for eye in eyes:
+                validity = rec[f"{eye}_validity"][lo:hi] if f"{eye}_validity" in rec else None
+                raw_valid, signal, filled = _clean_eye(
+                    t, rec[f"{eye}_diameter"][lo:hi], validity, convention, rate, max_speed[eye],
+                    pad_before, pad_after, max_gap,
+                )
+                cleaned[eye] = signal
+                raw_valid_any |= raw_valid
+                filled_any |= filled
+                totals[f"{eye}_lost"] += int((~raw_valid[keep]).sum())
+
+            pupil = combine_eyes(cleaned.get("left"), cleaned.get("right"))
+            if kernel is not None:
+                pupil = fir_filter(pupil, kernel)
+
+            # 깜빡임 / 손실 구간: 시작점이 이 청크의 본 구간 안에 있는 것만 셈
+            starts, ends = find_runs(~raw_valid_any)
+            durations = (t[np.minimum(ends, len(t) - 1)] - t[starts]) * 1000
+            own = (starts >= keep.start) & (starts < keep.stop)
+            blink = (durations >= BLINK_MIN_MS) & (durations <= BLINK_MAX_MS)
+            totals["blinks"] += int((own & blink).sum())
+            totals["dropouts"] += int((own & (durations > BLINK_MAX_MS)).sum())
+            totals["samples"] += stop - start
+            totals["lost"] += int((~raw_valid_any[keep]).sum())
+            totals["interpolated"] += int((filled_any[keep] & np.isfinite(pupil[keep])).sum())
+            totals["unrecoverable"] += int((~np.isfinite(pupil[keep])).sum())
+
+            if target_rate:
+                # 전역 격자 t_first + k / target_rate 중 이 청크 본 구간에 속하는 점
+                k0 = int(np.ceil((t[keep.start] - t_first) * target_rate - 1e-9))
+                if stop < n:
+                    k1 = int(np.ceil((float(ts[stop]) - t_first) * target_rate - 1e-9))
+                else:
+                    k1 = int(np.floor((t_last - t_first) * target_rate + 1e-9)) + 1
+                grid = t_first + np.arange(k0, k1) / target_rate
+                finite = np.isfinite(pupil)
+                out = np.interp(grid, t, np.where(finite, pupil, 0.0))
+                # 주변에 NaN이 섞인 격자점은 NaN
+                nan_near = np.interp(grid, t, (~finite).astype(np.float64)) > 0
+                out[nan_near] = np.nan
+                flag = np.interp(grid, t, filled_any.astype(np.float64)) > 0
+                writer.append({"timestamp": grid, "pupil": out, "interpolated": flag})
+            else:
+                writer.append({"timestamp": t[keep], "pupil": pupil[keep], "interpolated": filled_any[keep]})
+
+        quality = quality_stats(totals, t_last - t_first, eyes)
+        writer.meta.update({
+            "source": os.path.basename(rec.path.rstrip(os.sep)),
+            "sample_rate": out_rate,
+            "t0": rec.meta.get("t0"),
+            "preprocess": {
+                "max_speed": {eye: round(v, 6) for eye, v in max_speed.items()},
+                "min_diameter": MIN_DIAMETER,
+                "max_diameter": MAX_DIAMETER,
+                "pad_before_ms": pad_before_ms,
+                "pad_after_ms": pad_after_ms,
+                "max_gap_ms": max_gap_ms,
+                "lowpass_hz": lowpass_hz if kernel is not None else None,
+                "source_rate": rate,
+            },
+            "quality": quality,
+        })
+    return quality
+
+
+def quality_stats(totals: dict, duration_s: float, eyes=("left", "right")) -> dict:
+    """
+    누적 개수 → 비율 / 분당 깜빡임 수.
+    """
+    n = max(1, totals["samples"])
+    minutes = max(duration_s, 1e-9) / 60
+    stats = {
+        "n_samples": totals["samples"],
+        "duration_s": round(duration_s, 3),
+        "percent_lost": round(100 * totals["lost"] / n, 3),
+        "percent_interpolated": round(100 * totals["interpolated"] / n, 3),
+        "percent_unrecoverable": round(100 * totals["unrecoverable"] / n, 3),
+        "blinks": totals["blinks"],
+        "blink_rate_per_min": round(totals["blinks"] / minutes, 3),
+        "dropouts": totals["dropouts"],
+    }
+    for eye in eyes:
+        stats[f"percent_lost_{eye}"] = round(100 * totals[f"{eye}_lost"] / n, 3)
+    return stats
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="동공 기록 정리 (깜빡임 제거 / 보간 / 필터 / 재표본화)")
+    parser.add_argument("src")
+    parser.add_argument("-o", "--output", default=None, help="결과 기록 디렉터리 (기본: <src>.clean.pupil)")
+    parser.add_argument("--rate", type=float, default=TARGET_RATE, help="재표본화 주기(Hz), 0이면 원래 주기")
+    parser.add_argument("--lowpass", type=float, default=LOWPASS_HZ, help="저역 통과 차단 주파수(Hz), 0이면 생략")
+    args = parser.parse_args(argv)
+
+    dst = args.output or args.src.rstrip(os.sep).removesuffix(".pupil") + ".clean.pupil"
+    quality = preprocess_recording(Recording(args.src), dst, args.rate or None, args.lowpass or None)
+    print(json.dumps(quality, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
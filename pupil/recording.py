@@ -0,0 +1,172 @@
+# ophtheon/pupil/recording.py
+# 동공 기록의 디스크 형식: 디렉터리 하나에 열(column)마다 .npy 파일 + meta.json.
+#
+#   <name>.pupil/
+#     meta.json            열 목록 / dtype / 샘플 수 / 샘플링 주기 / 원본 정보
+#     timestamp.npy        float64, 초
+#     left_diameter.npy    float32, 원본 단위(보통 mm)
+#     ...
+#
+# 각 열은 np.load(mmap_mode="r")로 열리므로 RAM보다 큰 기록도 필요한 구간만 읽음.
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+META_NAME = "meta.json"
+RECORDING_VERSION = 1
+
+# 표준 열 이름 → dtype
+COLUMN_DTYPES = {
+    "timestamp": np.float64,
+    "left_diameter": np.float32,
+    "right_diameter": np.float32,
+    "gaze_x": np.float32,
+    "gaze_y": np.float32,
+    "left_validity": np.float32,
+    "right_validity": np.float32,
+}
+
+# .npy 헤더를 고정 길이로 잡아 두고, 다 쓴 뒤 실제 샘플 수로 덮어씀
+_NPY_HEADER_BYTES = 128
+
+
+def _npy_header(dtype, n: int) -> bytes:
+    """
+    1차원 배열 (n,) 의 .npy v1.0 헤더. 길이는 항상 _NPY_HEADER_BYTES.
+    """
+    header = repr({
+        "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+        "fortran_order": False,
+        "shape": (n,),
+    }).encode("latin1")
+    prefix = np.lib.format.MAGIC_PREFIX + bytes([1, 0])
+    pad = _NPY_HEADER_BYTES - len(prefix) - 2 - len(header) - 1
+    if pad < 0:
+        raise ValueError("npy 헤더가 예약된 길이를 넘습니다.")
+    header += b" " * pad + b"\n"
+    return prefix + len(header).to_bytes(2, "little") + header
+
+
+class RecordingWriter:
+    """
+    열 단위로 청크를 이어 쓰는 기록 작성기. 전체 길이를 몰라도 되고, 메모리에는 청크 하나만 둠.
+
+        with RecordingWriter(path, ["timestamp", "left_diameter"]) as w:
+            w.append({"timestamp": ts, "left_diameter": d})
+            w.meta["sample_rate"] = 250.0
+    """
+
+    def __init__(self, path: str, columns, dtypes: dict | None = None):
+        self.path = path
+        self.columns = list(columns)
+        self.dtypes = {c: np.dtype((dtypes or {}).get(c, COLUMN_DTYPES.get(c, np.float32))) for c in self.columns}
+        self.n_samples = 0
+        self.meta = {}
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._tmp_dir = tempfile.mkdtemp(dir=parent, prefix=".pupil-", suffix=".part")
+        self._files = {}
+        for c in self.columns:
+            f = open(os.path.join(self._tmp_dir, f"{c}.npy"), "wb")
+            f.write(_npy_header(self.dtypes[c], 0))
+            self._files[c] = f
+
+    def append(self, chunk: dict):
+        n = None
+        for c in self.columns:
+            values = np.ascontiguousarray(chunk[c], dtype=self.dtypes[c])
+            if n is None:
+                n = len(values)
+            elif len(values) != n:
+                raise ValueError(f"열 길이가 다릅니다: {c} {len(values)} != {n}")
+            self._files[c].write(values.tobytes())
+        self.n_samples += n or 0
+
+    def close(self) -> str:
+        """
+        헤더를 실제 샘플 수로 고치고 meta.json을 쓴 뒤, 디렉터리를 원자적으로 교체.
+        """
+        for c, f in self._files.items():
+            f.seek(0)
+            f.write(_npy_header(self.dtypes[c], self.n_samples))
+            f.close()
+        meta = {
+            "version": RECORDING_VERSION,
+            "n_samples": self.n_samples,
+            "columns": {c: np.lib.format.dtype_to_descr(self.dtypes[c]) for c in self.columns},
+            **self.meta,
+        }
+        with open(os.path.join(self._tmp_dir, META_NAME), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        if os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+        os.replace(self._tmp_dir, self.path)
+        return self.path
+
+    def abort(self):
+        for f in self._files.values():
+            f.close()
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class Recording:
+    """
+    디스크의 동공 기록. 열은 처음 접근할 때 읽기 전용 memmap으로 엶.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, META_NAME), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self._arrays = {}
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.meta["columns"])
+
+    @property
+    def n_samples(self) -> int:
+        return self.meta["n_samples"]
+
+    @property
+    def sample_rate(self) -> float | None:
+        return self.meta.get("sample_rate")
+
+    def __len__(self):
+        return self.n_samples
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.meta["columns"]
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        if column not in self._arrays:
+            if column not in self.meta["columns"]:
+                raise KeyError(column)
+            self._arrays[column] = np.load(os.path.join(self.path, f"{column}.npy"), mmap_mode="r")
+        return self._arrays[column]
+
+    def iter_chunks(self, columns=None, chunk_size: int = 1 << 20, overlap: int = 0):
+        """
+        (start, {열: 배열 조각}) 를 chunk_size 샘플씩 생성. overlap만큼 앞 청크와 겹쳐서 줌.
+        """
+        columns = self.columns if columns is None else list(columns)
+        for start in range(0, self.n_samples, chunk_size):
+            lo = max(0, start - overlap)
+            hi = min(self.n_samples, start + chunk_size)
+            yield lo, {c: self[c][lo:hi] for c in columns}
+
+
+def open_recording(path: str) -> Recording:
+    return Recording(path)
@@ -0,0 +1,252 @@
+# ophtheon/pupil/resample.py
+# 검사 점수의 불확실성: 묶음 부트스트랩 신뢰구간 + R / C 뒤바꿈 순열 검정 p값 + 판정 유지 비율.
+#
+#   python -m pupil.resample epochs_dir --boot 10000 --perm 10000      # 저장된 Epochs (세션마다)
+#   python -m pupil.resample epoch_stage_dir --one-exam                # 채점 경로의 구간 단계 결과 (차트들 = 한 검사)
+#   python -m pupil.resample --benchmark 1000 --workers 2               # 합성 검사로 속도 측정
+#
+# 재표집 단위는 (차트 × 묶음)의 묶음 점수. 구간 안의 샘플끼리는 서로 독립이 아니라서(자기상관)
+# 샘플 단위로 뽑지 않고, 구간 배열(세션, 차트, 질문, 샘플)에서 특징 / 묶음 점수를 한 번 계산한 뒤
+# 반복 전체를 (반복, 세션, 묶음) 배열 연산으로 처리.
+#   - 부트스트랩: 채점 가능한 묶음을 복원 추출해 평균 → 백분위 신뢰구간, 판정이 그대로인 반복의 비율
+#   - 순열 검정: 귀무가설(R과 C 반응에 차이 없음)에서는 묶음 안 R / C 이름표를 바꿔도 되고,
+#     R 대 C 비교는 반대칭이므로 묶음 점수의 부호만 뒤집힘. 경우의 수(2^묶음 수)가 반복 수 이하면 전부 열거(정확 검정).
+#
+# 난수는 (시드, 세션 묶음, 반복 블록)마다 독립 스트림이라, 같은 시드면 작업자 수와 무관하게 결과가 같음.
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pupil.epochs import Epochs
+from pupil.scoring import MIN_TRIPLETS, SCORE_CUTOFF, score_exams, synthetic_epochs, verdict
+
+RESAMPLE_BOOT = int(os.environ.get("OPHTHEON_RESAMPLE_BOOT", 2000))
+RESAMPLE_PERM = int(os.environ.get("OPHTHEON_RESAMPLE_PERM", 2000))
+RESAMPLE_ALPHA = 0.05
+
+
+def _parse_seed(text: str | None, default: int = 0) -> int | None:
+    """
+    시드 설정값 → 정수 시드. "none" / 빈 값 / 음수면 None(실행마다 새 난수), 정수가 아니면 default.
+    """
+    text = (text or "").strip()
+    if text.lower() in ("none", ""):
+        return None
+    try:
+        seed = int(text)
+    except ValueError:
+        return default
+    return None if seed < 0 else seed
+
+
+# 재현 가능한 결과가 기본. "none"(또는 음수)이면 None — 실행마다 새 난수. 잘못된 값이면 기본 시드 0.
+RESAMPLE_SEED = _parse_seed(os.environ.get("OPHTHEON_RESAMPLE_SEED", "0"))
+RESAMPLE_WORKERS = int(os.environ.get("OPHTHEON_RESAMPLE_WORKERS", 1))
+# 난수 스트림 하나가 맡는 반복 수 / 한 번에 만드는 (반복 × 세션 × 묶음) 배열의 최대 원소 수
+RESAMPLE_BLOCK = 500
+RESAMPLE_MAX_ELEMENTS = 1 << 22
+
+
+def _compact(triplet: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    묶음 점수 (세션, ...) → 채점 가능한 값을 앞으로 모은 (세션, 묶음) 배열과 세션별 개수.
+    """
+    flat = triplet.reshape(triplet.shape[0], -1).astype(np.float64)
+    usable = np.isfinite(flat)
+    order = np.argsort(~usable, axis=1, kind="stable")
+    values = np.take_along_axis(np.where(usable, flat, 0.0), order, axis=1)
+    return values, usable.sum(axis=1)
+
+
+def _boot_block(values: np.ndarray, n: np.ndarray, size: int, seed) -> np.ndarray:
+    """
+    부트스트랩 반복 size번 → (반복, 세션) 평균. 세션마다 앞의 n개 안에서 복원 추출.
+    """
+    rng = np.random.default_rng(seed)
+    n_exams, width = values.shape
+    idx = (rng.random((size, n_exams, width)) * n[None, :, None]).astype(np.intp)
+    picked = values[np.arange(n_exams)[None, :, None], idx]
+    picked *= np.arange(width)[None, None, :] < n[None, :, None]
+    return (picked.sum(axis=-1) / np.maximum(n, 1)).astype(np.float32)
+
+
+def _perm_block(values: np.ndarray, n: np.ndarray, observed: np.ndarray, size: int, seed) -> np.ndarray:
+    """
+    부호 뒤집기 size번 → 세션별로 |평균|이 관측값 이상인 횟수.
+    """
+    rng = np.random.default_rng(seed)
+    signs = rng.integers(0, 2, (size, *values.shape), dtype=np.int8) * 2 - 1
+    means = (signs * values[None]).sum(axis=-1) / np.maximum(n, 1)
+    return (np.abs(means) >= np.abs(observed) - 1e-12).sum(axis=0)
+
+
+def _exact_perm(values: np.ndarray, n: np.ndarray, observed: np.ndarray) -> np.ndarray:
+    """
+    가능한 부호 조합 전부(2^묶음 수)에 대한 정확 p값. 앞 n개 밖의 자리는 0이라 조합이 고르게 중복될 뿐.
+    """
+    width = values.shape[1]
+    signs = ((np.arange(2 ** width)[:, None] >> np.arange(width)) & 1) * 2.0 - 1.0
+    means = values @ signs.T / np.maximum(n, 1)[:, None]
+    return (np.abs(means) >= np.abs(observed)[:, None] - 1e-12).mean(axis=1)
+
+
+def _run_tasks(tasks, workers: int):
+    """
+    (함수, 인자) 목록을 순서대로 실행. workers > 1이면 프로세스 풀에 나눔 (결과 순서는 그대로).
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        return [fn(*args) for fn, args in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fn, *args) for fn, args in tasks]
+        return [f.result() for f in futures]
+
+
+def resample_scores(triplet: np.ndarray, n_boot: int = RESAMPLE_BOOT, n_perm: int = RESAMPLE_PERM,
+                    alpha: float = RESAMPLE_ALPHA, seed: int | None = RESAMPLE_SEED, workers: int = RESAMPLE_WORKERS,
+                    cutoff: float = SCORE_CUTOFF, min_triplets: int = MIN_TRIPLETS) -> dict:
+    """
+    묶음 점수 (세션, ...) — pupil.scoring.exam_score와 같은 입력 — 의 재표집 통계. 모두 (세션,) 배열.
+
+      score / n_triplets / verdict : 점수 판정 (scoring과 같음)
+      ci_low / ci_high             : 검사 점수의 (1 - alpha) 부트스트랩 백분위 신뢰구간
+      p_value                      : 양측 순열 검정 p값 (R / C 반응에 차이가 없다는 귀무가설, n_perm = 0이면 NaN)
+      verdict_support              : 부트스트랩 반복 중 판정이 그대로인 비율 (n_boot = 0이면 NaN)
+      exact                        : 순열 검정을 모든 조합으로 했는지 (스칼라)
+    채점 가능한 묶음이 없는 세션은 NaN.
+    """
+    values, n = _compact(triplet)
+    n_exams, width = values.shape
+    observed = values.sum(axis=1) / np.maximum(n, 1)
+    score = np.where(n > 0, observed, np.nan)
+    code = verdict(score, n, cutoff, min_triplets)
+
+    root = np.random.SeedSequence(seed)
+    rows = max(1, RESAMPLE_MAX_ELEMENTS // (RESAMPLE_BLOCK * max(width, 1)))
+    chunks = [slice(i, min(i + rows, n_exams)) for i in range(0, n_exams, rows)]
+
+    def blocks(total: int, kind: int):
+        # (세션 묶음, 반복 시작, 반복 수, 난수 스트림)
+        for c, chunk in enumerate(chunks):
+            for b, start in enumerate(range(0, total, RESAMPLE_BLOCK)):
+                stream = np.random.SeedSequence(root.entropy, spawn_key=(kind, c, b))
+                yield chunk, start, min(RESAMPLE_BLOCK, total - start), stream
+
+    boot_blocks = list(blocks(n_boot, 0))
+    tasks = [(_boot_block, (values[chunk], n[chunk], size, stream)) for chunk, _, size, stream in boot_blocks]
+    exact = width > 0 and 2 ** width <= n_perm
+    if exact:
+        perm_blocks = chunks
+        tasks += [(_exact_perm, (values[chunk], n[chunk], observed[chunk])) for chunk in chunks]
+    else:
+        perm_blocks = list(blocks(n_perm, 1))
+        tasks += [
+            (_perm_block, (values[chunk], n[chunk], observed[chunk], size, stream))
+            for chunk, _, size, stream in perm_blocks
+        ]
+    results = _run_tasks(tasks, workers)
+
+    boot = np.empty((n_boot, n_exams), dtype=np.float32)
+    for (chunk, start, size, _), part in zip(boot_blocks, results):
+        boot[start:start + size, chunk] = part
+    p_value = np.zeros(n_exams)
+    for block, part in zip(perm_blocks, results[len(boot_blocks):]):
+        if exact:
+            p_value[block] = part
+        else:
+            p_value[block[0]] += part
+    if not exact:
+        p_value = (1 + p_value) / (1 + n_perm)
+
+    if n_boot:
+        ci_low, ci_high = np.quantile(boot, [alpha / 2, 1 - alpha / 2], axis=0)
+        support = (verdict(boot, np.broadcast_to(n, boot.shape), cutoff, min_triplets) == code).mean(axis=0)
+    else:
+        # 부트스트랩을 끄면 구간은 점수 자체, 판정 유지 비율은 알 수 없음
+        ci_low = ci_high = score
+        support = np.full(n_exams, np.nan)
+    if not exact and not n_perm:
+        p_value = np.full(n_exams, np.nan)
+    missing = n == 0
+    return {
+        "score": score.astype(np.float32),
+        "n_triplets": n,
+        "verdict": code,
+        "ci_low": np.where(missing, np.nan, ci_low).astype(np.float32),
+        "ci_high": np.where(missing, np.nan, ci_high).astype(np.float32),
+        "p_value": np.where(missing, np.nan, p_value),
+        "verdict_support": np.where(missing, np.nan, support),
+        "exact": bool(exact),
+    }
+
+
+def resample_exams(data: np.ndarray, times: np.ndarray, types, weights: dict | None = None, **kwargs) -> dict:
+    """
+    구간 배열 (세션, [차트,] 질문, 샘플)에서 바로: 묶음 점수를 계산해 resample_scores로 넘김.
+    """
+    triplet = score_exams(data, times, types, weights)["triplet"]
+    return resample_scores(triplet, **kwargs)
+
+
+def benchmark(n_sessions: int = 100, n_charts: int = 3, n_boot: int = 10000, n_perm: int = 10000,
+              workers: int = 1) -> dict:
+    data, times, types, truth = synthetic_epochs(n_sessions, n_charts)
+    started = time.perf_counter()
+    result = resample_exams(data, times, types, n_boot=n_boot, n_perm=n_perm, workers=workers)
+    seconds = time.perf_counter() - started
+    return {
+        "sessions": n_sessions,
+        "seconds": seconds,
+        "per_exam": seconds / n_sessions,
+        "exact": result["exact"],
+        "mean_support": float(np.nanmean(result["verdict_support"])),
+        "significant": float(np.nanmean(result["p_value"] < RESAMPLE_ALPHA)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="검사 점수 신뢰구간 / 순열 검정")
+    parser.add_argument("epochs", nargs="?", help="pupil.epochs로 저장한 디렉터리")
+    parser.add_argument("--boot", type=int, default=RESAMPLE_BOOT, help="부트스트랩 반복 수")
+    parser.add_argument("--perm", type=int, default=RESAMPLE_PERM, help="순열 검정 반복 수")
+    parser.add_argument("--alpha", type=float, default=RESAMPLE_ALPHA)
+    parser.add_argument("--seed", type=int, default=RESAMPLE_SEED if RESAMPLE_SEED is not None else -1,
+                        help="음수면 실행마다 새 난수")
+    parser.add_argument("--workers", type=int, default=RESAMPLE_WORKERS)
+    parser.add_argument("--one-exam", action="store_true",
+                        help="저장된 세션들을 차트로 보고 한 검사로 계산 (채점 경로의 구간 단계 결과)")
+    parser.add_argument("--benchmark", type=int, metavar="N", default=None, help="합성 검사 N개로 속도 측정")
+    args = parser.parse_args(argv)
+    seed = None if args.seed < 0 else args.seed
+
+    if args.benchmark:
+        stats = benchmark(args.benchmark, n_boot=args.boot, n_perm=args.perm, workers=args.workers)
+        print(
+            f"{stats['sessions']}검사 (부트스트랩 {args.boot} / 순열 {args.perm}"
+            f"{', 정확 검정' if stats['exact'] else ''}): {stats['seconds'] * 1000:.1f} ms "
+            f"(검사당 {stats['per_exam'] * 1000:.2f} ms), 판정 유지 {stats['mean_support']:.1%}, "
+            f"p < {RESAMPLE_ALPHA:g} {stats['significant']:.1%}"
+        )
+        return
+    if not args.epochs:
+        parser.error("epochs 디렉터리 또는 --benchmark 가 필요합니다.")
+    epochs = Epochs.load(args.epochs)
+    data, names = epochs.data, list(epochs.sessions)
+    if args.one_exam:
+        data, names = data[None], ["+".join(names)]
+    result = resample_exams(
+        data, epochs.times, epochs.types,
+        n_boot=args.boot, n_perm=args.perm, alpha=args.alpha, seed=seed, workers=args.workers,
+    )
+    level = 1 - args.alpha
+    for k, name in enumerate(names):
+        print(
+            f"{name}\t{result['score'][k]:+.3f} [{level:.0%} {result['ci_low'][k]:+.3f}, {result['ci_high'][k]:+.3f}]\t"
+            f"p = {result['p_value'][k]:.4f}\t판정 유지 {result['verdict_support'][k]:.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# ophtheon/pupil/scoring.py
+# 질문별 동공 구간(pupil.epochs) → 묶음(N C R)별 R 대 C 비교 → 검사 점수 / 판정.
+#
+#   python -m pupil.scoring epochs_dir              # 저장된 Epochs 채점
+#   python -m pupil.scoring --benchmark 20000       # 합성 검사로 처리량 측정
+#
+# 입력 배열은 (세션, [차트,] 질문, 샘플). 특징 계산 / 짝짓기 / 합산 모두 배열 연산 한 번씩이라
+# 세션 수에 대해 파이썬 반복이 없음.
+import argparse
+import os
+import time
+
+import numpy as np
+
+from pupil.epochs import POST_S, Epochs, epoch_sessions
+from pupil.recording import Recording
+
+# 반응 구간(질문 시점 기준, 초). 질문 낭독 + 대답 전 대기까지.
+RESPONSE_WINDOW_S = (0.0, POST_S)
+# 반응 구간의 유효 샘플 비율이 이보다 낮은 질문은 특징을 NaN으로 (해당 묶음은 채점에서 제외)
+MIN_VALID = 0.5
+FEATURES = ("peak", "latency", "auc")
+# 특징별 가중치 (파일럿 값). 합이 1이면 묶음 점수도 [-1, 1].
+FEATURE_WEIGHTS = {"peak": 0.4, "latency": 0.2, "auc": 0.4}
+# 검사 점수(묶음 점수 평균)가 +SCORE_CUTOFF 이상이면 진실, -SCORE_CUTOFF 이하면 거짓 반응
+SCORE_CUTOFF = float(os.environ.get("OPHTHEON_SCORE_CUTOFF", 0.1))
+# 채점 가능한 묶음이 이보다 적으면 판정 불가
+MIN_TRIPLETS = int(os.environ.get("OPHTHEON_SCORE_MIN_TRIPLETS", 2))
+
+VERDICT_NDI = 1
+VERDICT_INC = 0
+VERDICT_DI = -1
+VERDICT_LABELS = {
+    VERDICT_NDI: "진실 반응 (NDI)",
+    VERDICT_INC: "판정 불가 (INC)",
+    VERDICT_DI: "거짓 반응 (DI)",
+}
+
+_EPS = 1e-6
+
+
+def triplet_pairs(types) -> tuple[np.ndarray, np.ndarray]:
+    """
+    검사 순서의 질문 유형 목록에서 k번째 묶음의 (C 위치, R 위치). build_exam_sequence 기준 (3, 3).
+    """
+    types = np.asarray(types)
+    c_idx = np.flatnonzero(types == "C")
+    r_idx = np.flatnonzero(types == "R")
+    if len(c_idx) == 0 or len(c_idx) != len(r_idx):
+        raise ValueError(f"C / R 질문 수가 맞지 않습니다 (C {len(c_idx)}, R {len(r_idx)}).")
+    return c_idx, r_idx
+
+
+def question_features(data: np.ndarray, times: np.ndarray, questions=None,
+                      window: tuple[float, float] = RESPONSE_WINDOW_S,
+                      min_valid: float = MIN_VALID) -> dict[str, np.ndarray]:
+    """
+    (..., 질문, 샘플) 기준선 보정 구간 → 특징별 (..., 질문) 배열. questions를 주면 그 질문만 계산.
+
+    - peak   : 반응 구간 최대 확장
+    - latency: 최대 확장까지 걸린 시간(초)
+    - auc    : 반응 구간 곡선 아래 면적 (빈 샘플은 평균으로 채운 셈, mm·s)
+    """
+    lo, hi = np.searchsorted(times, window, side="left")
+    x = data[..., lo:hi] if questions is None else data[..., questions, lo:hi]
+    x = np.asarray(x, dtype=np.float32)
+    t = times[lo:hi]
+    finite = ~np.isnan(x)
+    count = finite.sum(axis=-1, dtype=np.int32)
+    ok = count >= min_valid * x.shape[-1]
+
+    filled = np.where(finite, x, np.float32(-np.inf))
+    arg = filled.argmax(axis=-1)
+    peak = np.take_along_axis(filled, arg[..., None], axis=-1)[..., 0]
+    latency = (t[arg] - window[0]).astype(np.float32)
+    total = np.sum(x, axis=-1, where=finite)
+    auc = total / np.maximum(count, 1) * np.float32(window[1] - window[0])
+
+    nan = np.float32(np.nan)
+    return {
+        "peak": np.where(ok, peak, nan),
+        "latency": np.where(ok, latency, nan),
+        "auc": np.where(ok, auc, nan).astype(np.float32),
+    }
+
+
+def relative_difference(c: np.ndarray, r: np.ndarray) -> np.ndarray:
+    """
+    (C - R) / (|C| + |R|) ∈ [-1, 1]. 양수면 C 반응이 더 큼.
+    """
+    return (c - r) / (np.abs(c) + np.abs(r) + _EPS)
+
+
+def triplet_scores(features: dict[str, np.ndarray], types,
+                   weights: dict | None = None) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    특징별 (..., 질문) → (묶음 점수 (..., 묶음), 특징별 R 대 C 비교 (..., 묶음)).
+    types는 features의 질문 축과 같은 순서의 유형 목록.
+    양수는 비교 질문(C) 반응이 더 큰 쪽(진실), 음수는 관련 질문(R) 반응이 더 큰 쪽(거짓).
+    지연 시간은 짧을수록 반응이 큰 것으로 보고 부호를 뒤집음.
+    """
+    weights = FEATURE_WEIGHTS if weights is None else weights
+    c_idx, r_idx = triplet_pairs(types)
+    diffs = {}
+    score = 0
+    for name, w in weights.items():
+        c = features[name][..., c_idx]
+        r = features[name][..., r_idx]
+        diff = relative_difference(r, c) if name == "latency" else relative_difference(c, r)
+        diffs[name] = diff
+        score = score + w * diff
+    return np.asarray(score, dtype=np.float32), diffs
+
+
+def verdict(score: np.ndarray, n_triplets: np.ndarray, cutoff: float = SCORE_CUTOFF,
+            min_triplets: int = MIN_TRIPLETS) -> np.ndarray:
+    """
+    검사 점수 → 판정 코드 (VERDICT_NDI / VERDICT_INC / VERDICT_DI).
+    """
+    code = np.where(score >= cutoff, VERDICT_NDI, np.where(score <= -cutoff, VERDICT_DI, VERDICT_INC))
+    return np.where((n_triplets >= min_triplets) & np.isfinite(score), code, VERDICT_INC).astype(np.int8)
+
+
+def exam_score(triplet: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    묶음 점수 (세션, ...) → (검사 점수, 채점한 묶음 수) (세션,). NaN 묶음은 빼고 평균.
+    """
+    flat = triplet.reshape(triplet.shape[0], -1)
+    usable = np.isfinite(flat)
+    n = usable.sum(axis=-1)
+    score = np.where(usable, flat, 0).sum(axis=-1) / np.maximum(n, 1)
+    return np.where(n > 0, score, np.nan).astype(np.float32), n
+
+
+def score_exams(data: np.ndarray, times: np.ndarray, types, weights: dict | None = None,
+                cutoff: float = SCORE_CUTOFF) -> dict:
+    """
+    data: (세션, [차트,] 질문, 샘플) 기준선 보정된 구간. 세션 축(맨 앞)만 남기고 차트 / 묶음을 합산.
+
+    반환:
+      features: 특징별 (세션, [차트,] C/R 질문) — questions 순서 (검사 순서 위치)
+      diffs   : 특징별 R 대 C 비교 (세션, [차트,] 묶음)
+      triplet : 묶음 점수 (세션, [차트,] 묶음)
+      score   : 검사 점수 (세션,) — 채점 가능한 묶음 점수의 평균
+      n_triplets, verdict: (세션,)
+    """
+    types = np.asarray(types)
+    questions = np.sort(np.concatenate(triplet_pairs(types)))
+    features = question_features(data, times, questions)
+    triplet, diffs = triplet_scores(features, types[questions], weights)
+    score, n = exam_score(triplet)
+    return {
+        "features": features,
+        "questions": questions,
+        "diffs": diffs,
+        "triplet": triplet,
+        "score": score,
+        "n_triplets": n,
+        "verdict": verdict(score, n, cutoff),
+    }
+
+
+def score_epochs(epochs: Epochs, weights: dict | None = None, cutoff: float = SCORE_CUTOFF) -> dict:
+    """
+    pupil.epochs.Epochs 채점. 결과에 세션 이름(sessions)을 함께 담음.
+    """
+    result = score_exams(epochs.data, epochs.times, epochs.types, weights, cutoff)
+    result["sessions"] = list(epochs.sessions)
+    return result
+
+
+def score_recording(rec, charts, weights: dict | None = None, cutoff: float = SCORE_CUTOFF) -> dict:
+    """
+    정리된 기록 하나(차트 여러 개를 이어서 진행) 채점.
+    charts: 차트별 (타임라인, 오디오 시작 시각 — 기록 첫 샘플로부터 초) 목록.
+    결과는 score_exams와 같고 세션 축 길이가 1. 차트별 구간은 epochs에 담음.
+    """
+    rec = rec if isinstance(rec, Recording) else Recording(rec)
+    t_start = float(rec["timestamp"][0])
+    epochs = epoch_sessions([
+        (f"chart{k}", rec, timeline, t_start + offset)
+        for k, (timeline, offset) in enumerate(charts, start=1)
+    ])
+    result = score_exams(epochs.data[None], epochs.times, epochs.types, weights, cutoff)
+    result["epochs"] = epochs
+    return result
+
+
+def synthetic_epochs(n_sessions: int, n_charts: int = 3, rate: float = 60.0, seed: int = 0):
+    """
+    벤치마크용 합성 구간. 세션 절반은 R에, 나머지는 C에 더 크게 반응.
+    (data (세션, 차트, 11, 샘플), times, types, 정답 판정 코드) 반환.
+    """
+    rng = np.random.default_rng(seed)
+    types = np.array(["I", "SR", "N", "C", "R", "N", "C", "R", "N", "C", "R"])
+    times = np.arange(-int(rate), int(POST_S * rate)) / rate
+    response = np.clip(times, 0, None) * np.exp(-np.clip(times, 0, None) / 1.5)
+    amp = rng.uniform(0.05, 0.2, (n_sessions, n_charts, len(types), 1)).astype(np.float32)
+    truth = np.where(np.arange(n_sessions) % 2 == 0, VERDICT_DI, VERDICT_NDI)
+    salient = np.where(truth == VERDICT_DI, "R", "C")
+    amp *= np.where(types[None, :] == salient[:, None], 2.5, 1.0)[:, None, :, None]
+    data = (amp * response).astype(np.float32)
+    data += rng.normal(0, 0.02, data.shape).astype(np.float32)
+    return data, times, types, truth
+
+
+def benchmark(n_sessions: int = 10000, n_charts: int = 3, repeat: int = 3) -> dict:
+    data, times, types, truth = synthetic_epochs(n_sessions, n_charts)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = score_exams(data, times, types)
+        best = min(best, time.perf_counter() - started)
+    return {
+        "sessions": n_sessions,
+        "charts": n_charts,
+        "seconds": best,
+        "exams_per_second": n_sessions / best,
+        "accuracy": float(np.mean(result["verdict"] == truth)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="동공 구간 R 대 C 채점")
+    parser.add_argument("epochs", nargs="?", help="pupil.epochs로 저장한 디렉터리")
+    parser.add_argument("--benchmark", type=int, metavar="N", default=None, help="합성 검사 N개로 처리량 측정")
+    parser.add_argument("--charts", type=int, default=3)
+    parser.add_argument("--cutoff", type=float, default=SCORE_CUTOFF)
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        stats = benchmark(args.benchmark, args.charts)
+        print(
+            f"{stats['sessions']}검사 x {stats['charts']}차트: {stats['seconds'] * 1000:.1f} ms "
+            f"({stats['exams_per_second']:,.0f} 검사/s), 합성 정답 일치율 {stats['accuracy']:.1%}"
+        )
+        return
+    if not args.epochs:
+        parser.error("epochs 디렉터리 또는 --benchmark 가 필요합니다.")
+    result = score_epochs(Epochs.load(args.epochs), cutoff=args.cutoff)
+    for name, score, n, code in zip(result["sessions"], result["score"], result["n_triplets"], result["verdict"]):
+        print(f"{name}\t{score:+.3f}\t{n}묶음\t{VERDICT_LABELS[int(code)]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# 저장소 루트의 exam / pupil 패키지를 그대로 import (설치 없이 pytest 실행)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPHTHEON_TTS_BACKEND", "offline")
@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+
+import pytest
+
+from exam import tts
+from exam.backends import OfflineBackend
+from exam.cache import AudioCache
+from exam.latency import Deadline
+
+
+class FailingBackend(OfflineBackend):
+    def speech(self, text, timeout=None):
+        raise AssertionError("캐시에 올라온 결과를 써야 함")
+
+
+def test_different_keys_synthesize_concurrently(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    backend = OfflineBackend(latency=0.5)
+    started = time.monotonic()
+    threads = [threading.Thread(target=tts.synthesize, args=(backend, text, cache)) for text in ("질문 하나", "질문 둘")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert time.monotonic() - started < 0.9
+    assert cache.stats()["entries"] == 2
+
+
+def test_lock_files_are_removed(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    backend = OfflineBackend()
+    for n in range(20):
+        tts.synthesize(backend, f"질문 {n}", cache)
+    assert os.listdir(cache.lock_dir) == []
+
+
+def test_waiter_uses_published_result(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    backend = FailingBackend()
+    key = tts.segment_key(backend, "질문")
+    audio = OfflineBackend().speech("질문")
+
+    def other_worker(ready):
+        with cache.lock(key) as locked:
+            assert locked
+            ready.set()
+            time.sleep(0.2)
+            cache.put(key, audio, tts.TTS_FORMAT)
+
+    ready = threading.Event()
+    worker = threading.Thread(target=other_worker, args=(ready,))
+    worker.start()
+    ready.wait()
+    assert tts.synthesize(backend, "질문", cache) == audio
+    worker.join()
+
+
+def test_waiter_respects_deadline(tmp_path):
+    pytest.importorskip("fcntl")
+    cache = AudioCache(str(tmp_path))
+    backend = FailingBackend()
+    with cache.lock(tts.segment_key(backend, "질문")):
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            tts.synthesize(backend, "질문", cache, deadline=Deadline(0.2))
+        assert time.monotonic() - started < 0.6
@@ -0,0 +1,118 @@
+import http.client
+
+import pytest
+
+from exam import audio_server
+from exam.artifacts import ArtifactStore
+from exam.audio_server import AudioServer, is_loopback, parse_range
+
+
+@pytest.mark.parametrize("host, expected", [
+    ("localhost", True), ("localhost:8501", True), ("127.0.0.1", True), ("127.0.1.1:8501", True),
+    ("::1", True), ("[::1]:8501", True), ("exam.example", False), ("10.0.0.5:8501", False), ("0.0.0.0", False),
+])
+def test_is_loopback(host, expected):
+    assert is_loopback(host) is expected
+
+
+@pytest.fixture
+def server(tmp_path):
+    servers = []
+
+    def start(host):
+        s = AudioServer(None, None, host=host, port=0)
+        servers.append(s)
+        return s
+
+    yield start
+    for s in servers:
+        s.httpd.server_close()
+
+
+def test_loopback_server_only_reachable_from_local_browser(server, monkeypatch):
+    monkeypatch.setattr(audio_server, "AUDIO_SERVER_URL", "")
+    local = server("127.0.0.1")
+    assert local.reachable_from("localhost:8501")
+    assert not local.reachable_from("exam.example:8501")
+    assert not local.reachable_from(None)
+    # 프록시 주소가 있으면 브라우저는 그 주소로 접속
+    monkeypatch.setattr(audio_server, "AUDIO_SERVER_URL", "https://exam.example/audio")
+    assert local.reachable_from("exam.example")
+
+
+def test_public_server_reachable(server, monkeypatch):
+    monkeypatch.setattr(audio_server, "AUDIO_SERVER_URL", "")
+    assert server("0.0.0.0").reachable_from("exam.example:8501")
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-99", (0, 100)),
+    ("bytes=100-", (100, 1000)),
+    ("bytes=900-5000", (900, 1000)),
+    ("bytes=-200", (800, 1000)),
+    ("bytes=-5000", (0, 1000)),
+    # 해석할 수 없거나 여러 범위면 전체 전송
+    ("bytes=5-1", None),
+    ("bytes=0-1,5-9", None),
+    ("items=0-1", None),
+    ("bytes=a-b", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=5000-6000", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1000)
+
+
+@pytest.fixture
+def served(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts"))
+    data = bytes(range(256)) * 40
+    path = store.put("owner", data)
+    s = AudioServer(None, store, host="127.0.0.1", port=0).start()
+
+    def get(headers=None, method="GET"):
+        conn = http.client.HTTPConnection("127.0.0.1", s.port, timeout=5)
+        conn.request(method, s.artifact_path(path), headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response, body
+
+    yield data, get
+    s.stop()
+
+
+def test_served_ranges(served):
+    data, get = served
+    response, body = get()
+    assert response.status == 200 and body == data
+    assert response.getheader("Accept-Ranges") == "bytes"
+    etag = response.getheader("ETag")
+
+    response, body = get({"Range": "bytes=100-199"})
+    assert response.status == 206 and body == data[100:200]
+    assert response.getheader("Content-Range") == f"bytes 100-199/{len(data)}"
+
+    response, body = get({"Range": "bytes=-10"})
+    assert response.status == 206 and body == data[-10:]
+
+    # If-Range가 현재 ETag와 같을 때만 부분 전송, 다르면 전체
+    response, body = get({"Range": "bytes=0-9", "If-Range": etag})
+    assert response.status == 206 and body == data[:10]
+    response, body = get({"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status == 200 and body == data
+
+    response, body = get({"Range": f"bytes={len(data)}-"})
+    assert response.status == 416 and body == b""
+    assert response.getheader("Content-Range") == f"bytes */{len(data)}"
+
+    response, body = get({"If-None-Match": etag})
+    assert response.status == 304 and body == b""
+    response, body = get({"Range": "bytes=0-9"}, method="HEAD")
+    assert response.status == 206 and response.getheader("Content-Length") == "10" and body == b""
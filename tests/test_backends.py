@@ -0,0 +1,34 @@
+import pytest
+
+from exam.backends import OfflineBackend, TTSBackend, make_backend
+from exam.mp3 import duration_ms
+
+
+def test_backend_without_speech_fails_at_creation():
+    class Broken(TTSBackend):
+        name = "broken"
+
+    with pytest.raises(TypeError):
+        Broken()
+
+
+def test_offline_backend_is_deterministic():
+    a, b = OfflineBackend(jitter=0.5), OfflineBackend(jitter=0.5)
+    text = "당신은 그 돈을 가져갔습니까?"
+    assert OfflineBackend().speech(text) == OfflineBackend().speech(text)
+    assert a.simulated_latency(text) == b.simulated_latency(text)
+    assert a.simulated_latency(text) != a.simulated_latency(text + " ")
+    assert OfflineBackend().speech("질문") != OfflineBackend().speech("조금 더 긴 질문입니다")
+
+
+def test_offline_backend_length_and_timeout():
+    backend = OfflineBackend(chars_per_second=10.0, latency=0.2)
+    assert duration_ms(backend.speech("가" * 20)) == pytest.approx(2000, abs=60)
+    with pytest.raises(TimeoutError):
+        backend.speech("질문", timeout=0.01)
+
+
+def test_make_backend():
+    assert isinstance(make_backend("offline"), OfflineBackend)
+    with pytest.raises(ValueError):
+        make_backend("unknown")
@@ -0,0 +1,65 @@
+import json
+import os
+
+import numpy as np
+
+from pupil.batch import _trim_partial_line, load_results, run_batch
+from pupil.recording import RecordingWriter
+
+RATE = 50.0
+TYPES = ["I", "SR", "N", "C", "R", "N", "C", "R", "N", "C", "R"]
+TIMELINE = {
+    "events": [
+        {"type": t, "position": k, "index": k, "onset_ms": 2000 + 8000 * k, "offset_ms": 4000 + 8000 * k}
+        for k, t in enumerate(TYPES)
+    ],
+}
+FAST = {"verdict": {"n_boot": 20, "n_perm": 20}}
+
+
+def make_session(root, name, seed=0):
+    path = os.path.join(root, name)
+    os.makedirs(path)
+    t = np.arange(int(103 * RATE)) / RATE
+    pupil = (4.0 + np.random.default_rng(seed).normal(0, 0.02, len(t))).astype(np.float32)
+    with RecordingWriter(os.path.join(path, "rec.pupil"), ["timestamp", "left_diameter"]) as w:
+        w.append({"timestamp": t, "left_diameter": pupil})
+        w.meta["sample_rate"] = RATE
+    with open(os.path.join(path, "chart1.events.json"), "w", encoding="utf-8") as f:
+        json.dump(TIMELINE, f)
+    with open(os.path.join(path, "session.json"), "w", encoding="utf-8") as f:
+        json.dump({"audio_onsets": [3.0]}, f)
+
+
+def test_trim_partial_line(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    with open(path, "w") as f:
+        f.write('{"a": 1}\n{"b": 2}\n{"c": ')
+    _trim_partial_line(path, block=4)
+    assert open(path).read() == '{"a": 1}\n{"b": 2}\n'
+    _trim_partial_line(path)
+    assert open(path).read() == '{"a": 1}\n{"b": 2}\n'
+    with open(path, "w") as f:
+        f.write('{"c": ')
+    _trim_partial_line(path)
+    assert open(path).read() == ""
+
+
+def test_resume_after_partial_write(tmp_path):
+    archive, out = str(tmp_path / "archive"), str(tmp_path / "out")
+    cache = str(tmp_path / "cache")
+    make_session(archive, "a")
+    assert run_batch(archive, out, workers=1, params=FAST, cache_dir=cache)["scored"] == 1
+
+    # 줄을 쓰다 멈춘 것처럼 끝에 조각을 남기고, 새 세션을 추가해 다시 실행
+    results = os.path.join(out, "results.jsonl")
+    with open(results, "a", encoding="utf-8") as f:
+        f.write('{"session": "b", "finger')
+    make_session(archive, "b", seed=1)
+    assert run_batch(archive, out, workers=1, params=FAST, cache_dir=cache)["scored"] == 1
+
+    with open(results, encoding="utf-8") as f:
+        assert [json.loads(line)["session"] for line in f] == ["a", "b"]
+    assert sorted(load_results(results)) == ["a", "b"]
+    counts = run_batch(archive, out, workers=1, params=FAST, cache_dir=cache)
+    assert counts["scored"] == 0 and counts["skipped"] == 2
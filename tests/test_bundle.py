@@ -0,0 +1,142 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+from exam.bundle import MANIFEST_NAME, BundleError, build_bundle_bytes, is_bundle, load_bundle
+from exam.mp3 import silence
+from exam.script import build_exam_sequence, build_script_segments, questions_from_question_set
+from exam.timeline import assemble_exam_audio
+
+QUESTION_SET = {
+    "I": "오늘 검사에 성실히 답하겠습니까?",
+    "SR": "오늘 질문에 거짓 없이 답하겠습니까?",
+    "N": ["지금 앉아 있습니까?", "오늘은 화요일입니까?", "이름이 홍길동입니까?"],
+    "C": ["남의 물건을 탐낸 적이 있습니까?", "거짓말을 한 적이 있습니까?", "약속을 어긴 적이 있습니까?"],
+    "R": ["지갑을 훔쳤습니까?", "지갑을 가져갔습니까?", "지갑을 숨겼습니까?"],
+}
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    seq = build_exam_sequence(questions_from_question_set(QUESTION_SET))
+    segments = build_script_segments(seq)
+    rendered = {seg["text"]: silence(200 + 10 * k) for k, seg in enumerate(segments) if "text" in seg}
+    audio, timeline = assemble_exam_audio(segments, rendered)
+    data = build_bundle_bytes("지갑을 훔치지 않았다", QUESTION_SET, segments, rendered, timeline)
+    return {"seq": seq, "segments": segments, "rendered": rendered, "audio": audio, "timeline": timeline,
+            "data": data}
+
+
+def rewrite(data: bytes, manifest=None, raw: bytes | None = None, members=None) -> bytes:
+    """
+    번들의 manifest(또는 그 원본 바이트)나 다른 멤버를 바꿔 새 zip으로.
+    """
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(data)) as src, zipfile.ZipFile(out, "w") as dst:
+        for info in src.infolist():
+            body = src.read(info.filename)
+            if info.filename == MANIFEST_NAME:
+                if raw is not None:
+                    body = raw
+                elif manifest is not None:
+                    body = json.dumps(manifest(json.loads(body)), ensure_ascii=False).encode("utf-8")
+            elif members and info.filename in members:
+                body = members[info.filename]
+            dst.writestr(info.filename, body)
+    return out.getvalue()
+
+
+def manifest_of(data: bytes) -> dict:
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        return json.loads(zf.read(MANIFEST_NAME))
+
+
+def test_round_trip(bundle):
+    assert is_bundle(bundle["data"])
+    loaded = load_bundle(io.BytesIO(bundle["data"]))
+    assert loaded["core_claim"] == "지갑을 훔치지 않았다"
+    assert loaded["question_set"] == QUESTION_SET
+    assert loaded["seq"] == bundle["seq"]
+    assert loaded["rendered"] == bundle["rendered"]
+    assert loaded["audio"] == bundle["audio"]
+    assert loaded["timeline"] == bundle["timeline"]
+
+
+def drop(key):
+    def edit(manifest):
+        del manifest[key]
+        return manifest
+    return edit
+
+
+def segment_without_text(manifest):
+    first = next(seg for seg in manifest["segments"] if "text" in seg)
+    del first["text"]
+    return manifest
+
+
+@pytest.mark.parametrize("edit", [
+    drop("sequence"),
+    drop("segments"),
+    drop("question_set"),
+    drop("format"),
+    segment_without_text,
+    lambda m: dict(m, segments=[{"kind": "gap"}]),
+    lambda m: dict(m, audio=[{"file": "audio/x.mp3"}]),
+    lambda m: dict(m, sequence="I SR N C R"),
+    lambda m: [m],
+    lambda m: "manifest",
+], ids=["no-sequence", "no-segments", "no-question-set", "no-format", "segment-no-text", "gap-no-ms",
+        "audio-no-text", "sequence-not-list", "list", "string"])
+def test_malformed_manifest(bundle, edit):
+    with pytest.raises(BundleError):
+        load_bundle(io.BytesIO(rewrite(bundle["data"], manifest=edit)))
+
+
+def test_bad_utf8_manifest(bundle):
+    with pytest.raises(BundleError):
+        load_bundle(io.BytesIO(rewrite(bundle["data"], raw=b"\xff\xfe{not json")))
+
+
+def test_invalid_json_manifest(bundle):
+    with pytest.raises(BundleError):
+        load_bundle(io.BytesIO(rewrite(bundle["data"], raw=b"{\"format\": ")))
+
+
+def test_tampered_sequence(bundle):
+    def edit(manifest):
+        manifest["sequence"][0]["text"] = "다른 질문"
+        return manifest
+
+    with pytest.raises(BundleError, match="손상"):
+        load_bundle(io.BytesIO(rewrite(bundle["data"], manifest=edit)))
+
+
+def test_missing_audio_member(bundle):
+    name = manifest_of(bundle["data"])["audio"][0]["file"]
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(bundle["data"])) as src, zipfile.ZipFile(out, "w") as dst:
+        for info in src.infolist():
+            if info.filename != name:
+                dst.writestr(info.filename, src.read(info.filename))
+    with pytest.raises(BundleError, match="오디오 조각"):
+        load_bundle(io.BytesIO(out.getvalue()))
+
+
+def test_corrupt_member(bundle):
+    name = manifest_of(bundle["data"])["audio"][0]["file"]
+    data = bytearray(bundle["data"])
+    with zipfile.ZipFile(io.BytesIO(bytes(data))) as zf:
+        info = zf.getinfo(name)
+    # 로컬 헤더 뒤 데이터 한가운데 바이트를 바꿔 CRC 불일치 (BadZipFile)
+    start = info.header_offset + 30 + len(info.filename.encode("utf-8")) + len(info.extra)
+    data[start + info.compress_size // 2] ^= 0xFF
+    with pytest.raises(BundleError):
+        load_bundle(io.BytesIO(bytes(data)))
+
+
+def test_not_a_zip():
+    with pytest.raises(BundleError):
+        load_bundle(io.BytesIO(b"PK\x03\x04garbage"))
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+
+from pupil.ingest import _fill_empty, _infer_timestamp_scale, ingest, parse_chunk
+from pupil.recording import Recording
+
+
+def write_export(path, n=300, step_ms=16.667):
+    # 빈 칸(무효 샘플) / CRLF 줄바꿈 / ms 단위 타임스탬프
+    rows = ["Timestamp,PupilLeft,PupilRight,LeftValidity"]
+    for k in range(n):
+        left = "" if k % 7 == 0 else f"{3 + 0.01 * k:.3f}"
+        right = "" if k % 11 == 0 else f"{3.2 + 0.01 * k:.3f}"
+        valid = "" if k % 13 == 0 else "1"
+        rows.append(f"{1_000_000 + k * step_ms:.3f},{left},{right},{valid}")
+    with open(path, "w", newline="") as f:
+        f.write("\r\n".join(rows) + "\r\n")
+
+
+@pytest.mark.parametrize("chunk_bytes", [8, 60, 1000])
+def test_chunk_size_does_not_change_result(tmp_path, chunk_bytes):
+    src = str(tmp_path / "export.csv")
+    write_export(src)
+    whole = ingest(src, str(tmp_path / "whole.pupil"), chunk_bytes=1 << 20)
+    part = ingest(src, str(tmp_path / "part.pupil"), chunk_bytes=chunk_bytes)
+
+    for key in ("n_samples", "timestamp_scale", "sample_rate", "t0", "source_columns"):
+        assert part[key] == whole[key], key
+    a, b = Recording(str(tmp_path / "whole.pupil")), Recording(str(tmp_path / "part.pupil"))
+    assert a.columns == b.columns
+    for column in a.columns:
+        np.testing.assert_array_equal(a[column], b[column], err_msg=column)
+
+
+def test_empty_cells_and_units(tmp_path):
+    src = str(tmp_path / "export.csv")
+    write_export(src, n=30)
+    meta = ingest(src, str(tmp_path / "rec.pupil"), chunk_bytes=8)
+    rec = Recording(str(tmp_path / "rec.pupil"))
+    assert meta["timestamp_scale"] == 1e-3
+    assert meta["sample_rate"] == pytest.approx(60, abs=0.01)
+    assert rec["timestamp"][0] == pytest.approx(1000.0)
+    left = np.asarray(rec["left_diameter"])
+    assert np.isnan(left[::7]).all() and np.isfinite(np.delete(left, np.s_[::7])).all()
+    assert np.isnan(rec["right_diameter"][11])
+    assert np.isnan(rec["left_validity"][13])
+
+
+def test_fill_empty():
+    data = b"1,,3,\r\n,2,,\n"
+    assert _fill_empty(data, b",").split(b"\n") == [b"", b"1,nan,3,nan", b"nan,2,nan,nan", b"", b""]
+    values = parse_chunk(b"1,,3\n4,5,\n", ",", [0, 1, 2])
+    np.testing.assert_array_equal(np.isnan(values), [[False, True, False], [False, False, True]])
+
+
+@pytest.mark.parametrize("step, scale", [(0.004, 1.0), (4.0, 1e-3), (4000.0, 1e-6), (4e6, 1e-9)])
+def test_infer_timestamp_scale(step, scale):
+    assert _infer_timestamp_scale(np.arange(50) * step + 123.0) == scale
@@ -0,0 +1,198 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+openai = pytest.importorskip("openai")
+
+from exam import latency, tts
+from exam.backends import OpenAIBackend
+from exam.latency import Deadline, LatencyTracker, backoff_delay, call_with_hedge
+from exam.mp3 import silence
+
+AUDIO = silence(300)
+
+
+class FakeTTSServer:
+    """
+    /v1/audio/speech 흉내. 요청마다 script에서 (지연 초, 상태 코드, 헤더)를 하나씩 꺼내고,
+    다 쓰면 마지막 항목을 반복.
+    """
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.requests = []
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with fake._lock:
+                    fake.requests.append(time.monotonic())
+                    n = len(fake.requests)
+                    delay, status, headers = fake.script[min(n, len(fake.script)) - 1]
+                time.sleep(delay)
+                body = AUDIO if status == 200 else b'{"error": {"message": "fake", "type": "fake"}}'
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "audio/mpeg" if status == 200 else "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def fake_tts():
+    servers = []
+
+    def start(script):
+        server = FakeTTSServer(script)
+        servers.append(server)
+        client = openai.OpenAI(base_url=server.base_url, api_key="test", max_retries=0)
+        return server, OpenAIBackend(lambda: client)
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_latency(monkeypatch):
+    # 다른 테스트의 호출 기록이 헤지 기준에 섞이지 않게
+    monkeypatch.setattr(tts, "_latency", LatencyTracker())
+    monkeypatch.setattr(tts, "_latency_per_char", LatencyTracker())
+
+
+def test_hedge_fires_after_hedge_after(fake_tts):
+    server, backend = fake_tts([(1.5, 200, {}), (0.0, 200, {})])
+    started = time.monotonic()
+    audio = call_with_hedge(lambda: backend.speech("질문"), hedge_after=0.2)
+    elapsed = time.monotonic() - started
+
+    assert audio == AUDIO
+    assert len(server.requests) == 2
+    assert server.requests[1] - started >= 0.2
+    assert elapsed < 1.0
+
+
+def test_no_hedge_when_first_call_is_fast(fake_tts):
+    server, backend = fake_tts([(0.0, 200, {})])
+    assert call_with_hedge(lambda: backend.speech("질문"), hedge_after=0.5) == AUDIO
+    time.sleep(0.6)
+    assert len(server.requests) == 1
+
+
+def test_no_hedge_without_free_slot(fake_tts, monkeypatch):
+    # 연결 한도만큼 요청이 떠 있으면 헤지를 보내지 않음
+    monkeypatch.setattr(latency, "_hedge_slots", threading.BoundedSemaphore(1))
+    server, backend = fake_tts([(0.5, 200, {}), (0.0, 200, {})])
+    assert call_with_hedge(lambda: backend.speech("질문"), hedge_after=0.1) == AUDIO
+    assert len(server.requests) == 1
+
+
+def test_hedged_requests_time_out(fake_tts, monkeypatch):
+    # 헤지 기준 0.2초 × 3 → 요청마다 0.6초 타임아웃. 둘 다 느리면 서버 지연(3초)을 기다리지 않음
+    monkeypatch.setattr(tts, "TTS_HEDGE_MIN_DELAY", 0.2)
+    monkeypatch.setattr(tts, "TTS_HEDGE_TIMEOUT_FACTOR", 3.0)
+    for _ in range(tts.TTS_HEDGE_MIN_SAMPLES):
+        tts._latency_per_char.record(0.001)
+    server, backend = fake_tts([(3.0, 200, {})])
+    started = time.monotonic()
+    with pytest.raises(openai.APITimeoutError):
+        tts._call_tts(backend, "질문")
+    assert time.monotonic() - started < 1.5
+    assert len(server.requests) == 2
+
+
+def test_hedge_trigger_follows_per_char_p95():
+    assert tts._hedge_after("가" * 10) is None
+    for k in range(tts.TTS_HEDGE_MIN_SAMPLES):
+        tts._latency_per_char.record(0.1 if k < tts.TTS_HEDGE_MIN_SAMPLES - 1 else 1.0)
+    p95 = tts._latency_per_char.percentile(tts.TTS_HEDGE_PERCENTILE)
+    assert tts._hedge_after("가" * 100) == pytest.approx(p95 * 100)
+    assert tts._hedge_after("가") == tts.TTS_HEDGE_MIN_DELAY
+
+
+def test_retry_after_header_is_used(fake_tts):
+    server, backend = fake_tts([(0.0, 429, {"Retry-After": "0.8"}), (0.0, 200, {})])
+    with pytest.raises(openai.RateLimitError) as info:
+        backend.speech("질문")
+    assert backoff_delay(info.value, 0, tts.TTS_RETRY_DELAY, tts.TTS_RETRY_MAX_DELAY) == pytest.approx(0.8)
+
+    server.requests.clear()
+    started = time.monotonic()
+    assert tts.synthesize_with_retry(backend, "질문", retries=1) == AUDIO
+    # 지터 백오프만이라면 첫 재시도는 TTS_RETRY_DELAY(0.5초) 안에 나감
+    assert len(server.requests) == 2
+    assert server.requests[1] - started >= 0.8
+
+
+def test_retry_after_is_capped():
+    class Response:
+        headers = {"retry-after": "120"}
+
+    class Error(Exception):
+        response = Response()
+
+    assert backoff_delay(Error(), 0, 0.5, 8.0) == 8.0
+
+
+def test_client_error_is_not_retried(fake_tts):
+    server, backend = fake_tts([(0.0, 400, {})])
+    with pytest.raises(openai.BadRequestError):
+        tts.synthesize_with_retry(backend, "질문", retries=3)
+    assert len(server.requests) == 1
+
+
+def test_deadline_stops_retries(fake_tts):
+    server, backend = fake_tts([(0.1, 503, {})])
+    deadline = Deadline(0.6)
+    started = time.monotonic()
+    # 마지막 시도는 남은 시간을 요청 타임아웃으로 쓰므로 타임아웃으로 끝날 수도 있음
+    with pytest.raises((openai.InternalServerError, openai.APITimeoutError, TimeoutError)):
+        tts.synthesize_with_retry(backend, "질문", retries=50, deadline=deadline)
+    assert time.monotonic() - started < 1.5
+    assert len(server.requests) < 10
+
+
+def test_deadline_check():
+    deadline = Deadline(0.05)
+    deadline.check()
+    time.sleep(0.06)
+    assert deadline.remaining() == 0.0
+    with pytest.raises(TimeoutError):
+        deadline.check()
+    assert Deadline(None).remaining() is None
+
+
+def test_timeouts_are_recorded(fake_tts):
+    server, backend = fake_tts([(1.0, 200, {}), (0.0, 400, {})])
+    with pytest.raises(openai.APITimeoutError):
+        tts._call_tts(backend, "질문", Deadline(0.3))
+    with pytest.raises(openai.BadRequestError):
+        tts._call_tts(backend, "질문")
+    stats = tts.latency_stats()
+    # 타임아웃은 기다린 시간을 지연으로, 400은 횟수만
+    assert stats["count"] == 1 and stats["p99"] >= 0.25
+    assert stats["failures"] == 2 and stats["timeouts"] == 1
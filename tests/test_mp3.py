@@ -0,0 +1,49 @@
+import pytest
+
+from exam.mp3 import duration_ms, extract_frames, iter_frames, parse_frame_header, silence, silent_frame
+
+
+def test_parse_silent_frame_header():
+    frame = silent_frame(2, 24000, 1)
+    header = parse_frame_header(frame, 0)
+    assert header == {
+        "version": 2, "layer": 3, "bitrate": 8000, "sample_rate": 24000,
+        "channels": 1, "samples": 576, "length": len(frame),
+    }
+    assert parse_frame_header(silent_frame(1, 44100, 2), 0)["samples"] == 1152
+    assert parse_frame_header(b"\x00\x00\x00\x00", 0) is None
+    assert parse_frame_header(frame[:3], 0) is None
+
+
+def id3(payload: bytes = b"\x00" * 20) -> bytes:
+    n = len(payload)
+    size = bytes([(n >> 21) & 0x7F, (n >> 14) & 0x7F, (n >> 7) & 0x7F, n & 0x7F])
+    return b"ID3\x04\x00\x00" + size + payload
+
+
+def test_iter_frames_skips_tags_info_frame_and_junk():
+    frame = silent_frame()
+    info = bytearray(frame)
+    info[8:12] = b"Info"
+    data = id3() + bytes(info) + frame * 2 + b"junk" + frame + b"TAG" + bytes(125)
+    offsets = [offset for offset, _ in iter_frames(data)]
+    assert len(offsets) == 3
+    assert all(data[o:o + len(frame)] == frame for o in offsets)
+
+
+def test_extract_frames_concatenates_by_frames():
+    a, b = silence(1000), id3() + silence(500)
+    frames_a, samples_a, fmt = extract_frames(a)
+    frames_b, samples_b, _ = extract_frames(b)
+    assert fmt == (2, 24000, 1)
+    joined, samples, _ = extract_frames(frames_a + frames_b)
+    assert joined == frames_a + frames_b
+    assert samples == samples_a + samples_b
+    assert duration_ms(joined) == pytest.approx(samples * 1000 / 24000)
+    assert duration_ms(silence(1000)) == pytest.approx(1000, abs=576 / 24)
+
+
+def test_extract_frames_rejects_mixed_formats():
+    with pytest.raises(ValueError):
+        extract_frames(silence(100, 2, 24000) + silence(100, 2, 22050))
+    assert extract_frames(b"") == (b"", 0, None)
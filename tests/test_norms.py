@@ -0,0 +1,39 @@
+import json
+
+from pupil.norms import ALL, build_from_results
+
+
+def write_rows(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def test_rescored_session_counts_once(tmp_path):
+    path = tmp_path / "results.jsonl"
+    write_rows(path, [
+        {"session": "a", "params": "p1", "score": -0.5},
+        {"session": "b", "params": "p1", "score": 0.2},
+        # a를 매개변수를 바꿔 다시 채점 → 마지막 줄만
+        {"session": "a", "params": "p2", "score": 0.4},
+        {"session": "b", "error": "ValueError: 실패"},
+    ])
+    index = build_from_results([str(path)])
+    assert index.n_records == 2
+    assert index.count("score", ALL) == 2
+    # a는 0.4 하나, b는 0.2 → 0.3은 둘 사이
+    pct, n = index.percentile("score", 0.3)
+    assert n == 2 and pct == 50.0
+
+
+def test_filter_by_params(tmp_path):
+    path = tmp_path / "results.jsonl"
+    write_rows(path, [
+        {"session": "a", "params": "p1", "score": -0.5},
+        {"session": "a", "params": "p2", "score": 0.4},
+        {"session": "b", "params": "p2", "score": 0.2},
+    ])
+    index = build_from_results([str(path)], params="p1")
+    assert index.n_records == 1
+    pct, n = index.percentile("score", 0.0)
+    assert n == 1 and pct == 100.0
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from pupil.online import OnlineScorer, RunningStats
+from pupil.recording import RecordingWriter
+from pupil.scoring import FEATURES, VERDICT_DI, score_recording
+
+RATE = 50.0
+TYPES = ["I", "SR", "N", "C", "R", "N", "C", "R", "N", "C", "R"]
+# 질문 시작이 샘플 격자 위에 오도록 (오프라인 구간은 가장 가까운 샘플을 씀)
+TIMELINE = {
+    "events": [
+        {"type": t, "position": k, "index": k, "onset_ms": 2000 + 8000 * k, "offset_ms": 4000 + 8000 * k}
+        for k, t in enumerate(TYPES)
+    ],
+}
+AUDIO_ONSET = 3.0
+
+
+def recording(path, salient="R", seed=0):
+    duration = AUDIO_ONSET + TIMELINE["events"][-1]["onset_ms"] / 1000 + 10
+    t = np.arange(int(duration * RATE)) / RATE
+    rng = np.random.default_rng(seed)
+    pupil = 4.0 + rng.normal(0, 0.02, len(t))
+    for e in TIMELINE["events"]:
+        on = AUDIO_ONSET + e["onset_ms"] / 1000
+        amp = 0.3 if e["type"] == salient else 0.1
+        rel = t - on
+        pupil += np.where((rel >= 0) & (rel < 5), amp * np.sin(np.clip(rel, 0, 5) / 5 * np.pi), 0)
+    pupil = pupil.astype(np.float32)
+    with RecordingWriter(path, ["timestamp", "pupil"]) as w:
+        w.append({"timestamp": t, "pupil": pupil})
+        w.meta["sample_rate"] = RATE
+    return t, pupil
+
+
+@pytest.mark.parametrize("chunk", [1, 37, 500])
+def test_online_features_match_offline(tmp_path, chunk):
+    t, pupil = recording(str(tmp_path / "rec.pupil"))
+    offline = score_recording(str(tmp_path / "rec.pupil"), [(TIMELINE, AUDIO_ONSET)])
+
+    scorer = OnlineScorer(TIMELINE, audio_onset=AUDIO_ONSET)
+    for start in range(0, len(t), chunk):
+        scorer.push(t[start:start + chunk], pupil[start:start + chunk])
+    status = scorer.status()
+
+    questions = offline["questions"]
+    for name in FEATURES:
+        np.testing.assert_allclose(scorer.features[name][questions], offline["features"][name].ravel(), atol=1e-5)
+    assert status["done"]
+    assert status["score"] == pytest.approx(float(offline["score"][0]), abs=1e-5)
+    np.testing.assert_allclose(status["triplets"], offline["triplet"].ravel(), atol=1e-5)
+    assert status["verdict"] == int(offline["verdict"][0]) == VERDICT_DI
+
+
+def test_online_waits_for_audio_onset(tmp_path):
+    t, pupil = recording(str(tmp_path / "rec.pupil"), salient="C")
+    scorer = OnlineScorer(TIMELINE)
+    scorer.push(t[:100], pupil[:100])
+    assert not scorer.status()["started"]
+    assert scorer.set_audio_onset(AUDIO_ONSET, replace=False)
+    assert not scorer.set_audio_onset(99.0, replace=False)
+    scorer.push(t[100:], pupil[100:])
+    status = scorer.status()
+    assert status["done"] and status["score"] > 0
+
+
+def test_running_stats_merge_equals_single_pass():
+    rng = np.random.default_rng(1)
+    t = np.arange(1000) / 100
+    x = rng.normal(4, 0.3, 1000)
+
+    single = RunningStats()
+    single.update(t, x)
+    left, right = RunningStats(), RunningStats()
+    left.update(t[:313], x[:313])
+    right.update(t[313:], x[313:])
+    merged = RunningStats().merge(left).merge(right).merge(RunningStats())
+    chunked = RunningStats()
+    for start in range(0, 1000, 7):
+        chunked.update(t[start:start + 7], x[start:start + 7])
+
+    for stats in (merged, chunked):
+        assert stats.n == single.n == 1000
+        assert stats.mean == pytest.approx(x.mean(), rel=1e-12)
+        assert stats.variance == pytest.approx(x.var(ddof=1), rel=1e-9)
+        assert stats.peak == single.peak == x.max()
+        assert stats.t_peak == single.t_peak == t[x.argmax()]
@@ -0,0 +1,64 @@
+import threading
+import time
+
+from exam.prefetch import ExamAudioPrefetcher
+
+
+def seq_of(text):
+    return [{"type": "N", "index": 1, "text": text}]
+
+
+def render(seq):
+    return seq[0]["text"].encode("utf-8"), {"events": []}
+
+
+def test_take_pops_finished_job():
+    prefetcher = ExamAudioPrefetcher(render)
+    prefetcher.submit(seq_of("a"))
+    assert prefetcher.take(seq_of("a"), timeout=5) == (b"a", {"events": []})
+    assert len(prefetcher) == 0
+    assert prefetcher.take(seq_of("a"), timeout=0) is None
+
+
+def test_take_keeps_running_job_on_timeout():
+    release = threading.Event()
+
+    def slow(seq):
+        release.wait(5)
+        return render(seq)
+
+    prefetcher = ExamAudioPrefetcher(slow)
+    prefetcher.submit(seq_of("a"))
+    assert prefetcher.take(seq_of("a"), timeout=0) is None
+    assert len(prefetcher) == 1
+    release.set()
+    assert prefetcher.take(seq_of("a"), timeout=5) == (b"a", {"events": []})
+    assert len(prefetcher) == 0
+
+
+def test_failed_job_is_dropped_on_take():
+    def broken(seq):
+        raise RuntimeError("tts down")
+
+    prefetcher = ExamAudioPrefetcher(broken)
+    prefetcher.submit(seq_of("a"))
+    assert prefetcher.take(seq_of("a"), timeout=5) is None
+    assert len(prefetcher) == 0
+
+
+def test_expired_jobs_are_dropped_on_take():
+    prefetcher = ExamAudioPrefetcher(render, ttl_seconds=0)
+    prefetcher.submit(seq_of("a"))
+    time.sleep(0.05)
+    assert prefetcher.take(seq_of("b"), timeout=0) is None
+    assert len(prefetcher) == 0
+
+
+def test_job_count_is_capped():
+    prefetcher = ExamAudioPrefetcher(render, max_jobs=3)
+    for k in range(10):
+        prefetcher.submit(seq_of(str(k)))
+        time.sleep(0.01)
+    assert len(prefetcher) <= 3
+    # 가장 최근 것은 남아 있음
+    assert prefetcher.take(seq_of("9"), timeout=5) == (b"9", {"events": []})
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from pupil.preprocess import preprocess_recording
+from pupil.recording import Recording, RecordingWriter
+
+RATE = 250.0
+CHUNK = 1000
+
+
+def raw_recording(path):
+    n = int(40 * RATE)
+    t = np.arange(n) / RATE
+    rng = np.random.default_rng(0)
+    base = 4.0 + 0.3 * np.sin(t / 3) + rng.normal(0, 0.01, n)
+    left, right = base.copy(), base + 0.2 + rng.normal(0, 0.01, n)
+    # 청크 경계(1000, 3000번째 샘플)에 걸친 깜빡임, 보간 한도를 넘는 손실, 한쪽 눈만의 손실
+    left[990:1030] = 0.0
+    right[985:1040] = 0.0
+    left[2950:3060] = np.nan
+    right[2950:3060] = np.nan
+    left[5500:5900] = 0.0
+    right[5500:5900] = 0.0
+    left[7400:7450] = 0.0
+    with RecordingWriter(path, ["timestamp", "left_diameter", "right_diameter"]) as w:
+        w.append({"timestamp": t, "left_diameter": left, "right_diameter": right})
+        w.meta["sample_rate"] = RATE
+    return Recording(path)
+
+
+@pytest.mark.parametrize("target_rate", [60.0, None])
+def test_chunked_matches_single_pass(tmp_path, target_rate):
+    rec = raw_recording(str(tmp_path / "raw.pupil"))
+    whole_q = preprocess_recording(rec, str(tmp_path / "whole.pupil"), target_rate=target_rate, chunk_size=1 << 20)
+    part_q = preprocess_recording(rec, str(tmp_path / "part.pupil"), target_rate=target_rate, chunk_size=CHUNK)
+    whole, part = Recording(str(tmp_path / "whole.pupil")), Recording(str(tmp_path / "part.pupil"))
+
+    assert part.n_samples == whole.n_samples
+    np.testing.assert_allclose(part["timestamp"], whole["timestamp"], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(part["pupil"], whole["pupil"], rtol=0, atol=1e-5, equal_nan=True)
+    np.testing.assert_array_equal(part["interpolated"], whole["interpolated"])
+    assert part_q == whole_q
+
+
+def test_gaps_are_interpolated_or_dropped(tmp_path):
+    rec = raw_recording(str(tmp_path / "raw.pupil"))
+    quality = preprocess_recording(rec, str(tmp_path / "clean.pupil"), target_rate=None, chunk_size=CHUNK)
+    clean = Recording(str(tmp_path / "clean.pupil"))
+    pupil = np.asarray(clean["pupil"])
+    # 짧은 깜빡임(경계에 걸친 것 포함)은 보간, 1초를 넘는 손실은 NaN
+    assert np.isfinite(pupil[980:1050]).all() and clean["interpolated"][1000]
+    assert np.isnan(pupil[5600:5800]).all()
+    assert quality["blinks"] >= 2 and quality["dropouts"] >= 1
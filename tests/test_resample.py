@@ -0,0 +1,62 @@
+import importlib
+import warnings
+
+import numpy as np
+import pytest
+
+from pupil import resample
+from pupil.resample import resample_exams, resample_scores
+from pupil.scoring import synthetic_epochs
+
+
+@pytest.fixture(scope="module")
+def exams():
+    data, times, types, _ = synthetic_epochs(6, 3)
+    return data, times, types
+
+
+# 차트 3 × 묶음 3 = 9묶음 → 2^9 = 512가 정확 검정 경계
+@pytest.mark.parametrize("n_perm, exact", [(510, False), (4096, True)])
+def test_workers_do_not_change_result(exams, n_perm, exact):
+    # 블록이 여러 개가 되도록 반복 수를 RESAMPLE_BLOCK보다 크게
+    kwargs = dict(n_boot=1200, n_perm=n_perm, seed=7)
+    one = resample_exams(*exams, workers=1, **kwargs)
+    two = resample_exams(*exams, workers=2, **kwargs)
+    assert one["exact"] is exact
+    for name, value in one.items():
+        np.testing.assert_array_equal(value, two[name], err_msg=name)
+
+
+def test_same_seed_same_result(exams):
+    a = resample_exams(*exams, n_boot=300, n_perm=300, seed=3)
+    b = resample_exams(*exams, n_boot=300, n_perm=300, seed=3)
+    np.testing.assert_array_equal(a["ci_low"], b["ci_low"])
+    np.testing.assert_array_equal(a["p_value"], b["p_value"])
+
+
+def test_exact_permutation_p_value():
+    # 묶음 점수 [1, 1]: 부호 조합 4가지의 평균 1, 0, 0, -1 → |평균| >= 1 은 2/4
+    result = resample_scores(np.array([[1.0, 1.0], [1.0, -0.5]]), n_boot=10, n_perm=100, min_triplets=1)
+    assert result["exact"]
+    np.testing.assert_allclose(result["p_value"], [0.5, 1.0])
+
+
+def test_zero_iterations_do_not_warn():
+    triplet = np.array([[0.3, 0.2, 0.4], [np.nan, np.nan, np.nan]])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = resample_scores(triplet, n_boot=0, n_perm=0)
+    assert result["ci_low"][0] == result["ci_high"][0] == result["score"][0]
+    assert np.isnan(result["verdict_support"]).all()
+    assert np.isnan(result["p_value"]).all()
+    assert np.isnan(result["score"][1])
+
+
+@pytest.mark.parametrize("text, expected", [("none", None), ("None", None), ("-1", None), ("5", 5), ("abc", 0), ("1.5", 0)])
+def test_seed_env(monkeypatch, text, expected):
+    monkeypatch.setenv("OPHTHEON_RESAMPLE_SEED", text)
+    try:
+        assert importlib.reload(resample).RESAMPLE_SEED == expected
+    finally:
+        monkeypatch.delenv("OPHTHEON_RESAMPLE_SEED")
+        importlib.reload(resample)
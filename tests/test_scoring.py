@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from pupil.scoring import (
+    MIN_TRIPLETS,
+    SCORE_CUTOFF,
+    VERDICT_DI,
+    VERDICT_INC,
+    VERDICT_NDI,
+    exam_score,
+    question_features,
+    relative_difference,
+    score_exams,
+    triplet_pairs,
+    triplet_scores,
+    verdict,
+)
+
+TYPES = np.array(["I", "SR", "N", "C", "R", "N", "C", "R", "N", "C", "R"])
+RATE = 10
+# 기준선 1초 + 반응 구간 [0, 6)
+TIMES = np.arange(-RATE, 6 * RATE) / RATE
+
+
+def triangle(height: float, t_peak: float) -> np.ndarray:
+    """
+    0초부터 올라가 t_peak에 height, 6초에 0으로 내려오는 구간 (기준선 0).
+    """
+    up = np.clip(TIMES / t_peak, 0, None)
+    down = np.clip((6 - TIMES) / (6 - t_peak), 0, None)
+    return np.where(TIMES < 0, 0.0, height * np.minimum(up, down)).astype(np.float32)
+
+
+def test_triplet_pairs():
+    c_idx, r_idx = triplet_pairs(TYPES)
+    assert c_idx.tolist() == [3, 6, 9]
+    assert r_idx.tolist() == [4, 7, 10]
+    with pytest.raises(ValueError):
+        triplet_pairs(["N", "C", "R", "C"])
+
+
+def test_question_features_fixed_curve():
+    data = np.stack([triangle(0.4, 1.5), triangle(0.2, 3.0)])
+    features = question_features(data, TIMES)
+    assert features["peak"] == pytest.approx([0.4, 0.2])
+    assert features["latency"] == pytest.approx([1.5, 3.0])
+    # 샘플 평균 × 구간 길이 (삼각형 면적 0.5 × 6 × 높이 와 거의 같음)
+    expected = [data[k, TIMES >= 0].mean() * 6 for k in range(2)]
+    assert features["auc"] == pytest.approx(expected, rel=1e-5)
+    assert features["auc"][0] == pytest.approx(0.5 * 6 * 0.4, rel=0.05)
+
+
+def test_question_features_min_valid():
+    curve = triangle(0.4, 1.5)
+    sparse = curve.copy()
+    sparse[TIMES >= 0] = np.nan
+    sparse[TIMES == 1.5] = 0.4
+    half = curve.copy()
+    half[(TIMES >= 0) & (TIMES < 2.9)] = np.nan
+    features = question_features(np.stack([sparse, half]), TIMES, min_valid=0.5)
+    assert np.isnan(features["peak"][0]) and np.isnan(features["latency"][0]) and np.isnan(features["auc"][0])
+    # 절반 남짓 남았으면 남은 샘플로 계산
+    assert features["peak"][1] == pytest.approx(curve[TIMES >= 2.9].max())
+
+
+def test_relative_difference():
+    assert relative_difference(np.float32(3), np.float32(1)) == pytest.approx(0.5)
+    assert relative_difference(np.float32(1), np.float32(3)) == pytest.approx(-0.5)
+    assert relative_difference(np.float32(0), np.float32(0)) == 0
+
+
+def test_triplet_scores_and_latency_sign():
+    q = TYPES[np.sort(np.concatenate(triplet_pairs(TYPES)))]  # C R C R C R
+    features = {
+        # C 반응이 더 큼 / R이 더 큼 / 같음
+        "peak": np.array([0.3, 0.1, 0.1, 0.3, 0.2, 0.2], dtype=np.float32),
+        # C가 더 빨리 최대 → 진실 쪽 (부호 뒤집힘)
+        "latency": np.array([1.0, 3.0, 3.0, 1.0, 2.0, 2.0], dtype=np.float32),
+        "auc": np.array([0.6, 0.2, 0.2, 0.6, 0.4, 0.4], dtype=np.float32),
+    }
+    score, diffs = triplet_scores(features, q)
+    assert diffs["peak"] == pytest.approx([0.5, -0.5, 0.0], abs=1e-5)
+    assert diffs["latency"] == pytest.approx([0.5, -0.5, 0.0], abs=1e-5)
+    assert diffs["auc"] == pytest.approx([0.5, -0.5, 0.0], abs=1e-5)
+    assert score == pytest.approx([0.5, -0.5, 0.0], abs=1e-5)
+
+    score, _ = triplet_scores(features, q, {"latency": 1.0})
+    assert score == pytest.approx([0.5, -0.5, 0.0], abs=1e-5)
+
+
+def test_exam_score_skips_nan_triplets():
+    triplet = np.array([[0.3, np.nan, 0.1], [np.nan, np.nan, np.nan]], dtype=np.float32)
+    score, n = exam_score(triplet)
+    assert score[0] == pytest.approx(0.2)
+    assert np.isnan(score[1])
+    assert n.tolist() == [2, 0]
+
+
+def test_verdict_at_cutoff_and_min_triplets():
+    score = np.array([SCORE_CUTOFF, SCORE_CUTOFF - 1e-3, -SCORE_CUTOFF, 0.0, 0.9, np.nan], dtype=np.float64)
+    n = np.array([MIN_TRIPLETS] * 5 + [MIN_TRIPLETS])
+    assert verdict(score, n).tolist() == [VERDICT_NDI, VERDICT_INC, VERDICT_DI, VERDICT_INC, VERDICT_NDI, VERDICT_INC]
+    assert verdict(np.array([0.9]), np.array([MIN_TRIPLETS - 1])).tolist() == [VERDICT_INC]
+    assert verdict(np.array([-0.9]), np.array([1]), min_triplets=1).tolist() == [VERDICT_DI]
+
+
+def test_score_exams_end_to_end():
+    truthful = np.stack([triangle(0.4 if t == "C" else 0.1, 1.5) for t in TYPES])
+    deceptive = np.stack([triangle(0.4 if t == "R" else 0.1, 1.5) for t in TYPES])
+    result = score_exams(np.stack([truthful, deceptive]), TIMES, TYPES)
+    assert result["questions"].tolist() == [3, 4, 6, 7, 9, 10]
+    assert result["n_triplets"].tolist() == [3, 3]
+    # 지연 시간이 같으면 latency 비교는 0 → 0.4·0.6 + 0.4·0.6
+    assert result["score"] == pytest.approx([0.48, -0.48], abs=1e-3)
+    assert result["verdict"].tolist() == [VERDICT_NDI, VERDICT_DI]
@@ -0,0 +1,150 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from exam.singleflight import file_lock
+from pupil.cache import ENTRY_NAME, StageCache, content_hash, hash_json
+from pupil.pipeline import resolve_params, run_pipeline, stage_keys
+from pupil.recording import RecordingWriter
+
+RATE = 50.0
+TYPES = ["I", "SR", "N", "C", "R", "N", "C", "R", "N", "C", "R"]
+TIMELINE = {
+    "events": [
+        {"type": t, "position": k, "index": k, "onset_ms": 2000 + 8000 * k, "offset_ms": 4000 + 8000 * k}
+        for k, t in enumerate(TYPES)
+    ],
+}
+CHARTS = [(TIMELINE, 3.0)]
+# 재표집은 이 테스트의 관심사가 아니므로 작게
+FAST = {"verdict": {"n_boot": 20, "n_perm": 20}}
+
+
+def write_recording(path, seed=0):
+    t = np.arange(int((3.0 + 90 + 10) * RATE)) / RATE
+    pupil = (4.0 + np.random.default_rng(seed).normal(0, 0.02, len(t))).astype(np.float32)
+    with RecordingWriter(path, ["timestamp", "left_diameter"]) as w:
+        w.append({"timestamp": t, "left_diameter": pupil})
+        w.meta["sample_rate"] = RATE
+    return path
+
+
+def params(**overrides):
+    merged = {stage: dict(values) for stage, values in FAST.items()}
+    for stage, values in overrides.items():
+        merged.setdefault(stage, {}).update(values)
+    return merged
+
+
+def test_content_hash_follows_content(tmp_path):
+    a = tmp_path / "a.bin"
+    a.write_bytes(b"pupil")
+    first = content_hash(str(a))
+    a.write_bytes(b"pupil")
+    os.utime(a, ns=(1, 1))
+    assert content_hash(str(a)) == first
+    a.write_bytes(b"PUPIL")
+    assert content_hash(str(a)) != first
+    assert hash_json({"x": 1, "y": [1, 2]}) == hash_json({"y": [1, 2], "x": 1})
+
+
+def test_stage_keys_change_only_downstream():
+    base = stage_keys("src", CHARTS, resolve_params())
+    epoch = stage_keys("src", CHARTS, resolve_params({"epoch": {"pre": 2.0}}))
+    assert [base[s] == epoch[s] for s in base] == [True, True, False, False, False]
+    other = stage_keys("other", CHARTS, resolve_params())
+    assert all(base[s] != other[s] for s in base)
+
+
+def test_pipeline_reuses_and_invalidates(tmp_path):
+    cache = StageCache(str(tmp_path / "cache"))
+    src = write_recording(str(tmp_path / "rec.pupil"))
+
+    first = run_pipeline(src, CHARTS, cache, params())
+    assert first["stages"] == {"ingest": "skip", "clean": "run", "epoch": "run", "features": "run", "verdict": "run"}
+    again = run_pipeline(src, CHARTS, cache, params())
+    assert again["stages"] == {"verdict": "hit"}
+    assert again["score"] == first["score"] or np.isnan(first["score"])
+
+    changed = run_pipeline(src, CHARTS, cache, params(verdict={"cutoff": 0.5}))
+    assert changed["stages"] == {"features": "hit", "verdict": "run"}
+    changed = run_pipeline(src, CHARTS, cache, params(epoch={"pre": 0.5}))
+    assert changed["stages"] == {"clean": "hit", "epoch": "run", "features": "run", "verdict": "run"}
+
+    # 앞 단계 원본이 바뀌면 전부 다시
+    write_recording(src, seed=1)
+    rebuilt = run_pipeline(src, CHARTS, cache, params())
+    assert rebuilt["keys"]["clean"] != first["keys"]["clean"]
+    assert rebuilt["stages"]["clean"] == "run"
+
+
+def fill(cache, stage, key, size):
+    def build(out):
+        with open(os.path.join(out, "data.bin"), "wb") as f:
+            f.write(b"\0" * size)
+    return cache.get_or_build(stage, key, build)[0]
+
+
+def age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_evict_lru_over_capacity(tmp_path):
+    cache = StageCache(str(tmp_path), max_bytes=10_000, grace_seconds=0)
+    old = fill(cache, "clean", "old", 4000)
+    mid = fill(cache, "clean", "mid", 4000)
+    age(old, 20)
+    age(mid, 10)
+    new = fill(cache, "clean", "new", 4000)
+    assert not os.path.exists(old)
+    assert os.path.isfile(os.path.join(mid, ENTRY_NAME))
+    assert os.path.isfile(os.path.join(new, ENTRY_NAME))
+
+    # 다시 읽은 항목은 가장 최근 사용
+    assert cache.peek("clean", "mid") == mid
+    fill(cache, "clean", "newer", 4000)
+    assert os.path.exists(mid) and not os.path.exists(new)
+
+
+def test_evict_expired(tmp_path):
+    cache = StageCache(str(tmp_path), ttl_seconds=60, grace_seconds=0)
+    stale = fill(cache, "clean", "stale", 10)
+    age(stale, 120)
+    fill(cache, "clean", "fresh", 10)
+    assert not os.path.exists(stale)
+
+
+def test_evict_skips_recently_used(tmp_path):
+    cache = StageCache(str(tmp_path), max_bytes=1, grace_seconds=60)
+    first = fill(cache, "clean", "first", 4000)
+    fill(cache, "clean", "second", 4000)
+    assert os.path.exists(first)
+    age(first, 120)
+    cache.evict()
+    assert not os.path.exists(first)
+
+
+def test_evict_skips_locked_entry(tmp_path):
+    cache = StageCache(str(tmp_path), max_bytes=1, grace_seconds=0)
+    busy = fill(cache, "clean", "busy", 4000)
+    age(busy, 120)
+    # 다른 작업자가 이 항목의 잠금을 잡고 있는 동안은 지우지 않음
+    with file_lock(cache.lock_dir, "clean-busy") as locked:
+        assert locked
+        cache.evict()
+        assert os.path.exists(busy)
+    cache.evict()
+    assert not os.path.exists(busy)
+
+
+def test_nonblocking_lock_reports_contention(tmp_path):
+    pytest.importorskip("fcntl")
+    with file_lock(str(tmp_path), "k") as outer:
+        assert outer
+        with file_lock(str(tmp_path), "k", blocking=False) as inner:
+            assert not inner
+    with file_lock(str(tmp_path), "k", blocking=False) as again:
+        assert again
@@ -0,0 +1,61 @@
+import os
+import time
+
+import pytest
+
+from exam.artifacts import ArtifactStore
+from exam.backends import OfflineBackend
+from exam.script import build_script_segments
+from exam.streaming import ExamAudioStream, StreamCancelled, StreamRegistry
+
+TYPES = ["I", "SR", "N", "C", "R", "N", "C", "R", "N", "C", "R"]
+SEGMENTS = build_script_segments([{"type": t, "index": k, "text": f"질문 {k}번"} for k, t in enumerate(TYPES)])
+
+
+def make_stream(store, owner, backend, finished):
+    return ExamAudioStream(
+        backend, SEGMENTS, store.begin(owner), owner=owner, max_workers=1,
+        on_finish=lambda path, timeline: finished.append(store.finish(path)) or finished[-1],
+    )
+
+
+def test_stream_finishes(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    finished = []
+    stream = StreamRegistry().start(make_stream(store, "owner", OfflineBackend(), finished))
+    path, timeline = stream.result(timeout=10)
+    assert finished == [path] and os.path.isfile(path)
+    assert stream.status()["ready_segments"] == len(SEGMENTS)
+
+
+def test_drop_stops_writer_before_release(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    registry = StreamRegistry()
+    finished = []
+    stream = registry.start(make_stream(store, "owner", OfflineBackend(latency=0.2), finished))
+    stream.wait(1, timeout=5)
+
+    started = time.monotonic()
+    registry.drop("owner")
+    assert stream.done
+    assert time.monotonic() - started < 1.0
+    store.release("owner")
+
+    with pytest.raises(StreamCancelled):
+        stream.result(timeout=0)
+    assert finished == []
+    assert stream.status()["ready_segments"] < len(SEGMENTS)
+    # 정리한 뒤에 쓰기 스레드가 파일을 다시 만들지 않음
+    time.sleep(0.5)
+    assert not os.path.exists(os.path.join(str(tmp_path), "owner"))
+
+
+def test_new_stream_cancels_previous(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    registry = StreamRegistry()
+    old = registry.start(make_stream(store, "owner", OfflineBackend(latency=0.2), []))
+    new = registry.start(make_stream(store, "owner", OfflineBackend(), []))
+    assert old.join(timeout=2)
+    with pytest.raises(StreamCancelled):
+        old.result(timeout=0)
+    assert new.result(timeout=10)[0]
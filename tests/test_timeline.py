@@ -0,0 +1,66 @@
+import numpy as np
+
+from exam.backends import OfflineBackend
+from exam.mp3 import duration_ms, iter_frames
+from exam.script import build_script_segments
+from exam.streaming import ExamAudioStream
+from exam.timeline import assemble_exam_audio
+
+TYPES = ["I", "SR", "N", "C", "R", "N", "C", "R", "N", "C", "R"]
+# 질문마다 길이가 달라 조각별 프레임 수가 다름
+SEQ = [{"type": t, "index": k, "text": "질문" + " 가나다" * (k + 1)} for k, t in enumerate(TYPES)]
+
+
+def render(segments):
+    backend = OfflineBackend()
+    return {seg["text"]: backend.speech(seg["text"]) for seg in segments if "text" in seg}
+
+
+def frame_samples(data: bytes) -> int:
+    return sum(header["samples"] for _, header in iter_frames(data))
+
+
+def test_events_match_cumulative_frame_samples():
+    segments = build_script_segments(SEQ)
+    rendered = render(segments)
+    audio, timeline = assemble_exam_audio(segments, rendered)
+
+    # 조각별 mp3를 따로 세어 누적한 샘플 위치
+    expected = []
+    cursor = 0
+    for seg in segments:
+        if seg["kind"] == "gap":
+            samples = round(seg["ms"] / 1000 * 24000 / 576) * 576
+        else:
+            samples = frame_samples(rendered[seg["text"]])
+        if seg["kind"] == "question":
+            expected.append({"onset_sample": cursor, "offset_sample": cursor + samples})
+        elif seg.get("role") == "response_delay":
+            expected[-1]["response_sample"] = cursor + samples
+        elif seg.get("role") == "response_window":
+            expected[-1]["window_end_sample"] = cursor + samples
+        cursor += samples
+
+    events = timeline["events"]
+    assert [e["type"] for e in events] == TYPES
+    assert [e["position"] for e in events] == list(range(1, len(TYPES) + 1))
+    for event, want in zip(events, expected):
+        for name, sample in want.items():
+            assert event[name] == sample
+            assert event[name.replace("_sample", "_ms")] == round(sample * 1000 / 24000, 3)
+
+    # 결과 파일의 프레임 경계와도 일치
+    boundaries = set(np.cumsum([0] + [h["samples"] for _, h in iter_frames(audio)]).tolist())
+    assert all(e[k] in boundaries for e in events for k in ("onset_sample", "offset_sample", "window_end_sample"))
+    assert frame_samples(audio) == cursor
+    assert timeline["duration_ms"] == round(duration_ms(audio), 3)
+
+
+def test_streamed_timeline_matches_assembled(tmp_path):
+    segments = build_script_segments(SEQ)
+    audio, timeline = assemble_exam_audio(segments, render(segments))
+    stream = ExamAudioStream(OfflineBackend(), segments, str(tmp_path / "exam.mp3.part")).start()
+    path, streamed = stream.result(timeout=10)
+    assert streamed == timeline
+    with open(path, "rb") as f:
+        assert f.read() == audio